@@ -11,8 +11,10 @@ log = get_logger(__name__)
 
 from jukedj import models
 from jukeboxcore import djadapter
+from jukeboxmaya import common
 from jukeboxmaya.menu import MenuManager
 from jukeboxmaya.mayaplugins import jbscene
+from jukeboxmaya.reftrack.taskfileresolver import TaskfileResolver
 from jukeboxmaya.plugins import JB_MayaPlugin, MayaPluginManager
 from jukeboxmaya.gui.main import maya_main_window
 
@@ -220,7 +222,7 @@ class MayaGenesis(JB_MayaPlugin):
                     return
                 tfid = cmds.getAttr('%s.taskfile_id' % node)
                 try:
-                    return djadapter.taskfiles.get(id=tfid)
+                    return TaskfileResolver.get().get_taskfile(tfid)
                 except djadapter.models.TaskFile.DoesNotExist:
                     log.error("No taskfile with id %s was found. Get current scene failed. Check your jb_sceneNode \'%s\'." % (tfid, node))
                     return
@@ -251,9 +253,9 @@ class MayaGenesis(JB_MayaPlugin):
                 :raises: None
                 """
                 node = self.get_scene_node()
-                cmds.setAttr('%s.taskfile_id' % node, lock=False)
-                cmds.setAttr('%s.taskfile_id' % node, tf.id)
-                cmds.setAttr('%s.taskfile_id' % node, lock=True)
+                common.set_attributes([node], {'taskfile_id': [tf.id]}, lock=True)
+                # the taskfile might have been missing before
+                TaskfileResolver.get().invalidate_missing()
 
             def check_modified(self, ):
                 """Check if the current scene was modified and ask the user to continue
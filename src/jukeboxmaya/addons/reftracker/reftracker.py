@@ -1,8 +1,99 @@
+from jukeboxcore.reftrack import Reftrack
 from jukeboxcore.gui.widgets.reftrackwin import ReftrackWin
-from jukeboxmaya.reftrack.refobjinter import MayaRefobjInterface
+from jukeboxmaya.reftrack.refobjinter import get_refobjinterface
 from jukeboxmaya.gui.main import maya_main_window
 from jukeboxmaya.plugins import JB_MayaPlugin
 from jukeboxmaya.menu import MenuManager
+from jukeboxmaya import sceneepoch
+
+
+class SceneUpdater(object):
+    """Keeps the reftracks of a root up to date with the reftrack nodes of the scene,
+    without wrapping the whole scene again.
+
+    The updater is only valid for the scene it was created in. See :func:`jukeboxmaya.sceneepoch.get_scene`.
+    """
+
+    def __init__(self, root, refobjinter):
+        """Initialize a new updater for a root, that just wrapped the whole scene
+
+        :param root: the root that wrapped the scene
+        :type root: :class:`jukeboxcore.reftrack.ReftrackRoot`
+        :param refobjinter: the refobjinterface to query the scene
+        :type refobjinter: :class:`jukeboxmaya.reftrack.refobjinter.MayaRefobjInterface`
+        :raises: None
+        """
+        self.root = root
+        self.inter = refobjinter
+        self.wrapped = set(refobjinter.get_all_refobjs())
+        self.scene = sceneepoch.get_scene()
+
+    def is_wrapped(self, refobj):
+        """Return True, if the root has a reftrack for the given refobj
+
+        :param refobj: the reftrack node
+        :type refobj: str
+        :returns: True, if wrapped
+        :rtype: bool
+        :raises: None
+        """
+        try:
+            return self.root.get_reftrack(refobj) is not None
+        except KeyError:
+            return False
+
+    def update(self, ):
+        """Wrap only the reftrack nodes, that are new since the last wrap and refresh the statuses.
+
+        Compares the reftrack nodes in the scene with the ones that were wrapped the last time.
+        Nodes, that got deleted with the reftracker itself, are already gone from the root.
+        If nodes got deleted by other means, there is no way to drop a single reftrack from the root,
+        so nothing is wrapped and False is returned.
+        False is also returned, if another scene was opened or created since the last wrap,
+        or if the scene cannot be tracked, because the :class:`jukeboxmaya.sceneepoch.SceneEpoch` is not installed.
+        The statuses of the reftracks that were wrapped before are updated,
+        e.g. if references were loaded or unloaded in the Reference Editor.
+
+        :returns: True, if the root is up to date. False, if the scene has to be wrapped again.
+        :rtype: bool
+        :raises: None
+        """
+        scene = sceneepoch.get_scene()
+        if scene is None or scene != self.scene:
+            return False
+        current = self.inter.get_all_refobjs()
+        currentset = set(current)
+        for refobj in self.wrapped - currentset:
+            if self.is_wrapped(refobj):
+                return False
+        old = [r for r in current if r in self.wrapped and self.is_wrapped(r)]
+        for refobj, status in zip(old, self.inter.get_statuses(old)):
+            reftrack = self.root.get_reftrack(refobj)
+            if reftrack.status() != status:
+                reftrack.set_status(status)
+        new = [r for r in current if r not in self.wrapped and not self.is_wrapped(r)]
+        if new:
+            Reftrack.wrap(self.root, self.inter, new)
+        self.wrapped = currentset
+        return True
+
+    def add(self, specs):
+        """Create many reftrack nodes at once and wrap them
+
+        The nodes are created with :meth:`jukeboxmaya.reftrack.refobjinter.MayaRefobjInterface.create_many`.
+        Parents have to be wrapped already or be created earlier in the same call.
+
+        :param specs: tuples of entity type, identifier and parent reftrack node or None
+        :type specs: list
+        :returns: the new reftrack nodes
+        :rtype: list
+        :raises: ValueError
+        """
+        nodes = self.inter.create_many(specs)
+        if nodes:
+            Reftrack.wrap(self.root, self.inter, nodes)
+            self.wrapped.update(nodes)
+        return nodes
 
 
 class Reftracker(JB_MayaPlugin):
@@ -23,7 +114,9 @@ class Reftracker(JB_MayaPlugin):
         :raises:
         """
         self.win = None
-        self.inter = MayaRefobjInterface()
+        self.updater = None
+        c = self.get_config()
+        self.inter = get_refobjinterface(c['refobjinterface'])()
 
     def uninit(self, ):
         """Uninitialize the plugin. Do nothing
@@ -57,7 +150,25 @@ class Reftracker(JB_MayaPlugin):
         self.mm.delete_menu(self.menu)
 
     def run(self, *args, **kwargs):
-        """Start genesis
+        """Start the reftracker
+
+        If the window is still open, only the changes in the scene are wrapped.
+        See :meth:`Reftracker.update_scene`.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if self.win and self.updater and self.update_scene():
+            self.win.show()
+            self.win.raise_()
+            return
+        self.rebuild()
+
+    def rebuild(self, ):
+        """Create a new window and wrap the whole scene
+
+        The cached scene suggestions are refreshed.
 
         :returns: None
         :rtype: None
@@ -65,11 +176,24 @@ class Reftracker(JB_MayaPlugin):
         """
         if self.win:
             self.win.deleteLater()
+        self.inter.invalidate_suggestions()
         mayawin = maya_main_window()
         self.win = ReftrackWin(self.inter, parent=mayawin)
         self.win.destroyed.connect(self.win_destroyed)
         self.win.show()
         self.win.wrap_scene()
+        self.updater = SceneUpdater(self.win.root, self.inter)
+
+    def update_scene(self, ):
+        """Wrap only the reftrack nodes, that are new since the last wrap and refresh the statuses.
+
+        See :meth:`SceneUpdater.update`.
+
+        :returns: True, if the window is up to date. False, if it needs a rebuild.
+        :rtype: bool
+        :raises: None
+        """
+        return self.updater.update()
 
     def win_destroyed(self, *args, **kwargs):
         """Set the internal reference to the window to None, because the window has been destroyed
@@ -1,11 +1,20 @@
 """Wrappers around common maya commands.
 These functions are inteded to be used in :class:`jukeboxcore.actions.ActionUnit`.
 """
+import time
+
 import maya.cmds as cmds
+import maya.api.OpenMaya as om
 
 from jukeboxcore.action import ActionStatus
 from jukeboxcore import djadapter as dj
+from jukeboxmaya import common
+from jukeboxmaya.dbmirror import DBMirror
 from jukeboxmaya.mayaplugins.jbscene import get_current_scene_node
+from jukeboxmaya.reftrack.taskfileresolver import TaskfileResolver
+from jukeboxmaya.reftrack.refobjinter import MayaRefobjInterface
+from jukeboxmaya.reftrack.asset import AssetReftypeInterface
+from jukeboxmaya.reftrack.preflight import preflight
 
 
 def open_scene(f, kwargs=None):
@@ -77,7 +86,8 @@ def import_all_references(arg, kwargs=None):
                      :importReference: ``True``
 
     :type kwargs: dict|None
-    :returns: An action status. The returnvalue of the actionstatus are the imported references.
+    :returns: An action status. The returnvalue of the actionstatus is a list of the imported reference files.
+              The message lists the seconds it took to import each of them.
     :rtype: :class:`ActionStatus`
     :raises: None
     """
@@ -86,16 +96,92 @@ def import_all_references(arg, kwargs=None):
         kwargs = {}
     kwargs.update(defaultkwargs)
     imported = []
+    timings = []
+    # handles by their hash code, so they can be compared without scanning all of them
+    done = {}
+    start = time.time()
+    with common.disable_undo():
+        with common.suspend_refresh():
+            levels = get_reference_levels()
+            while levels:
+                # parents are always imported before their children, so the children are top level references by then
+                for level in levels:
+                    for handle, rfile in level:
+                        done.setdefault(handle.hashCode(), []).append(handle)
+                        if not handle.isValid():
+                            continue
+                        refnode = om.MFnDependencyNode(handle.object()).name()
+                        refstart = time.time()
+                        cmds.file(referenceNode=refnode, **kwargs)
+                        imported.append(rfile)
+                        timings.append(time.time() - refstart)
+                # references in files that were unloaded before might appear now
+                levels = [[(h, f) for h, f in level if not any(h == d for d in done.get(h.hashCode(), ()))]
+                          for level in get_reference_levels()]
+                levels = [level for level in levels if level]
+    duration = time.time() - start
+    lines = ["Successfully imported %s references in %.3fs with arguments: %s" % (len(imported), duration, kwargs)]
+    lines.extend("%.3fs %s" % (t, rfile) for rfile, t in zip(imported, timings))
+    return ActionStatus(ActionStatus.SUCCESS, "\n".join(lines), returnvalue=imported)
+
+
+def get_reference_levels():
+    """Return the reference nodes of the current scene grouped by their depth in the reference hierarchy
+
+    Top level references come first, then the references inside them and so on.
+
+    :returns: a list of levels. Each level is a list of tuples of a :class:`om.MObjectHandle`
+              for the reference node and the reference file.
+    :rtype: list
+    :raises: None
+    """
+    refs = {}
+    for refnode in cmds.ls(type='reference') or []:
+        try:
+            rfile = cmds.referenceQuery(refnode, filename=True)
+        except RuntimeError:
+            continue  # reference nodes like the sharedReferenceNode have no file
+        parent = cmds.referenceQuery(refnode, referenceNode=True, parent=True)
+        refs[refnode] = (rfile, parent)
+    depths = {}
+    for refnode in refs:
+        chain = []
+        node = refnode
+        while node in refs and node not in depths and node not in chain:
+            chain.append(node)
+            node = refs[node][1]
+        depth = depths.get(node, -1)
+        for n in reversed(chain):
+            depth += 1
+            depths[n] = depth
+    levels = []
+    for refnode in sorted(refs, key=lambda r: depths[r]):
+        depth = depths[refnode]
+        while len(levels) <= depth:
+            levels.append([])
+        sel = om.MSelectionList()
+        sel.add(refnode)
+        levels[depth].append((om.MObjectHandle(sel.getDependNode(0)), refs[refnode][0]))
+    return levels
+
+
+def check_reference_files(arg, kwargs=None):
+    """Check the files of all reftracks in the currently open scene
+
+    See :func:`jukeboxmaya.reftrack.preflight.preflight`.
 
-    # list all reference files
-    refs = cmds.file(query=True, reference=True)
-    while refs:
-        for rfile in refs:
-            cmds.file(rfile, **kwargs)
-            imported.append(rfile)
-        refs = cmds.file(query=True, reference=True)
-    msg = "Successfully imported references %s with arguments: %s" % (imported, kwargs)
-    return ActionStatus(ActionStatus.SUCCESS, msg, returnvalue=imported)
+    :param arg: this argument is ignored. But thisway you can use this function in an ActionUnit more easily.
+    :param kwargs: keyword arguments for :func:`jukeboxmaya.reftrack.preflight.preflight`.
+    :type kwargs: dict|None
+    :returns: An action status. The returnvalue of the actionstatus is the :class:`jukeboxmaya.reftrack.preflight.PreflightReport`.
+    :rtype: :class:`ActionStatus`
+    :raises: None
+    """
+    if kwargs is None:
+        kwargs = {}
+    report = preflight(MayaRefobjInterface(), **kwargs)
+    status = ActionStatus.SUCCESS if report.ok() else ActionStatus.FAILURE
+    return ActionStatus(status, str(report), returnvalue=report)
 
 
 def update_scenenode(f):
@@ -120,8 +206,12 @@ def update_scenenode(f):
                           descriptor=tfi.descriptor,
                           typ=tfi.typ)
 
-    cmds.setAttr('%s.taskfile_id' % n, lock=False)
-    cmds.setAttr('%s.taskfile_id' % n, tf.pk)
-    cmds.setAttr('%s.taskfile_id' % n, lock=True)
+    common.set_attributes([n], {'taskfile_id': [tf.pk]}, lock=True)
+    # a release creates new taskfiles
+    TaskfileResolver.get().invalidate()
+    AssetReftypeInterface.invalidate_options(tf.task.element)
+    mirror = DBMirror.get()
+    if mirror is not None:
+        mirror.try_sync()
     msg = "Successfully updated scene node to %s" % tf.id
     return ActionStatus(ActionStatus.SUCCESS, msg)
@@ -1,13 +1,199 @@
 """Module for common maya actions"""
+from collections import OrderedDict
 from contextlib import contextmanager
 
 import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+
+MODIFIER_QUEUE = []
+"""Modifiers that wait to be executed by the ``jb_apiundo`` command. See :func:`do_modifier`."""
+
+
+class SceneStateLevel(object):
+    """The state that one level of a :class:`SceneStateGuard` restores when it exits.
+
+    Every state is None until the level changes it the first time.
+    """
+
+    def __init__(self, ):
+        """Initialize a new level
+
+        :raises: None
+        """
+        self.namespace = None
+        """The namespace when the level changed it the first time"""
+        self.selection = None
+        """The selection when the level saved it the first time"""
+        self.locks = OrderedDict()
+        """The lock state of every node when the level locked or unlocked it the first time"""
+
+
+class SceneStateGuard(object):
+    """Re-entrant guard for the current namespace, the selection and the lock state of nodes.
+
+    Use it as a contextmanager. Every level records the actual state when it changes it the first time
+    and restores it when it exits, also when it is nested in another level.
+    A level only queries the states that it changes and every state only once,
+    e.g. locking the same nodes again in one level does not query them again.
+    So bulk operations should use one level for all nodes instead of one level per node.
+    :func:`preserve_namespace`, :func:`preserve_selection` and :func:`locknode` each use one level.
+
+    .. Important:: Use SceneStateGuard.get() to obtain the guard!
+    """
+
+    guard = None
+    """SceneStateGuard instance when using SceneStateGuard.get()"""
+
+    def __init__(self, ):
+        """Initialize a new guard
+
+        :raises: None
+        """
+        self._levels = []
+
+    @classmethod
+    def get(cls):
+        """Return a SceneStateGuard instance.
+
+        This will always return the same instance. If the instance is not available
+        it will be created and returned.
+
+        :returns: always the same SceneStateGuard
+        :rtype: SceneStateGuard
+        :raises: None
+        """
+        if not cls.guard:
+            cls.guard = cls()
+        return cls.guard
+
+    @property
+    def depth(self, ):
+        """The number of levels that were entered and not exited yet"""
+        return len(self._levels)
+
+    def __enter__(self, ):
+        """Enter a new level
+
+        :returns: self
+        :rtype: :class:`SceneStateGuard`
+        :raises: None
+        """
+        self._levels.append(SceneStateLevel())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Leave a level and restore the state it recorded.
+
+        :returns: False
+        :rtype: bool
+        :raises: None
+        """
+        self.restore(self._levels.pop())
+        return False
+
+    def save_namespace(self, newns=None):
+        """Remember the current namespace, so it is restored when the level exits, and set the given one.
+
+        :param newns: the namespace to set. If None, does not set a namespace.
+        :type newns: str | None
+        :returns: None
+        :rtype: None
+        :raises: IndexError if no level was entered
+        """
+        level = self._levels[-1]
+        if level.namespace is None:
+            level.namespace = cmds.namespaceInfo(an=True)
+        if newns is not None:
+            cmds.namespace(set=newns)
+
+    def save_selection(self, ):
+        """Remember the selection, so it is restored when the level exits.
+
+        :returns: None
+        :rtype: None
+        :raises: IndexError if no level was entered
+        """
+        level = self._levels[-1]
+        if level.selection is None:
+            level.selection = cmds.ls(sl=True)
+
+    def lock(self, nodes, lock=True):
+        """Lock or unlock the given nodes with one call.
+
+        The lock state of every node is restored when the level exits.
+
+        :param nodes: the node or nodes to lock/unlock
+        :type nodes: str | list | tuple
+        :param lock: True for locking, False for unlocking
+        :type lock: bool
+        :returns: None
+        :rtype: None
+        :raises: IndexError if no level was entered
+        """
+        if isinstance(nodes, basestring):
+            nodes = [nodes]
+        nodes = list(nodes)
+        if not nodes:
+            return
+        locks = self._levels[-1].locks
+        new = [n for n in nodes if n not in locks]
+        if new:
+            for n, l in zip(new, cmds.lockNode(new, q=True)):
+                locks[n] = l
+        cmds.lockNode(nodes, lock=lock)
+
+    def set_locks(self, states):
+        """Set the lock states of the given nodes with one call per state.
+
+        Nodes that were deleted in the meantime are skipped.
+
+        :param states: the lock state for every node
+        :type states: dict
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        for state in (True, False):
+            nodes = [n for n, l in states.items() if l == state]
+            if not nodes:
+                continue
+            try:
+                cmds.lockNode(nodes, lock=state)
+            except (RuntimeError, ValueError):
+                # some nodes do not exist anymore
+                for n in nodes:
+                    if cmds.objExists(n):
+                        cmds.lockNode(n, lock=state)
+
+    def restore(self, level):
+        """Restore the lock states, the selection and the namespace of the given level.
+
+        Nodes that were deleted in the meantime are skipped.
+
+        :param level: the level to restore
+        :type level: :class:`SceneStateLevel`
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self.set_locks(level.locks)
+        if level.selection is not None:
+            selection = cmds.ls(level.selection) if level.selection else []
+            if selection:
+                cmds.select(selection, replace=True)
+            else:
+                cmds.select(clear=True)
+        if level.namespace is not None:
+            cmds.namespace(set=level.namespace)
 
 
 @contextmanager
 def preserve_namespace(newns=None):
     """Contextmanager that will restore the current namespace
 
+    Uses one level of the :class:`SceneStateGuard`.
+
     :param newns: a name of namespace that should be set in the beginning. the original namespace will be restored afterwards.
                   If None, does not set a namespace.
     :type newns: str | None
@@ -15,33 +201,274 @@ def preserve_namespace(newns=None):
     :rtype: None
     :raises: None
     """
-    ns = cmds.namespaceInfo(an=True)
-    try:
-        cmds.namespace(set=newns)
+    with SceneStateGuard.get() as guard:
+        guard.save_namespace(newns)
         yield
-    finally:
-        cmds.namespace(set=ns)
 
 
 @contextmanager
 def preserve_selection():
     """Contextmanager that will restore the current selection
 
+    Uses one level of the :class:`SceneStateGuard`.
+
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    with SceneStateGuard.get() as guard:
+        guard.save_selection()
+        yield
+
+
+@contextmanager
+def undo_chunk(name=None):
+    """Contextmanager that records everything inside in one undo chunk
+
+    :param name: the name of the chunk, shown in the undo queue
+    :type name: str | None
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    kwargs = {'openChunk': True}
+    if name:
+        kwargs['chunkName'] = name
+    cmds.undoInfo(**kwargs)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+@contextmanager
+def disable_undo():
+    """Contextmanager that turns off the undo queue and restores its state afterwards
+
+    .. Warning:: Everything done inside cannot be undone. The undo queue is flushed,
+                 because the commands in it might not apply to the changed scene anymore.
+
     :returns: None
     :rtype: None
     :raises: None
     """
-    sl = cmds.ls(sl=True)
+    state = cmds.undoInfo(query=True, state=True)
+    cmds.undoInfo(state=False)
     try:
         yield
     finally:
-        cmds.select(sl, replace=True)
+        cmds.undoInfo(stateWithoutFlush=state)
+
+
+@contextmanager
+def suspend_refresh():
+    """Contextmanager that suspends the viewport refresh and restores the previous state afterwards
+
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    suspended = cmds.refresh(query=True, suspend=True)
+    cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        cmds.refresh(suspend=suspended)
+
+
+def do_modifier(modifier):
+    """Execute the given dependency graph modifier, so it can be undone in one step
+
+    Executes the modifier via the ``jb_apiundo`` command of :mod:`jukeboxmaya.mayaplugins.jbapiundo`.
+
+    :param modifier: the modifier to execute. Any object with a ``doIt`` and ``undoIt`` method works.
+    :type modifier: :class:`maya.OpenMaya.MDGModifier` | :class:`maya.api.OpenMaya.MDGModifier` | :class:`PlugValueModifier`
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    MODIFIER_QUEUE.append(modifier)
+    try:
+        cmds.jb_apiundo()
+    finally:
+        del MODIFIER_QUEUE[:]
+
+
+def get_plug_type(plug):
+    """Return the type of the value of the given plug
+
+    :param plug: the plug to query
+    :type plug: :class:`om.MPlug`
+    :returns: one of ``"string"``, ``"bool"``, ``"int"`` or ``"double"``. Enums are ``"int"``.
+    :rtype: str
+    :raises: TypeError if the attribute is not a string, enum or single numeric attribute
+    """
+    attr = plug.attribute()
+    if attr.hasFn(om.MFn.kTypedAttribute):
+        if om.MFnTypedAttribute(attr).attrType() == om.MFnData.kString:
+            return "string"
+    elif attr.hasFn(om.MFn.kEnumAttribute):
+        return "int"
+    elif attr.hasFn(om.MFn.kNumericAttribute):
+        t = om.MFnNumericAttribute(attr).numericType()
+        if t == om.MFnNumericData.kBoolean:
+            return "bool"
+        if t in (om.MFnNumericData.kFloat, om.MFnNumericData.kDouble):
+            return "double"
+        if t in (om.MFnNumericData.kByte, om.MFnNumericData.kChar, om.MFnNumericData.kShort,
+                 om.MFnNumericData.kInt, om.MFnNumericData.kLong, om.MFnNumericData.kInt64):
+            return "int"
+    raise TypeError("The attribute type of the plug %s is not supported." % plug.name())
+
+
+class PlugValueModifier(object):
+    """Wraps a :class:`om.MDGModifier` that sets plug values, so locked plugs can be set too
+
+    The plugs are unlocked while the modifier does or undoes its work.
+    Afterwards they are locked or unlocked again.
+    It can be passed to :func:`do_modifier` like a modifier.
+    """
+
+    def __init__(self, modifier, plugs, lock=None):
+        """Initialize a new modifier
+
+        :param modifier: the modifier that sets the values
+        :type modifier: :class:`om.MDGModifier`
+        :param plugs: the plugs that are set
+        :type plugs: list of :class:`om.MPlug`
+        :param lock: True to lock the plugs afterwards, False to unlock them, None to keep their lock state
+        :type lock: bool | None
+        :raises: None
+        """
+        self.modifier = modifier
+        self.plugs = plugs
+        self.oldlocks = [p.isLocked for p in plugs]
+        if lock is None:
+            self.newlocks = self.oldlocks
+        else:
+            self.newlocks = [lock] * len(plugs)
+
+    def _run(self, func, locks):
+        """Unlock the plugs, call func and set the lock state of the plugs
+
+        :param func: the function to call
+        :type func: callable
+        :param locks: the lock state for every plug afterwards
+        :type locks: list of bool
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        for plug in self.plugs:
+            plug.isLocked = False
+        try:
+            func()
+        finally:
+            for plug, lock in zip(self.plugs, locks):
+                plug.isLocked = lock
+
+    def doIt(self, ):
+        """Set the values
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self._run(self.modifier.doIt, self.newlocks)
+
+    def undoIt(self, ):
+        """Restore the old values and lock states
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self._run(self.modifier.undoIt, self.oldlocks)
+
+
+def get_plugs(nodes, attrs):
+    """Return the plugs of the given attributes of all nodes
+
+    A node that is given more than once gets a plug for every occurrence.
+
+    :param nodes: the nodes
+    :type nodes: list
+    :param attrs: the attribute names
+    :type attrs: list
+    :returns: a dictionary that maps each attribute to a list of plugs in the order of the nodes
+    :rtype: dict
+    :raises: RuntimeError if a node or attribute does not exist
+    """
+    plugs = dict((a, []) for a in attrs)
+    for n in nodes:
+        # one list per node, because a selection list merges duplicates
+        sel = om.MSelectionList()
+        sel.add(n)
+        fn = om.MFnDependencyNode(sel.getDependNode(0))
+        for a in attrs:
+            plugs[a].append(fn.findPlug(a, False))
+    return plugs
+
+
+def get_attributes(nodes, attrs):
+    """Read the given attributes of all nodes in one pass
+
+    Supports string, enum and numeric attributes. Enums are returned as int.
+
+    :param nodes: the nodes to query
+    :type nodes: list
+    :param attrs: the attribute names
+    :type attrs: list
+    :returns: a dictionary that maps each attribute to a list of values in the order of the nodes
+    :rtype: dict
+    :raises: RuntimeError if a node or attribute does not exist, TypeError for unsupported attributes
+    """
+    getters = {"string": om.MPlug.asString, "bool": om.MPlug.asBool,
+               "int": om.MPlug.asInt, "double": om.MPlug.asDouble}
+    values = {}
+    for a, plugs in get_plugs(nodes, attrs).items():
+        values[a] = [getters[get_plug_type(p)](p) for p in plugs]
+    return values
+
+
+def set_attributes(nodes, values, lock=None):
+    """Set attributes of many nodes with one modifier
+
+    Locked attributes are set as well and stay locked, unless lock is given.
+    The change can be undone in one step. See :func:`do_modifier`.
+
+    :param nodes: the nodes to edit
+    :type nodes: list
+    :param values: a dictionary that maps attribute names to lists of values in the order of the nodes
+    :type values: dict
+    :param lock: True to lock the attributes afterwards, False to unlock them, None to keep their lock state
+    :type lock: bool | None
+    :returns: None
+    :rtype: None
+    :raises: RuntimeError if a node or attribute does not exist, TypeError for unsupported attributes,
+             ValueError if a list of values does not match the nodes
+    """
+    for a, column in values.items():
+        if len(column) != len(nodes):
+            raise ValueError("Got %s values for attribute %s but %s nodes." % (len(column), a, len(nodes)))
+    setters = {"string": om.MDGModifier.newPlugValueString, "bool": om.MDGModifier.newPlugValueBool,
+               "int": om.MDGModifier.newPlugValueInt, "double": om.MDGModifier.newPlugValueDouble}
+    mod = om.MDGModifier()
+    allplugs = []
+    for a, plugs in get_plugs(nodes, list(values)).items():
+        for plug, value in zip(plugs, values[a]):
+            setters[get_plug_type(plug)](mod, plug, value)
+            allplugs.append(plug)
+    if nodes:
+        do_modifier(PlugValueModifier(mod, allplugs, lock))
 
 
 @contextmanager
 def locknode(node, lock=True):
     """Contextmanager that will lock or unlock the given node and afterwards, restore the original status
 
+    Uses one level of the :class:`SceneStateGuard`, so all nodes are queried, locked and restored with one call each.
+
     :param node: the node to lock/unlock or nodes
     :type node: str | list | tuple
     :param lock: True for locking, False for unlocking
@@ -50,19 +477,9 @@ def locknode(node, lock=True):
     :rtype: None
     :raises: None
     """
-
-    oldstatus = cmds.lockNode(node, q=1)
-    cmds.lockNode(node, lock=lock)
-    try:
+    with SceneStateGuard.get() as guard:
+        guard.lock(node, lock)
         yield
-    finally:
-        if isinstance(node, basestring):
-            if cmds.objExists(node):
-                cmds.lockNode(node, lock=oldstatus[0])
-        else:
-            for n, l in zip(node, oldstatus):
-                if cmds.objExists(n):
-                    cmds.lockNode(n, lock=l)
 
 
 def get_top_namespace(node):
@@ -102,6 +519,78 @@ def get_namespace(node):
     return ns or ':'
 
 
+def parse_namespaces(nodes):
+    """Return the namespaces and top namespaces of all given nodes and count the nodes per namespace
+
+    Does the same as :func:`get_namespace` and :func:`get_top_namespace` for many nodes in one pass.
+    The top namespace is derived from the namespace, which is only parsed once per distinct namespace.
+
+    :param nodes: the node names or dag paths
+    :type nodes: iterable
+    :returns: a list with the namespace of every node, a list with the top namespace of every node
+              and a dictionary that maps the namespaces to the number of nodes in them
+    :rtype: tuple
+    :raises: None
+    """
+    namespaces = []
+    tops = []
+    counts = {}
+    topcache = {}
+    appendns = namespaces.append
+    appendtop = tops.append
+    for node in nodes:
+        ns = node.rpartition('|')[2].rpartition(':')[0] or ':'
+        appendns(ns)
+        try:
+            top = topcache[ns]
+        except KeyError:
+            name = ns.lstrip(':')
+            top = topcache[ns] = name.partition(':')[0] if name else ':'
+        appendtop(top)
+        counts[ns] = counts.get(ns, 0) + 1
+    return namespaces, tops, counts
+
+
+def get_namespaces(nodes):
+    """Return the namespace of every given node
+
+    See :func:`get_namespace`.
+
+    :param nodes: the node names or dag paths
+    :type nodes: iterable
+    :returns: the namespaces in the same order
+    :rtype: list
+    :raises: None
+    """
+    return [n.rpartition('|')[2].rpartition(':')[0] or ':' for n in nodes]
+
+
+def get_top_namespaces(nodes):
+    """Return the top namespace of every given node
+
+    See :func:`get_top_namespace`.
+
+    :param nodes: the node names or dag paths
+    :type nodes: iterable
+    :returns: the top namespaces in the same order
+    :rtype: list
+    :raises: None
+    """
+    return parse_namespaces(nodes)[1]
+
+
+def get_namespace_counts(nodes):
+    """Return a dictionary that maps the namespaces of the given nodes to the number of nodes in them
+
+    :param nodes: the node names or dag paths
+    :type nodes: iterable
+    :returns: namespaces and counts
+    :rtype: dict
+    :raises: None
+    """
+    return parse_namespaces(nodes)[2]
+
+
 def disconnect_node(node, src=True, dst=True):
     """Disconnect all connections from node
 
@@ -121,3 +610,50 @@ def disconnect_node(node, src=True, dst=True):
         for i in range(0, len(srcconns), 2):
             source, dest = srcconns[i+1], srcconns[i]
             cmds.disconnectAttr(source, dest)
+
+
+def disconnect_nodes(nodes, src=True, dst=True):
+    """Disconnect all connections of the given nodes at once
+
+    The connections are collected with the API and disconnected with one
+    :class:`om.MDGModifier`, so the whole operation is one step in the undo queue.
+    Connections between two of the given nodes are only disconnected once.
+
+    :param nodes: the nodes to disconnect
+    :type nodes: list
+    :param src: if True, disconnect the connections where the nodes are the destination
+    :type src: bool
+    :param dst: if True, disconnect the connections where the nodes are the source
+    :type dst: bool
+    :returns: the number of disconnected connections
+    :rtype: int
+    :raises: None
+    """
+    sel = om.MSelectionList()
+    for n in nodes:
+        sel.add(n)
+    mobjs = [sel.getDependNode(i) for i in range(sel.length())]
+    handles = {}
+    for mobj in mobjs:
+        handles.setdefault(om.MObjectHandle(mobj).hashCode(), []).append(mobj)
+
+    def in_nodes(mobj):
+        return any(mobj == o for o in handles.get(om.MObjectHandle(mobj).hashCode(), []))
+
+    mod = om.MDGModifier()
+    count = 0
+    for mobj in mobjs:
+        for plug in om.MFnDependencyNode(mobj).getConnections():
+            if dst:
+                for other in plug.connectedTo(False, True):
+                    mod.disconnect(plug, other)
+                    count += 1
+            if src:
+                for other in plug.connectedTo(True, False):
+                    if dst and in_nodes(other.node()):
+                        continue  # disconnected as the source of the other node
+                    mod.disconnect(other, plug)
+                    count += 1
+    if count:
+        do_modifier(mod)
+    return count
@@ -0,0 +1,744 @@
+"""A local read-only mirror of the database metadata, that the reftrack system needs.
+
+Taskfiles, tasks, elements and the links between them are copied to a local SQLite database.
+Lookups can then be answered without talking to the database server, which helps on farm nodes
+and machines with a slow connection. The mirror is opt-in. Set the environment variable
+``JUKEBOX_MAYA_DBMIRROR`` to the path of the SQLite file to enable it.
+``JUKEBOX_MAYA_DBMIRROR_INTERVAL`` sets the number of seconds after which :meth:`DBMirror.get`
+syncs the mirror again in a background thread (default 600). 0 only syncs once per session.
+After a release, :func:`jukeboxmaya.commands.update_scenenode` syncs the mirror right away.
+
+:meth:`DBMirror.sync` copies everything that changed since the last sync. Models with the
+``date_updated`` field of jukedj are synced incrementally, all others are copied completely.
+Objects that were deleted in the database are removed from the mirror.
+The many to many links in :data:`LINKS` are synced from their through tables. Only new rows are copied,
+unless the number of rows shows that links were removed.
+
+Objects read from the mirror are regular model instances. Their foreign keys and the element of a task
+are already set to objects from the mirror as well, so following them does not query the database.
+:meth:`DBMirror.get`, :meth:`DBMirror.get_linked` and :meth:`DBMirror.get_tasks` query the database
+for objects that are not mirrored. :meth:`DBMirror.get_many` and :meth:`DBMirror.filter` only return
+mirrored objects.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from jukeboxcore import djadapter
+from jukeboxcore.log import get_logger
+log = get_logger(__name__)
+# djadapter sets up django, so import django after it
+from django.db import connection
+from django.contrib.contenttypes.models import ContentType
+
+
+MIRROR_ENV = 'JUKEBOX_MAYA_DBMIRROR'
+"""Environment variable with the path to the SQLite file. The mirror is disabled, if it is not set."""
+
+INTERVAL_ENV = 'JUKEBOX_MAYA_DBMIRROR_INTERVAL'
+"""Environment variable with the number of seconds after which the mirror is synced again"""
+
+DEFAULT_INTERVAL = 600
+"""Default number of seconds after which the mirror is synced again"""
+
+MODELS = ['Project', 'Department', 'Atype', 'Sequence', 'Shot', 'Asset', 'Task', 'TaskFile']
+"""Names of the models in :mod:`jukeboxcore.djadapter.models` that are mirrored.
+The reftrack system reads taskfiles with their task, department and element.
+The paths of taskfiles also need the project, the asset type and the sequence."""
+
+TIMESTAMP_FIELD = 'date_updated'
+"""The field of the jukedj models, that is set on every save. Used for incremental syncs."""
+
+LINKS = [('Shot', 'assets'), ('Asset', 'assets')]
+"""The many to many fields that are mirrored, as tuples of model name and field name.
+The scene suggestions of the asset type interface query the linked assets."""
+
+CHUNKSIZE = 500
+"""The maximum number of ids per query"""
+
+
+def get_models():
+    """Return all mirrored models
+
+    :returns: the content type model and the models of :data:`MODELS` that exist
+    :rtype: list
+    :raises: None
+    """
+    models = [ContentType]
+    for name in MODELS:
+        model = getattr(djadapter.models, name, None)
+        if model is not None:
+            models.append(model)
+    return models
+
+
+def get_remote(field):
+    """Return the related model and the relation object of the given field or None
+
+    :param field: the model field
+    :type field: :class:`django.db.models.Field`
+    :returns: tuple of model and relation or None
+    :rtype: tuple | None
+    :raises: None
+    """
+    rel = getattr(field, 'remote_field', None) or getattr(field, 'rel', None)
+    if rel is None:
+        return None
+    return rel.model if hasattr(rel, 'model') else rel.to, rel
+
+
+def get_virtual_fields(model):
+    """Return the generic foreign keys of the given model
+
+    :param model: the model
+    :type model: :class:`django.db.models.Model`
+    :returns: list of generic foreign keys
+    :rtype: list
+    :raises: None
+    """
+    fields = getattr(model._meta, 'private_fields', None) or getattr(model._meta, 'virtual_fields', [])
+    return [f for f in fields if hasattr(f, 'ct_field') and hasattr(f, 'fk_field')]
+
+
+def chunks(l, size=CHUNKSIZE):
+    """Yield slices of the given list with at most size items
+
+    :param l: the list
+    :type l: list
+    :param size: the size of a slice
+    :type size: int
+    :returns: generator of lists
+    :rtype: generator
+    :raises: None
+    """
+    for i in range(0, len(l), size):
+        yield l[i:i + size]
+
+
+class DBMirror(object):
+    """Local SQLite copy of the mirrored models
+
+    .. Important:: Use DBMirror.get() to obtain the mirror that is configured by the environment!
+    """
+
+    dbmirror = None
+    """DBMirror instance when using DBMirror.get()"""
+
+    def __init__(self, path, interval=DEFAULT_INTERVAL):
+        """Initialize a new mirror that is stored at the given path
+
+        :param path: the path of the SQLite file. Use ``":memory:"`` for a temporary mirror.
+        :type path: str
+        :param interval: the number of seconds after which :meth:`DBMirror.is_due` returns True.
+                         0 means only the first sync is due.
+        :type interval: float
+        :raises: None
+        """
+        self.path = path
+        self.interval = interval
+        self.lastsync = None
+        """The time of the last sync attempt"""
+        self.models = get_models()
+        self._lock = threading.RLock()
+        """Guards the SQLite connection"""
+        self._synclock = threading.Lock()
+        """Only one sync at a time"""
+        self._syncthread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._create_tables()
+
+    @classmethod
+    def get(cls):
+        """Return the mirror that is configured by the environment or None if the mirror is disabled
+
+        This will always return the same instance. The mirror is synced when the instance is created.
+        Whenever the sync interval has passed, it is synced in a background thread
+        and used as it is in the meantime. See :meth:`DBMirror.is_due`.
+        If the database is not reachable, the mirror is used as it is.
+
+        :returns: the mirror
+        :rtype: :class:`DBMirror` | None
+        :raises: None
+        """
+        path = os.environ.get(MIRROR_ENV)
+        if not path:
+            return None
+        if not cls.dbmirror or cls.dbmirror.path != path:
+            cls.dbmirror = cls(path, float(os.environ.get(INTERVAL_ENV, DEFAULT_INTERVAL)))
+        if cls.dbmirror.lastsync is None:
+            cls.dbmirror.try_sync()
+        elif cls.dbmirror.is_due():
+            cls.dbmirror.sync_in_background()
+        return cls.dbmirror
+
+    def is_due(self, ):
+        """Return True, if the mirror was never synced or the last sync is longer ago than the interval
+
+        :returns: True, if a sync is due
+        :rtype: bool
+        :raises: None
+        """
+        if self.lastsync is None:
+            return True
+        return self.interval > 0 and time.time() - self.lastsync >= self.interval
+
+    def try_sync(self, ):
+        """Sync the mirror and log errors instead of raising them
+
+        Use this, when the mirror should be used as it is, if the database is not reachable.
+
+        :returns: the counts of :meth:`DBMirror.sync` or None, if the sync failed
+        :rtype: dict | None
+        :raises: None
+        """
+        try:
+            return self.sync()
+        except Exception:
+            log.exception("Could not sync the database mirror %s. Using the mirror as it is.", self.path)
+        finally:
+            self.lastsync = time.time()
+
+    def sync_in_background(self, ):
+        """Sync the mirror in a background thread with :meth:`DBMirror.try_sync`
+
+        Does nothing, if a background sync is already running.
+        The mirror can be read while it is synced.
+
+        :returns: the thread that syncs
+        :rtype: :class:`threading.Thread`
+        :raises: None
+        """
+        if self._syncthread is not None and self._syncthread.is_alive():
+            return self._syncthread
+        # not due anymore while the thread runs
+        self.lastsync = time.time()
+
+        def sync():
+            try:
+                self.try_sync()
+            finally:
+                # django opens one connection per thread
+                connection.close()
+        self._syncthread = threading.Thread(target=sync, name="DBMirrorSync")
+        self._syncthread.daemon = True
+        self._syncthread.start()
+        return self._syncthread
+
+    def _fields(self, model):
+        """Return the concrete fields of the given model
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :returns: list of fields
+        :rtype: list
+        :raises: None
+        """
+        return list(model._meta.concrete_fields)
+
+    def _timestamp_field(self, model):
+        """Return the field of the model that is used for incremental syncs or None
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :returns: the timestamp field or None
+        :rtype: :class:`django.db.models.Field` | None
+        :raises: None
+        """
+        for f in self._fields(model):
+            if f.name == TIMESTAMP_FIELD:
+                return f
+
+    def _create_tables(self, ):
+        """Create the tables for all models. Recreate the tables of models whose fields changed.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        with self._lock:
+            c = self._conn
+            c.execute('CREATE TABLE IF NOT EXISTS syncstate (model TEXT PRIMARY KEY, synced TEXT)')
+            c.execute('CREATE TABLE IF NOT EXISTS links (model TEXT, field TEXT, source INTEGER, target INTEGER)')
+            c.execute('CREATE INDEX IF NOT EXISTS links_source ON links (model, field, source)')
+            for model in self.models:
+                table = model._meta.db_table
+                columns = [f.attname for f in self._fields(model)]
+                existing = [r[1] for r in c.execute('PRAGMA table_info("%s")' % table)]
+                if existing == columns:
+                    continue
+                if existing:
+                    log.info("Fields of %s changed. Recreating the mirror table.", model.__name__)
+                    c.execute('DROP TABLE "%s"' % table)
+                    c.execute('DELETE FROM syncstate WHERE model = ?', (table,))
+                pk = model._meta.pk.attname
+                coldefs = ", ".join('"%s"%s' % (col, ' PRIMARY KEY' if col == pk else '') for col in columns)
+                c.execute('CREATE TABLE "%s" (%s)' % (table, coldefs))
+                for f in self._fields(model):
+                    if get_remote(f) is not None:
+                        c.execute('CREATE INDEX "%s_%s" ON "%s" ("%s")' % (table, f.attname, table, f.attname))
+            c.commit()
+
+    def _to_db(self, field, obj):
+        """Return the value of the field of the given object as it is stored in SQLite
+
+        :param field: the field
+        :type field: :class:`django.db.models.Field`
+        :param obj: the model instance
+        :type obj: :class:`django.db.models.Model`
+        :returns: the value
+        :rtype: int | float | str | None
+        :raises: None
+        """
+        value = getattr(obj, field.attname)
+        if value is None or isinstance(value, (bool, int, long, float, basestring)):
+            return value
+        return field.value_to_string(obj)
+
+    def sync(self, full=False):
+        """Copy all changes of the database to the mirror
+
+        The database is queried without locking the mirror, so it can be read while it is synced.
+        The changes of every model are committed together.
+
+        :param full: if True, copy all objects instead of only the changed ones
+        :type full: bool
+        :returns: a dictionary that maps the model names to the number of copied objects
+                  and ``'links'`` to the number of added and removed links
+        :rtype: dict
+        :raises: None
+        """
+        counts = {}
+        self.lastsync = time.time()
+        with self._synclock:
+            for model in self.models:
+                counts[model.__name__] = self._sync_model(model, full)
+            counts['links'] = self._sync_links(full)
+        log.debug("Synced database mirror: %s", counts)
+        return counts
+
+    def _sync_model(self, model, full):
+        """Copy the changes of the given model
+
+        :param model: the model to sync
+        :type model: :class:`django.db.models.Model`
+        :param full: if True, copy all objects
+        :type full: bool
+        :returns: the number of copied objects
+        :rtype: int
+        :raises: None
+        """
+        table = model._meta.db_table
+        fields = self._fields(model)
+        tsfield = self._timestamp_field(model)
+        qs = model.objects.all()
+        if tsfield is not None and not full:
+            synced = self._get_syncstate(table)
+            if synced is not None:
+                # use gte, so objects that changed in the same second as the last sync are not missed
+                qs = qs.filter(**{tsfield.name + '__gte': tsfield.to_python(synced)})
+            qs = qs.order_by(tsfield.name)
+        columns = ", ".join('"%s"' % f.attname for f in fields)
+        params = ", ".join("?" for f in fields)
+        insert = 'INSERT OR REPLACE INTO "%s" (%s) VALUES (%s)' % (table, columns, params)
+        rows = []
+        last = None
+        for obj in qs:
+            rows.append([self._to_db(f, obj) for f in fields])
+            last = obj
+        deleted = self._get_deleted(model)
+        pk = model._meta.pk.attname
+        with self._lock:
+            c = self._conn
+            c.executemany(insert, rows)
+            if tsfield is not None and last is not None:
+                self._set_syncstate(table, tsfield.value_to_string(last))
+            for chunk in chunks(deleted):
+                c.executemany('DELETE FROM "%s" WHERE "%s" = ?' % (table, pk), [(p,) for p in chunk])
+                c.executemany('DELETE FROM links WHERE model = ? AND source = ?', [(table, p) for p in chunk])
+            c.commit()
+        return len(rows)
+
+    def _get_syncstate(self, key):
+        """Return the stored sync state for the given key or None
+
+        :param key: the table name of a model or the key of a link
+        :type key: str
+        :returns: the state
+        :rtype: str | None
+        :raises: None
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT synced FROM syncstate WHERE model = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_syncstate(self, key, state):
+        """Store the sync state for the given key. Commit is up to the caller.
+
+        :param key: the table name of a model or the key of a link
+        :type key: str
+        :param state: the state
+        :type state: str
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO syncstate (model, synced) VALUES (?, ?)', (key, state))
+
+    def _sync_links(self, full=False):
+        """Copy the changes of the many to many fields in :data:`LINKS`
+
+        Adding or removing a link does not change the timestamps of the linked objects.
+        Rows of the through tables are never changed, only added or removed. Added rows get a higher id,
+        so only rows with an id above the highest synced one are copied.
+        If the mirror has more links than the through table afterwards, links were removed.
+        Only then the whole through table is compared with the mirrored links.
+
+        :param full: if True, compare the whole through tables
+        :type full: bool
+        :returns: the number of added and removed links
+        :rtype: int
+        :raises: None
+        """
+        count = 0
+        for modelname, fieldname in LINKS:
+            model = getattr(djadapter.models, modelname, None)
+            if model is None or model not in self.models:
+                continue
+            field = model._meta.get_field(fieldname)
+            through = get_remote(field)[1].through
+            table = model._meta.db_table
+            key = "links:%s.%s" % (table, fieldname)
+            columns = (field.m2m_field_name(), field.m2m_reverse_field_name())
+            lastid = None if full else self._get_syncstate(key)
+            qs = through.objects.all()
+            if lastid is not None:
+                qs = qs.filter(pk__gt=int(lastid))
+            new = list(qs.order_by('pk').values_list('pk', *columns))
+            with self._lock:
+                mirrored = set(self._conn.execute('SELECT source, target FROM links WHERE model = ? AND field = ?',
+                                                  (table, fieldname)))
+            added = set((s, t) for i, s, t in new) - mirrored
+            removed = set()
+            if lastid is None or len(mirrored) + len(added) != through.objects.count():
+                current = set(through.objects.values_list(*columns))
+                added = current - mirrored
+                removed = mirrored - current
+            with self._lock:
+                c = self._conn
+                c.executemany('DELETE FROM links WHERE model = ? AND field = ? AND source = ? AND target = ?',
+                              [(table, fieldname, s, t) for s, t in removed])
+                c.executemany('INSERT INTO links (model, field, source, target) VALUES (?, ?, ?, ?)',
+                              [(table, fieldname, s, t) for s, t in added])
+                if new:
+                    self._set_syncstate(key, str(new[-1][0]))
+                elif lastid is None:
+                    self._set_syncstate(key, "0")
+                c.commit()
+            count += len(removed) + len(added)
+        return count
+
+    def _get_deleted(self, model):
+        """Return the primary keys of the objects in the mirror, that do not exist in the database anymore
+
+        After copying the changes, the mirror contains every object of the database.
+        So the primary keys are only compared, if the mirror has more rows than the database.
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :returns: the primary keys
+        :rtype: list
+        :raises: None
+        """
+        table = model._meta.db_table
+        pk = model._meta.pk.attname
+        with self._lock:
+            mirroredcount = self._conn.execute('SELECT COUNT(*) FROM "%s"' % table).fetchone()[0]
+        if mirroredcount <= model.objects.count():
+            return []
+        existing = set(model.objects.values_list('pk', flat=True))
+        with self._lock:
+            mirrored = set(r[0] for r in self._conn.execute('SELECT "%s" FROM "%s"' % (pk, table)))
+        return list(mirrored - existing)
+
+    def _rows(self, model, where="", params=(), order=()):
+        """Return the rows of the given model as dictionaries of field attnames and python values
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param where: an optional SQL condition
+        :type where: str
+        :param params: the parameters for the condition
+        :type params: tuple
+        :param order: field attnames to order by. Prefix with ``-`` for descending order.
+        :type order: list
+        :returns: list of dicts
+        :rtype: list
+        :raises: None
+        """
+        fields = self._fields(model)
+        columns = ", ".join('"%s"' % f.attname for f in fields)
+        sql = 'SELECT %s FROM "%s"' % (columns, model._meta.db_table)
+        if where:
+            sql += ' WHERE ' + where
+        if order:
+            sql += ' ORDER BY ' + ", ".join('"%s" DESC' % o[1:] if o.startswith('-') else '"%s"' % o for o in order)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        result = []
+        for row in rows:
+            result.append(dict((f.attname, f.to_python(v) if v is not None else None) for f, v in zip(fields, row)))
+        return result
+
+    def _create_instance(self, model, values):
+        """Create a model instance with the given values, as if it was loaded from the database
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param values: the field attnames and values
+        :type values: dict
+        :returns: the instance
+        :rtype: :class:`django.db.models.Model`
+        :raises: None
+        """
+        if hasattr(model, 'from_db'):
+            names = [f.attname for f in self._fields(model)]
+            return model.from_db('default', names, [values[n] for n in names])
+        obj = model(**values)
+        obj._state.adding = False
+        obj._state.db = 'default'
+        return obj
+
+    def _get(self, model, pk, memo):
+        """Return the object of the given model with the given primary key or None.
+
+        All related objects are set from the mirror too.
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param pk: the primary key
+        :type pk: int
+        :param memo: objects that were already created in this lookup
+        :type memo: dict
+        :returns: the object or None
+        :rtype: :class:`django.db.models.Model` | None
+        :raises: None
+        """
+        key = (model, pk)
+        if key in memo:
+            return memo[key]
+        rows = self._rows(model, '"%s" = ?' % model._meta.pk.attname, (pk,))
+        if not rows:
+            memo[key] = None
+            return None
+        return self._build(model, rows[0], memo)
+
+    def _build(self, model, values, memo):
+        """Create the object for the given values and set the related objects from the mirror
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param values: the field attnames and values
+        :type values: dict
+        :param memo: objects that were already created in this lookup
+        :type memo: dict
+        :returns: the object
+        :rtype: :class:`django.db.models.Model`
+        :raises: None
+        """
+        obj = self._create_instance(model, values)
+        memo[(model, obj.pk)] = obj
+        for f in self._fields(model):
+            remote = get_remote(f)
+            if remote is None or remote[0] not in self.models:
+                continue
+            relpk = values[f.attname]
+            if relpk is None:
+                continue
+            related = self._get(remote[0], relpk, memo)
+            if related is not None:
+                setattr(obj, f.name, related)
+        for gfk in get_virtual_fields(model):
+            ctid = getattr(obj, model._meta.get_field(gfk.ct_field).attname)
+            ct = self._get(ContentType, ctid, memo) if ctid is not None else None
+            target = ct.model_class() if ct is not None else None
+            if target not in self.models:
+                continue
+            related = self._get(target, getattr(obj, gfk.fk_field), memo)
+            if related is None:
+                continue
+            if hasattr(gfk, 'set_cached_value'):
+                gfk.set_cached_value(obj, related)
+            else:
+                setattr(obj, gfk.cache_attr, related)
+        return obj
+
+    def is_mirrored(self, obj):
+        """Return True, if the given object is in the mirror
+
+        :param obj: the object
+        :type obj: :class:`django.db.models.Model`
+        :returns: True, if mirrored
+        :rtype: bool
+        :raises: None
+        """
+        model = type(obj)
+        if model not in self.models:
+            return False
+        sql = 'SELECT 1 FROM "%s" WHERE "%s" = ?' % (model._meta.db_table, model._meta.pk.attname)
+        with self._lock:
+            return self._conn.execute(sql, (obj.pk,)).fetchone() is not None
+
+    def get(self, model, pk):
+        """Return the object of the given model with the given primary key
+
+        If the object is not in the mirror, it is queried from the database.
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param pk: the primary key
+        :type pk: int
+        :returns: the object
+        :rtype: :class:`django.db.models.Model`
+        :raises: :class:`model.DoesNotExist` if the object does not exist in the database either
+        """
+        obj = self._get(model, pk, {})
+        if obj is None:
+            return model.objects.get(pk=pk)
+        return obj
+
+    def get_many(self, model, pks):
+        """Return the objects of the given model with the given primary keys
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param pks: the primary keys
+        :type pks: iterable
+        :returns: a dictionary that maps the primary keys to the objects. Missing objects are left out.
+        :rtype: dict
+        :raises: None
+        """
+        memo = {}
+        result = {}
+        pkname = model._meta.pk.attname
+        pks = list(pks)
+        for chunk in chunks(pks):
+            where = '"%s" IN (%s)' % (pkname, ", ".join("?" for p in chunk))
+            for values in self._rows(model, where, tuple(chunk)):
+                obj = memo.get((model, values[pkname])) or self._build(model, values, memo)
+                result[obj.pk] = obj
+        return result
+
+    def _filter_rows(self, model, values, order=()):
+        """Return the rows of the given model whose fields equal the given values
+
+        A list of values is compared with ``IN``. Only one field can have a list.
+        Long lists are queried in chunks, so the order only applies within each chunk of :data:`CHUNKSIZE` values.
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param values: field attnames and values or lists of values
+        :type values: dict
+        :param order: field attnames to order by. Prefix with ``-`` for descending order.
+        :type order: list
+        :returns: list of dicts
+        :rtype: list
+        :raises: ValueError
+        """
+        names = sorted(values)
+        listnames = [n for n in names if isinstance(values[n], (list, tuple, set, frozenset))]
+        if len(listnames) > 1:
+            raise ValueError("Only one field can be compared with a list of values. Got %s." % listnames)
+        conditions = ['"%s" = ?' % n for n in names if n not in listnames]
+        params = tuple(values[n] for n in names if n not in listnames)
+        if not listnames:
+            return self._rows(model, " AND ".join(conditions), params, order)
+        rows = []
+        for chunk in chunks(list(values[listnames[0]])):
+            where = '"%s" IN (%s)' % (listnames[0], ", ".join("?" for v in chunk))
+            rows.extend(self._rows(model, " AND ".join(conditions + [where]), params + tuple(chunk), order))
+        return rows
+
+    def filter(self, model, values, order=()):
+        """Return all objects of the given model whose fields equal the given values
+
+        Use the attnames of foreign keys, e.g. ``task_id``.
+        A list of values is compared with ``IN``. Only one field can have a list.
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param values: field attnames and values
+        :type values: dict
+        :param order: field attnames to order by. Prefix with ``-`` for descending order.
+        :type order: list
+        :returns: list of objects
+        :rtype: list
+        :raises: ValueError
+        """
+        memo = {}
+        return [self._build(model, row, memo) for row in self._filter_rows(model, values, order)]
+
+    def values_list(self, model, names, values):
+        """Return the given fields of all objects of the given model whose fields equal the given values
+
+        Like :meth:`DBMirror.filter` but no objects are created.
+
+        :param model: the model
+        :type model: :class:`django.db.models.Model`
+        :param names: the field attnames to return
+        :type names: list
+        :param values: field attnames and values
+        :type values: dict
+        :returns: list of tuples
+        :rtype: list
+        :raises: ValueError
+        """
+        return [tuple(row[n] for n in names) for row in self._filter_rows(model, values)]
+
+    def get_linked(self, obj, fieldname):
+        """Return the objects of the many to many field of the given object
+
+        If the object or the field is not mirrored, the database is queried.
+
+        :param obj: the object
+        :type obj: :class:`django.db.models.Model`
+        :param fieldname: the name of the many to many field
+        :type fieldname: str
+        :returns: list of objects
+        :rtype: list
+        :raises: None
+        """
+        model = type(obj)
+        if (model.__name__, fieldname) not in LINKS or not self.is_mirrored(obj):
+            return list(getattr(obj, fieldname).all())
+        target = get_remote(model._meta.get_field(fieldname))[0]
+        with self._lock:
+            rows = self._conn.execute('SELECT target FROM links WHERE model = ? AND field = ? AND source = ?',
+                                      (model._meta.db_table, fieldname, obj.pk)).fetchall()
+        objs = self.get_many(target, [r[0] for r in rows])
+        return [objs[r[0]] for r in rows if r[0] in objs]
+
+    def get_tasks(self, element):
+        """Return the tasks of the given shot or asset
+
+        If the element is not mirrored, the database is queried.
+
+        :param element: the element
+        :type element: :class:`jukeboxcore.djadapter.models.Asset` | :class:`jukeboxcore.djadapter.models.Shot`
+        :returns: list of tasks
+        :rtype: list
+        :raises: None
+        """
+        if not self.is_mirrored(element):
+            return list(element.tasks.all())
+        task = djadapter.models.Task
+        for gfk in get_virtual_fields(task):
+            if gfk.name != 'element':
+                continue
+            cts = self.filter(ContentType, {'app_label': element._meta.app_label, 'model': element._meta.model_name})
+            if not cts:
+                return list(element.tasks.all())
+            ctattname = task._meta.get_field(gfk.ct_field).attname
+            return self.filter(task, {ctattname: cts[0].pk, gfk.fk_field: element.pk})
+        return self.filter(task, {task._meta.get_field('element').attname: element.pk})
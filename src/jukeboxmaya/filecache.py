@@ -0,0 +1,368 @@
+"""A local read-through cache for released taskfiles.
+
+Released taskfiles do not change. Instead of reading them from the file server every time,
+they can be copied to a local directory once and read from there.
+The cache is opt-in. Set the environment variable ``JUKEBOX_MAYA_FILECACHE`` to a directory to enable it.
+``JUKEBOX_MAYA_FILECACHE_SIZE`` sets the maximum size of the cache in megabytes (default 20480).
+
+:meth:`FileCache.map` redirects reads of the original path to the local copy with ``dirmap``.
+References are still created with the original path, so the scene only contains paths on the file server
+and can be opened on machines without the cache. Only the exact file paths are mapped, never directories.
+If directory mapping is turned off, the cache turns it on only while it has mapped files and only if
+there are no other mappings, that would be activated with it. :meth:`FileCache.release` removes a mapping.
+
+A cached file is identified by the taskfile id and the size and modification time of the original file,
+so a changed original is copied again. If the cache gets too big, the least recently used files are removed.
+Files that were returned by :meth:`FileCache.get_path` are never removed in the same session,
+because the scene might use them. Mapped files are released before they can be removed.
+"""
+import os
+import shutil
+import threading
+import time
+
+import maya.cmds as cmds
+
+from jukeboxcore.log import get_logger
+log = get_logger(__name__)
+
+
+CACHEDIR_ENV = 'JUKEBOX_MAYA_FILECACHE'
+"""Environment variable with the cache directory. The cache is disabled, if it is not set."""
+
+CACHESIZE_ENV = 'JUKEBOX_MAYA_FILECACHE_SIZE'
+"""Environment variable with the maximum size of the cache in megabytes"""
+
+DEFAULT_CACHESIZE = 20480
+"""Default maximum size of the cache in megabytes"""
+
+
+class FileCache(object):
+    """Local copies of taskfiles with least recently used eviction
+
+    .. Important:: Use FileCache.get() to obtain the cache that is configured by the environment!
+    """
+
+    filecache = None
+    """FileCache instance when using FileCache.get()"""
+
+    def __init__(self, cachedir, maxsize):
+        """Initialize a new cache
+
+        :param cachedir: the directory for the local copies
+        :type cachedir: str
+        :param maxsize: the maximum size of the cache in bytes
+        :type maxsize: int
+        :raises: None
+        """
+        self.cachedir = cachedir
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pinned = set()
+        """Local copies that are in use and must not be evicted"""
+        self._mapped = {}
+        """Maps original paths to the local copies, that dirmap redirects them to"""
+        self._dirmapenabled = None
+        """The enable state of dirmap before the cache turned it on, or None if the cache did not turn it on"""
+        if not os.path.exists(cachedir):
+            os.makedirs(cachedir)
+
+    @classmethod
+    def get(cls):
+        """Return the cache that is configured by the environment or None if the cache is disabled
+
+        This will always return the same instance.
+
+        :returns: the file cache
+        :rtype: :class:`FileCache` | None
+        :raises: None
+        """
+        cachedir = os.environ.get(CACHEDIR_ENV)
+        if not cachedir:
+            return None
+        if not cls.filecache or cls.filecache.cachedir != cachedir:
+            maxsize = int(os.environ.get(CACHESIZE_ENV, DEFAULT_CACHESIZE)) * 1024 * 1024
+            cls.filecache = cls(cachedir, maxsize)
+        return cls.filecache
+
+    def get_cachepath(self, tfid, path):
+        """Return the path of the local copy for the given taskfile
+
+        :param tfid: the taskfile id
+        :type tfid: int
+        :param path: the path of the original file
+        :type path: str
+        :returns: the path of the local copy. It might not exist yet.
+        :rtype: str
+        :raises: :class:`OSError` if the original does not exist
+        """
+        st = os.stat(path)
+        ext = os.path.splitext(path)[1]
+        name = "%s_%s_%s%s" % (tfid, st.st_size, int(st.st_mtime), ext)
+        return os.path.join(self.cachedir, name)
+
+    def get_path(self, tfid, path):
+        """Return the path to a local copy of the given taskfile. Copy it, if it is not cached yet.
+
+        The local copy is not evicted for the rest of the session. See :meth:`FileCache.unpin`.
+
+        :param tfid: the taskfile id
+        :type tfid: int
+        :param path: the path of the original file
+        :type path: str
+        :returns: the path of the local copy or the original path, if it could not be copied
+        :rtype: str
+        :raises: :class:`OSError` if the original does not exist
+        """
+        cachepath = self.fetch(tfid, path)
+        with self._lock:
+            if not os.path.exists(cachepath):
+                return path
+            self._pinned.add(cachepath)
+        self._touch(cachepath)
+        return cachepath
+
+    def fetch(self, tfid, path):
+        """Copy the given taskfile to the cache, if it is not cached yet.
+
+        If another thread copies the file right now, wait for it.
+        The local copy is not pinned, so it might get evicted any time.
+
+        :param tfid: the taskfile id
+        :type tfid: int
+        :param path: the path of the original file
+        :type path: str
+        :returns: the path of the local copy. It might not exist, if copying failed.
+        :rtype: str
+        :raises: :class:`OSError` if the original does not exist
+        """
+        cachepath = self.get_cachepath(tfid, path)
+        with self._lock:
+            event = self._pending.get(cachepath)
+            owner = event is None and not os.path.exists(cachepath)
+            if owner:
+                event = self._pending[cachepath] = threading.Event()
+        if owner:
+            try:
+                self._copy(path, cachepath)
+            finally:
+                with self._lock:
+                    del self._pending[cachepath]
+                event.set()
+            self.evict()
+        elif event is not None:
+            event.wait()
+        return cachepath
+
+    def map(self, tfid, path):
+        """Redirect reads of the given original path to a local copy with ``dirmap``
+
+        Copies the file, if it is not cached yet. Reference the original path afterwards.
+        Maya stores the original path in the scene, but reads the local copy.
+
+        :param tfid: the taskfile id
+        :type tfid: int
+        :param path: the path of the original file
+        :type path: str
+        Only the given file is mapped. It stays mapped until :meth:`FileCache.release` is called.
+
+        :returns: True, if the path is redirected. False, if the path is not a file, the file could not be copied
+                  or directory mapping is turned off and turning it on would activate other mappings.
+        :rtype: bool
+        :raises: None
+        """
+        if not os.path.isfile(path):
+            return False
+        if not self._can_enable_dirmap():
+            log.info("Not caching %s, because dirmap is turned off and has other mappings.", path)
+            return False
+        cachepath = self.get_path(tfid, path)
+        if cachepath == path:
+            return False
+        self._enable_dirmap()
+        with self._lock:
+            old = self._mapped.get(path)
+            self._mapped[path] = cachepath
+            if old is not None and old != cachepath:
+                self._pinned.discard(old)
+        cmds.dirmap(mapDirectory=(path, cachepath))
+        return True
+
+    def release(self, path):
+        """Remove the mapping of the given original path and allow its local copy to be evicted
+
+        If it was the last mapping and the cache turned on directory mapping, it is turned off again.
+
+        :param path: the path of the original file, that was given to :meth:`FileCache.map`
+        :type path: str
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        with self._lock:
+            cachepath = self._mapped.pop(path, None)
+            if cachepath is None:
+                return
+            self._pinned.discard(cachepath)
+        cmds.dirmap(unmapDirectory=path)
+        self._restore_dirmap()
+
+    def release_all(self, ):
+        """Remove all mappings of the cache. See :meth:`FileCache.release`.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        for path in list(self._mapped):
+            self.release(path)
+
+    def _can_enable_dirmap(self, ):
+        """Return True, if directory mapping is on or can be turned on without activating other mappings
+
+        :returns: True, if the cache can use directory mapping
+        :rtype: bool
+        :raises: None
+        """
+        if self._dirmapenabled is not None or cmds.dirmap(query=True, enable=True):
+            return True
+        return not cmds.dirmap(getAllMappings=True)
+
+    def _enable_dirmap(self, ):
+        """Turn on directory mapping, if it is off.
+
+        The enable state before is restored by :meth:`FileCache._restore_dirmap`.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if self._dirmapenabled is not None or cmds.dirmap(query=True, enable=True):
+            return
+        self._dirmapenabled = False
+        cmds.dirmap(enable=True)
+
+    def _restore_dirmap(self, ):
+        """Restore the enable state of directory mapping, if the cache turned it on and has no mappings anymore.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if self._dirmapenabled is None or self._mapped:
+            return
+        cmds.dirmap(enable=self._dirmapenabled)
+        self._dirmapenabled = None
+
+    def unpin(self, cachepath):
+        """Allow the given local copy to be evicted again
+
+        :param cachepath: the path of the local copy
+        :type cachepath: str
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        with self._lock:
+            self._pinned.discard(cachepath)
+
+    def _touch(self, cachepath):
+        """Set the modification time of the local copy to now, so it is evicted last
+
+        :param cachepath: the path of the local copy
+        :type cachepath: str
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        now = time.time()
+        try:
+            os.utime(cachepath, (now, now))
+        except OSError:
+            log.debug("Could not touch %s", cachepath)
+
+    def _copy(self, path, cachepath):
+        """Copy the original to the cache.
+
+        The copy is written to a temporary file first, so incomplete copies are never used.
+
+        :param path: the original file
+        :type path: str
+        :param cachepath: the path of the local copy
+        :type cachepath: str
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        tmppath = cachepath + ".part"
+        start = time.time()
+        try:
+            shutil.copyfile(path, tmppath)
+            os.rename(tmppath, cachepath)
+        except (IOError, OSError):
+            log.exception("Could not cache %s", path)
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+            return
+        log.debug("Cached %s in %.3fs", path, time.time() - start)
+
+    def evict(self, ):
+        """Remove the least recently used files until the cache is smaller than the maximum size
+
+        Pinned files are never removed. See :meth:`FileCache.get_path`.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            try:
+                names = os.listdir(self.cachedir)
+            except OSError:
+                log.exception("Could not list the cache %s", self.cachedir)
+                return
+            for name in names:
+                if name.endswith(".part"):
+                    continue
+                p = os.path.join(self.cachedir, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                total += st.st_size
+                if p not in self._pinned:
+                    entries.append((st.st_mtime, st.st_size, p))
+            entries.sort()
+            while total > self.maxsize and entries:
+                mtime, size, p = entries.pop(0)
+                try:
+                    os.remove(p)
+                except OSError:
+                    log.debug("Could not evict %s", p)
+                    continue
+                total -= size
+
+    def prefetch(self, files):
+        """Copy the given taskfiles to the cache in a background thread
+
+        :param files: tuples of taskfile id and path of the original file
+        :type files: list
+        :returns: the started thread
+        :rtype: :class:`threading.Thread`
+        :raises: None
+        """
+        files = list(files)
+
+        def fetch():
+            for tfid, path in files:
+                try:
+                    self.fetch(tfid, path)
+                except OSError:
+                    log.warning("Could not prefetch %s", path)
+        t = threading.Thread(target=fetch, name="FileCachePrefetch")
+        t.daemon = True
+        t.start()
+        return t
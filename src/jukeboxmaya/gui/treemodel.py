@@ -0,0 +1,153 @@
+"""Tree items and models that create their children only when they are needed.
+
+A :class:`LazyTreeItem` gets a callable instead of its children. Until the callable is called,
+the item has no rows. Views check :meth:`LazyTreeModel.hasChildren` and :meth:`LazyTreeModel.canFetchMore`
+and call :meth:`LazyTreeModel.fetchMore`, e.g. when they expand the item or show its children.
+So asking for the row count does not create the children.
+"""
+from jukeboxcore.gui.treemodel import TreeModel, TreeItem
+
+
+class LazyTreeItem(TreeItem):
+    """A tree item that creates its children on first access"""
+
+    def __init__(self, data, parent=None, loader=None):
+        """Initialize a new lazy tree item
+
+        :param data: the data of the item
+        :type data: :class:`jukeboxcore.gui.treemodel.ItemData`
+        :param parent: the parent item
+        :type parent: :class:`jukeboxcore.gui.treemodel.TreeItem` | None
+        :param loader: a callable without arguments, that returns a list of
+                       :class:`jukeboxcore.gui.treemodel.ItemData` for the children.
+                       If None, the item has no children.
+        :type loader: callable | None
+        :raises: None
+        """
+        self._loader = loader
+        super(LazyTreeItem, self).__init__(data, parent)
+
+    def is_populated(self, ):
+        """Return True, if the children have been created
+
+        :returns: True, if populated
+        :rtype: bool
+        :raises: None
+        """
+        return self._loader is None
+
+    def load(self, ):
+        """Call the loader and return the data for the children, that are not created yet.
+
+        After this, the item counts as populated. Use :meth:`LazyTreeItem.add_children` to create the children.
+        :meth:`LazyTreeItem.populate` does both.
+
+        :returns: the data for the children
+        :rtype: list of :class:`jukeboxcore.gui.treemodel.ItemData`
+        :raises: None
+        """
+        loader = self._loader
+        if loader is None:
+            return []
+        self._loader = None
+        return list(loader())
+
+    def add_children(self, datas):
+        """Create a child for every given data
+
+        :param datas: the data for the children
+        :type datas: list of :class:`jukeboxcore.gui.treemodel.ItemData`
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        for data in datas:
+            TreeItem(data, self)
+
+    def populate(self, ):
+        """Create the children if they were not created yet
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self.add_children(self.load())
+
+    def child_count(self, ):
+        """Return the number of children. 0 until the item is populated.
+
+        :returns: the number of children
+        :rtype: int
+        :raises: None
+        """
+        if not self.is_populated():
+            return 0
+        return super(LazyTreeItem, self).child_count()
+
+
+class LazyTreeModel(TreeModel):
+    """A tree model that supports :class:`LazyTreeItem`
+
+    Unpopulated items have no rows, but claim to have children and are populated by :meth:`LazyTreeModel.fetchMore`.
+    """
+
+    def _lazy_item(self, parent):
+        """Return the unpopulated lazy item for the given index or None
+
+        :param parent: the index
+        :type parent: :class:`QtCore.QModelIndex`
+        :returns: the unpopulated item or None
+        :rtype: :class:`LazyTreeItem` | None
+        :raises: None
+        """
+        if not parent.isValid():
+            return None
+        item = parent.internalPointer()
+        if isinstance(item, LazyTreeItem) and not item.is_populated():
+            return item
+        return None
+
+    def hasChildren(self, parent):
+        """Return True, if the item of the given index has children.
+
+        Unpopulated lazy items are not populated and are assumed to have children.
+
+        :param parent: the index
+        :type parent: :class:`QtCore.QModelIndex`
+        :returns: True, if the item has children
+        :rtype: bool
+        :raises: None
+        """
+        if self._lazy_item(parent) is not None:
+            return True
+        return super(LazyTreeModel, self).hasChildren(parent)
+
+    def canFetchMore(self, parent):
+        """Return True, if the item of the given index has not been populated yet
+
+        :param parent: the index
+        :type parent: :class:`QtCore.QModelIndex`
+        :returns: True, if the item can be populated
+        :rtype: bool
+        :raises: None
+        """
+        return self._lazy_item(parent) is not None
+
+    def fetchMore(self, parent):
+        """Populate the item of the given index and notify the views about the new rows
+
+        :param parent: the index
+        :type parent: :class:`QtCore.QModelIndex`
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        item = self._lazy_item(parent)
+        if item is None:
+            return
+        datas = item.load()
+        if not datas:
+            return
+        self.beginInsertRows(parent, 0, len(datas) - 1)
+        item.add_children(datas)
+        self.endInsertRows()
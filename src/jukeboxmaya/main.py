@@ -12,6 +12,7 @@ import jukeboxmaya
 from jukeboxmaya.constants import MAYA_PLUGIN_PATH, BUILTIN_PLUGIN_PATH
 from jukeboxmaya.plugins import MayaPluginManager
 from jukeboxmaya.menu import MenuManager
+from jukeboxmaya.sceneepoch import SceneEpoch
 
 
 def load_mayaplugins():
@@ -66,3 +67,7 @@ def init():
     pmanager = MayaPluginManager.get()
     pmanager.load_plugins()
     load_mayaplugins()
+    SceneEpoch.get().install()
+    # import here, because the reftrack modules need the django environment
+    from jukeboxmaya.reftrack.refobjinter import DeferredLoadHandler
+    DeferredLoadHandler.get().install()
@@ -0,0 +1,50 @@
+import maya.OpenMayaMPx as OpenMayaMPx
+
+from jukeboxcore.errors import PluginInitError, PluginUninitError
+from jukeboxmaya import common
+
+
+class JB_ApiUndoCmd(OpenMayaMPx.MPxCommand):
+    """A command that executes a dependency graph modifier, so it can be undone in one step
+
+    Modifiers executed directly from python are not recorded in the undo queue.
+    Do not call this command directly. Use :func:`jukeboxmaya.common.do_modifier`.
+    """
+    kCmdName = 'jb_apiundo'
+
+    def __init__(self):
+        super(JB_ApiUndoCmd, self).__init__()
+        self.modifier = None
+
+    @classmethod
+    def creator(cls):
+        return OpenMayaMPx.asMPxPtr(cls())
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        self.modifier = common.MODIFIER_QUEUE.pop()
+        self.modifier.doIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+
+def initializePlugin(obj):
+    plugin = OpenMayaMPx.MFnPlugin(obj, 'David Zuber', '1.0', 'Any')
+    try:
+        plugin.registerCommand(JB_ApiUndoCmd.kCmdName, JB_ApiUndoCmd.creator)
+    except:
+        raise PluginInitError('Failed to register %s command' % JB_ApiUndoCmd.kCmdName)
+
+
+def uninitializePlugin(obj):
+    plugin = OpenMayaMPx.MFnPlugin(obj)
+    try:
+        plugin.deregisterCommand(JB_ApiUndoCmd.kCmdName)
+    except:
+        raise PluginUninitError('Failed to unregister %s command' % JB_ApiUndoCmd.kCmdName)
@@ -3,6 +3,7 @@ import maya.OpenMayaMPx as OpenMayaMPx
 import maya.OpenMaya as OpenMaya
 
 from jukeboxcore.errors import PluginInitError, PluginUninitError
+from jukeboxmaya.sceneepoch import memoize_per_epoch
 
 
 class JB_SceneNode(OpenMayaMPx.MPxNode):
@@ -50,9 +51,12 @@ def uninitializePlugin(obj):
         raise PluginUninitError('Failed to unregister %s node' % JB_SceneNode.kNodeName)
 
 
+@memoize_per_epoch
 def get_current_scene_node():
     """Return the name of the jb_sceneNode, that describes the current scene or None if there is no scene node.
 
+    The result is cached per scene epoch. See :mod:`jukeboxmaya.sceneepoch`.
+
     :returns: the full name of the node or none, if there is no scene node
     :rtype: str | None
     :raises: None
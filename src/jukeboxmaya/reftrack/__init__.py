@@ -1,5 +1,6 @@
 """Package for the reference workflow in maya."""
 import maya.cmds as cmds
+import maya.OpenMaya as OpenMaya
 
 from jukeboxmaya import common
 
@@ -55,3 +56,111 @@ def group_content(content, namespace, grpname, grpnodetype):
         grpnode = cmds.createNode(grpnodetype, name=grpname) # create grp node
         cmds.group(content, uag=grpnode) # group content
     return grpnode
+
+
+class NamespaceContent(object):
+    """The content of a namespace and all its child namespaces.
+
+    Use :func:`get_namespace_content` to collect the content.
+    """
+
+    def __init__(self, namespace):
+        """Initialize an empty content for the given namespace
+
+        :param namespace: the absolute namespace
+        :type namespace: str
+        :raises: None
+        """
+        self.namespace = namespace
+        self.nodes = []
+        """All dependency nodes. Dag nodes are full dag paths."""
+        self.scenenodes = []
+        """The ``jb_sceneNode`` nodes directly in the namespace (not in child namespaces)"""
+        self.assemblies = []
+        """The top level dag nodes as full dag paths"""
+
+
+def get_namespace_content(namespace):
+    """Return the content of the given namespace and its child namespaces.
+
+    Collects all dependency nodes, the scene nodes and the top level dag nodes
+    in a single iteration over the namespace.
+
+    :param namespace: the namespace to query
+    :type namespace: str
+    :returns: the content of the namespace
+    :rtype: :class:`NamespaceContent`
+    :raises: None
+    """
+    namespace = ":" + namespace.strip(":")
+    content = NamespaceContent(namespace)
+    objs = OpenMaya.MNamespace.getNamespaceObjects(namespace, True)
+    for i in range(objs.length()):
+        mobj = objs[i]
+        if mobj.hasFn(OpenMaya.MFn.kDagNode):
+            fn = OpenMaya.MFnDagNode(mobj)
+            content.nodes.append(fn.fullPathName())
+            for p in range(fn.parentCount()):
+                if fn.parent(p).hasFn(OpenMaya.MFn.kWorld):
+                    content.assemblies.append(fn.fullPathName())
+                    break
+            continue
+        fn = OpenMaya.MFnDependencyNode(mobj)
+        content.nodes.append(fn.name())
+        if fn.typeName() == "jb_sceneNode" and ":" + fn.parentNamespace().strip(":") == namespace:
+            content.scenenodes.append(fn.name())
+    return content
+
+
+def get_namespace_selection(namespace, dag=False, assemblies=False):
+    """Return a selection list with the content of the given namespace and its child namespaces.
+
+    The list is built by iterating the namespace with the API, so no node names have to be
+    converted to strings and parsed again.
+
+    :param namespace: the namespace to query
+    :type namespace: str
+    :param dag: if True, only add dag nodes
+    :type dag: bool
+    :param assemblies: if True, only add the top level dag nodes
+    :type assemblies: bool
+    :returns: the selection list
+    :rtype: :class:`OpenMaya.MSelectionList`
+    :raises: None
+    """
+    namespace = ":" + namespace.strip(":")
+    sel = OpenMaya.MSelectionList()
+    objs = OpenMaya.MNamespace.getNamespaceObjects(namespace, True)
+    for i in range(objs.length()):
+        mobj = objs[i]
+        if not mobj.hasFn(OpenMaya.MFn.kDagNode):
+            if not (dag or assemblies):
+                sel.add(mobj)
+            continue
+        paths = OpenMaya.MDagPathArray()
+        OpenMaya.MDagPath.getAllPathsTo(mobj, paths)
+        for p in range(paths.length()):
+            path = paths[p]
+            if assemblies and path.length() != 1:
+                continue
+            sel.add(path)
+    return sel
+
+
+def select_namespace(namespace, dag=False, assemblies=False):
+    """Replace the active selection with the content of the given namespace and its child namespaces.
+
+    The selection is set with :meth:`OpenMaya.MGlobal.selectCommand`, so it can be undone.
+
+    :param namespace: the namespace to select
+    :type namespace: str
+    :param dag: if True, only select dag nodes
+    :type dag: bool
+    :param assemblies: if True, only select the top level dag nodes
+    :type assemblies: bool
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    sel = get_namespace_selection(namespace, dag=dag, assemblies=assemblies)
+    OpenMaya.MGlobal.selectCommand(sel, OpenMaya.MGlobal.kReplaceList)
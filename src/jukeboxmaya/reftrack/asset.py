@@ -1,25 +1,67 @@
 """Implementation of :class:`jukeboxcore.reftrack.ReftypeInterface` for Assets."""
-from collections import defaultdict
+import time
+from collections import OrderedDict
 from functools import partial
 
 import maya.cmds as cmds
 
 from jukeboxcore import djadapter
+from jukeboxcore.log import get_logger
+log = get_logger(__name__)
 from jukeboxcore.filesys import JB_File
 from jukeboxcore.reftrack import ReftypeInterface, ReftrackAction
 from jukeboxcore.filesys import TaskFileInfo
 from jukeboxcore.gui import djitemdata
 from jukeboxcore.gui.main import get_icon
-from jukeboxcore.gui.treemodel import TreeModel, TreeItem, ListItemData
+from jukeboxcore.gui.treemodel import TreeItem, ListItemData
 from jukeboxcore.gui.filesysitemdata import TaskFileInfoItemData
 from jukeboxmaya import common
+from jukeboxmaya.gui.treemodel import LazyTreeModel, LazyTreeItem
 from jukeboxmaya import reftrack
+from jukeboxmaya.reftrack import select_namespace
+from jukeboxmaya.filecache import FileCache
+from jukeboxmaya.dbmirror import DBMirror
+
+
+def get_content_namespace(refobj, ns=None):
+    """Return the full namespace of the content of the given reftrack node
+
+    :param refobj: the reftrack node
+    :type refobj: str
+    :param ns: the value of the namespace attribute of the refobj if it was already read.
+               If None, the attribute is queried.
+    :type ns: str | None
+    :returns: the absolute namespace
+    :rtype: str
+    :raises: None
+    """
+    parentns = common.get_namespace(refobj)
+    if ns is None:
+        ns = cmds.getAttr("%s.namespace" % refobj)
+    return ":".join((parentns.rstrip(":"), ns.lstrip(":")))
+
+
+def get_new_reference(newnodes):
+    """Return the reference node in the given nodes, that were returned by ``cmds.file(..., returnNewNodes=True)``
+
+    :param newnodes: the new nodes of a reference command
+    :type newnodes: list
+    :returns: the reference node, that is not referenced itself
+    :rtype: str | None
+    :raises: None
+    """
+    # You could also use the filename returned by the file command to query the reference node.
+    # Atm there is a but, that if you import the file before, the command fails.
+    # So we get all new reference nodes and query the one that is not referenced
+    for refnode in cmds.ls(newnodes, type='reference'):
+        if not cmds.referenceQuery(refnode, isNodeReferenced=True):
+            return refnode
 
 
 def select_dp_nodes(reftrack):
-    """Select all dag nodes of the given reftrack
+    """Select all dependency nodes of the given reftrack
 
-    :param reftrack: The reftrack to select the dagnodes for
+    :param reftrack: The reftrack to select the nodes for
     :type reftrack: :class:`jukeboxcore.reftrack.Reftrack`
     :returns: None
     :rtype: None
@@ -28,18 +70,16 @@ def select_dp_nodes(reftrack):
     refobj = reftrack.get_refobj()
     if not refobj:
         return
-    parentns = common.get_namespace(refobj)
-    ns = cmds.getAttr("%s.namespace" % refobj)
-    fullns = ":".join((parentns.rstrip(":"), ns.lstrip(":")))
-    c = cmds.namespaceInfo(fullns, listOnlyDependencyNodes=True, dagPath=True, recurse=True)
-    cmds.select(c, replace=True)
+    select_namespace(get_content_namespace(refobj))
 
 
-def select_dag_nodes(reftrack):
+def select_dag_nodes(reftrack, assemblies=False):
     """Select all dag nodes of the given reftrack
 
     :param reftrack: The reftrack to select the dagnodes for
     :type reftrack: :class:`jukeboxcore.reftrack.Reftrack`
+    :param assemblies: if True, only select the top level dag nodes
+    :type assemblies: bool
     :returns: None
     :rtype: None
     :raises: None
@@ -47,18 +87,21 @@ def select_dag_nodes(reftrack):
     refobj = reftrack.get_refobj()
     if not refobj:
         return
-    parentns = common.get_namespace(refobj)
-    ns = cmds.getAttr("%s.namespace" % refobj)
-    fullns = ":".join((parentns.rstrip(":"), ns.lstrip(":")))
-    c = cmds.namespaceInfo(fullns, listOnlyDependencyNodes=True, dagPath=True, recurse=True)
-    dag = cmds.ls(c, dag=True, ap=True)
-    cmds.select(dag, replace=True)
+    select_namespace(get_content_namespace(refobj), dag=True, assemblies=assemblies)
 
 
 class AssetReftypeInterface(ReftypeInterface):
     """Interface for handling the content of released assets in the reference workflow.
     """
 
+    deferred = False
+    """If True, :meth:`AssetReftypeInterface.reference` creates unloaded references by default.
+    The content is set up when the reference is loaded. See :meth:`AssetReftypeInterface.finish_deferred`."""
+
+    _options = {}
+    """The cached options for each element. Shared by all instances, so a release can invalidate them.
+    See :meth:`AssetReftypeInterface.invalidate_options`."""
+
     def __init__(self, refobjinter):
         """Initialize a new AssetReftypeInterface that uses the given RefobjInterface
 
@@ -67,6 +110,11 @@ class AssetReftypeInterface(ReftypeInterface):
         :raises: None
         """
         super(AssetReftypeInterface, self).__init__(refobjinter)
+        self._suggestions = {}
+        self.suggestion_hits = 0
+        """The number of times :meth:`AssetReftypeInterface.get_scene_suggestions` used the cache"""
+        self.suggestion_misses = 0
+        """The number of times :meth:`AssetReftypeInterface.get_scene_suggestions` queried the links"""
 
     def is_replaceable(self, refobj):
         """Return whether the given reference of the refobject is replaceable or
@@ -82,6 +130,60 @@ class AssetReftypeInterface(ReftypeInterface):
         """
         return True
 
+    def get_taskfile_id(self, taskfileinfo, releaseonly=True):
+        """Return the id of the taskfile for the given taskfileinfo
+
+        If the :class:`jukeboxmaya.dbmirror.DBMirror` is enabled, the mirror is queried first.
+
+        :param taskfileinfo: the taskfileinfo to query
+        :type taskfileinfo: :class:`jukeboxcore.filesys.TaskFileInfo`
+        :param releaseonly: if True, return None for taskfileinfos that are not a release
+        :type releaseonly: bool
+        :returns: the taskfile id or None, if the taskfileinfo is not a release and releaseonly is True
+        :rtype: int | None
+        :raises: None
+        """
+        if releaseonly and taskfileinfo.releasetype != djadapter.RELEASETYPES['release']:
+            return None
+        mirror = DBMirror.get()
+        if mirror is not None:
+            tfids = mirror.values_list(djadapter.models.TaskFile, ['id'],
+                                       {'task_id': taskfileinfo.task.pk,
+                                        'releasetype': taskfileinfo.releasetype,
+                                        'version': taskfileinfo.version,
+                                        'descriptor': taskfileinfo.descriptor,
+                                        'typ': taskfileinfo.typ})
+            if tfids:
+                return tfids[0][0]
+        tf = djadapter.taskfiles.get(task=taskfileinfo.task,
+                                     releasetype=taskfileinfo.releasetype,
+                                     version=taskfileinfo.version,
+                                     descriptor=taskfileinfo.descriptor,
+                                     typ=taskfileinfo.typ)
+        return tf.pk
+
+    def get_filepath(self, taskfileinfo):
+        """Return the path to use for referencing, importing or replacing with the given taskfileinfo
+
+        If the :class:`jukeboxmaya.filecache.FileCache` is enabled, released files
+        are copied to the cache and reads of the returned path are redirected to the local copy.
+        The returned path is always the path on the file server, so the scene stays portable.
+
+        :param taskfileinfo: the taskfileinfo to get the path for
+        :type taskfileinfo: :class:`jukeboxcore.filesys.TaskFileInfo`
+        :returns: the path to the file
+        :rtype: str
+        :raises: None
+        """
+        filepath = JB_File(taskfileinfo).get_fullpath()
+        cache = FileCache.get()
+        if cache is None:
+            return filepath
+        tfid = self.get_taskfile_id(taskfileinfo)
+        if tfid is not None:
+            cache.map(tfid, filepath)
+        return filepath
+
     def get_scenenode(self, nodes):
         """Get the scenenode in the given nodes
 
@@ -97,7 +199,7 @@ class AssetReftypeInterface(ReftypeInterface):
         assert scenenodes, "Found no scene nodes!"
         return sorted(scenenodes)[0]
 
-    def reference(self, refobj, taskfileinfo):
+    def reference(self, refobj, taskfileinfo, deferred=None):
         """Reference the given taskfileinfo into the scene and return the created reference node
 
         The created reference node will be used on :meth:`RefobjInterface.set_reference` to
@@ -106,41 +208,140 @@ class AssetReftypeInterface(ReftypeInterface):
 
         This will also create a group node and group all dagnodes under a appropriate node.
 
+        In deferred mode the reference is created unloaded. Only the taskfile id is set on the
+        reftrack node. Connecting the scene node and grouping happens in :meth:`AssetReftypeInterface.finish_deferred`
+        when the reference is loaded.
+
         :param refobj: the reftrack node that will be linked to the reference
         :type refobj: str
         :param taskfileinfo: The taskfileinfo that holds the information for what to reference
         :type taskfileinfo: :class:`jukeboxcore.filesys.TaskFileInfo`
+        :param deferred: If True, create an unloaded reference. If None, use :data:`AssetReftypeInterface.deferred`.
+        :type deferred: bool | None
         :returns: the reference node that was created and should set on the appropriate reftrack node
         :rtype: str
         :raises: None
         """
+        if deferred is None:
+            deferred = self.deferred
+        self.get_refobjinter().invalidate_snapshot()
         # work in root namespace
         with common.preserve_namespace(":"):
-            jbfile = JB_File(taskfileinfo)
-            filepath = jbfile.get_fullpath()
-            ns_suggestion = reftrack.get_namespace(taskfileinfo)
-            newnodes = cmds.file(filepath, reference=True, namespace=ns_suggestion, returnNewNodes=True)
-            # You could also use the filename returned by the file command to query the reference node.
-            # Atm there is a but, that if you import the file before, the command fails.
-            # So we get all new reference nodes and query the one that is not referenced
-            for refnode in cmds.ls(newnodes, type='reference'):
-                if not cmds.referenceQuery(refnode, isNodeReferenced=True):
-                    node = refnode
-                    break
-            ns = cmds.referenceQuery(node, namespace=True)  # query the actual new namespace
-            content = cmds.namespaceInfo(ns, listOnlyDependencyNodes=True, dagPath=True)  # get the content
-            # connect reftrack with scenenode
-            scenenode = self.get_scenenode(content)
-            self.get_refobjinter().connect_reftrack_scenenode(refobj, scenenode)
-            reccontent = cmds.namespaceInfo(ns, listOnlyDependencyNodes=True, dagPath=True, recurse=True)  # get the content + content of children
-            dagcontent = cmds.ls(reccontent, ap=True, assemblies=True)  # get only the top level dagnodes so we can group them
+            filepath = self.get_filepath(taskfileinfo)
+            if deferred:
+                return self.reference_file_deferred(refobj, taskfileinfo, filepath)
+            node, content = self.reference_file(refobj, taskfileinfo, filepath)
+            dagcontent = content.assemblies  # get only the top level dagnodes so we can group them
             if not dagcontent:
                 return node  # no need for a top group if there are not dagnodes to group
             # group the dagnodes
             grpname = reftrack.get_groupname(taskfileinfo)
-            reftrack.group_content(dagcontent, ns, grpname, "jb_asset")
+            reftrack.group_content(dagcontent, content.namespace, grpname, "jb_asset")
             return node
 
+    def reference_file(self, refobj, taskfileinfo, filepath):
+        """Reference the given file and connect the scene node with the refobj.
+
+        Does not group the content and does not care about the current namespace.
+        Use :meth:`AssetReftypeInterface.reference` or :meth:`AssetReftypeInterface.reference_many`.
+
+        :param refobj: the reftrack node that will be linked to the reference
+        :type refobj: str
+        :param taskfileinfo: The taskfileinfo that holds the information for what to reference
+        :type taskfileinfo: :class:`jukeboxcore.filesys.TaskFileInfo`
+        :param filepath: the path of the taskfileinfo
+        :type filepath: str
+        :returns: the created reference node and the content of its namespace
+        :rtype: tuple of str and :class:`jukeboxmaya.reftrack.NamespaceContent`
+        :raises: None
+        """
+        ns_suggestion = reftrack.get_namespace(taskfileinfo)
+        newnodes = cmds.file(filepath, reference=True, namespace=ns_suggestion, returnNewNodes=True)
+        node = get_new_reference(newnodes)
+        ns = cmds.referenceQuery(node, namespace=True)  # query the actual new namespace
+        content = reftrack.get_namespace_content(ns)  # get the content + content of children
+        # connect reftrack with scenenode
+        scenenode = self.get_scenenode(content.scenenodes)
+        self.get_refobjinter().connect_reftrack_scenenode(refobj, scenenode)
+        return node, content
+
+    def reference_file_deferred(self, refobj, taskfileinfo, filepath):
+        """Create an unloaded reference to the given file and set the taskfile id on the refobj.
+
+        Does not care about the current namespace.
+        Use :meth:`AssetReftypeInterface.reference` or :meth:`AssetReftypeInterface.reference_many`.
+
+        :param refobj: the reftrack node that will be linked to the reference
+        :type refobj: str
+        :param taskfileinfo: The taskfileinfo that holds the information for what to reference
+        :type taskfileinfo: :class:`jukeboxcore.filesys.TaskFileInfo`
+        :param filepath: the path of the taskfileinfo
+        :type filepath: str
+        :returns: the created reference node
+        :rtype: str
+        :raises: None
+        """
+        ns_suggestion = reftrack.get_namespace(taskfileinfo)
+        newnodes = cmds.file(filepath, reference=True, namespace=ns_suggestion,
+                             loadReferenceDepth='none', returnNewNodes=True)
+        node = get_new_reference(newnodes)
+        cmds.setAttr("%s.taskfile_id" % refobj, self.get_taskfile_id(taskfileinfo, releaseonly=False))
+        return node
+
+    def reference_many(self, pairs, deferred=None):
+        """Reference many taskfileinfos at once and set the reference on the reftrack nodes
+
+        In contrast to :meth:`AssetReftypeInterface.reference`, this also calls
+        :meth:`RefobjInterface.set_reference` for every reftrack node.
+        All paths are resolved first. Namespace and selection are restored only once at the end.
+        The content is grouped after all files are referenced.
+        Everything is recorded in one undo chunk.
+
+        :param pairs: tuples of reftrack node and :class:`jukeboxcore.filesys.TaskFileInfo`
+        :type pairs: list
+        :param deferred: If True, create unloaded references. If None, use :data:`AssetReftypeInterface.deferred`.
+        :type deferred: bool | None
+        :returns: a tuple of the reference node and the seconds it took to reference the file, for every pair
+        :rtype: list
+        :raises: None
+        """
+        if deferred is None:
+            deferred = self.deferred
+        refobjinter = self.get_refobjinter()
+        refobjinter.invalidate_snapshot()
+        cache = FileCache.get()
+        jobs = []
+        for refobj, tfi in pairs:
+            tfid = self.get_taskfile_id(tfi) if cache else None
+            jobs.append((refobj, tfi, tfid, JB_File(tfi).get_fullpath()))
+        if cache:
+            # copy the files in the background while the first ones get referenced
+            cache.prefetch([(tfid, filepath) for refobj, tfi, tfid, filepath in jobs if tfid is not None])
+        results = []
+        contents = []
+        with common.undo_chunk("reference_many"):
+            with common.preserve_selection():
+                with common.preserve_namespace(":"):
+                    for refobj, tfi, tfid, filepath in jobs:
+                        start = time.time()
+                        if tfid is not None:
+                            cache.map(tfid, filepath)
+                        if deferred:
+                            node = self.reference_file_deferred(refobj, tfi, filepath)
+                            content = None
+                        else:
+                            node, content = self.reference_file(refobj, tfi, filepath)
+                        refobjinter.set_reference(refobj, node)
+                        duration = time.time() - start
+                        log.debug("Referenced %s in %.3fs", filepath, duration)
+                        results.append((node, duration))
+                        contents.append((tfi, content))
+                    for tfi, content in contents:
+                        if content and content.assemblies:
+                            grpname = reftrack.get_groupname(tfi)
+                            reftrack.group_content(content.assemblies, content.namespace, grpname, "jb_asset")
+        return results
+
     def load(self, refobj, reference):
         """Load the given reference
 
@@ -148,6 +349,9 @@ class AssetReftypeInterface(ReftypeInterface):
         but it is not in a loaded state.
         Loading the reference means, that the actual data will be read.
 
+        If the reference was created in deferred mode, the scene node is connected
+        and the content is grouped now.
+
         :param refobj: the reftrack node that is linked to the reference
         :type refobj: str
         :param reference: the reference node
@@ -156,7 +360,40 @@ class AssetReftypeInterface(ReftypeInterface):
         :rtype: None
         :raises: None
         """
+        self.get_refobjinter().invalidate_snapshot()
         cmds.file(loadReference=reference)
+        self.finish_deferred(refobj, reference)
+
+    def finish_deferred(self, refobj, reference):
+        """Connect the scene node and group the content of a reference that was created in deferred mode
+
+        Does nothing if the reference is not loaded or the setup is already finished.
+        This is called by :meth:`AssetReftypeInterface.load` and by
+        :class:`jukeboxmaya.reftrack.refobjinter.DeferredLoadHandler`, when the reference
+        is loaded by other means, e.g. the Reference Editor.
+
+        :param refobj: the reftrack node that is linked to the reference
+        :type refobj: str
+        :param reference: the reference node
+        :type reference: str
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if not cmds.referenceQuery(reference, isLoaded=True):
+            return
+        if cmds.listConnections("%s.scenenode" % refobj, source=False):
+            return
+        refobjinter = self.get_refobjinter()
+        ns = cmds.referenceQuery(reference, namespace=True)
+        content = reftrack.get_namespace_content(ns)
+        scenenode = self.get_scenenode(content.scenenodes)
+        refobjinter.connect_reftrack_scenenode(refobj, scenenode)
+        if not content.assemblies or cmds.ls(content.assemblies, type="jb_asset"):
+            return
+        tfi = TaskFileInfo.create_from_taskfile(refobjinter.get_taskfile(refobj))
+        grpname = reftrack.get_groupname(tfi)
+        reftrack.group_content(content.assemblies, content.namespace, grpname, "jb_asset")
 
     def unload(self, refobj, reference):
         """Unload the given reference
@@ -171,6 +408,7 @@ class AssetReftypeInterface(ReftypeInterface):
         :rtype: None
         :raises: None
         """
+        self.get_refobjinter().invalidate_snapshot()
         cmds.file(unloadReference=reference)
 
     def replace(self, refobj, reference, taskfileinfo):
@@ -184,12 +422,12 @@ class AssetReftypeInterface(ReftypeInterface):
         :rtype: None
         :raises: None
         """
-        jbfile = JB_File(taskfileinfo)
-        filepath = jbfile.get_fullpath()
+        self.get_refobjinter().invalidate_snapshot()
+        filepath = self.get_filepath(taskfileinfo)
         cmds.file(filepath, loadReference=reference)
         ns = cmds.referenceQuery(reference, namespace=True)  # query the actual new namespace
-        content = cmds.namespaceInfo(ns, listOnlyDependencyNodes=True, dagPath=True)  # get the content
-        scenenode = self.get_scenenode(content) # get the scene node
+        content = reftrack.get_namespace_content(ns)  # get the content
+        scenenode = self.get_scenenode(content.scenenodes) # get the scene node
         self.get_refobjinter().connect_reftrack_scenenode(refobj, scenenode)
 
     def delete(self, refobj):
@@ -202,16 +440,69 @@ class AssetReftypeInterface(ReftypeInterface):
         :raises: None
         """
         refobjinter = self.get_refobjinter()
+        refobjinter.invalidate_snapshot()
         reference = refobjinter.get_reference(refobj)
         if reference:
             fullns = cmds.referenceQuery(reference, namespace=True)
             cmds.file(removeReference=True, referenceNode=reference)
         else:
-            parentns = common.get_namespace(refobj)
-            ns = cmds.getAttr("%s.namespace" % refobj)
-            fullns = ":".join((parentns.rstrip(":"), ns.lstrip(":")))
+            fullns = get_content_namespace(refobj)
         cmds.namespace(removeNamespace=fullns, deleteNamespaceContent=True)
 
+    def delete_many(self, refobjs):
+        """Delete the content of all given refobjs
+
+        Does the same as :meth:`AssetReftypeInterface.delete` for every refobj,
+        but removes all references first and then all namespaces in one pass.
+        Namespaces inside other namespaces that get removed are skipped.
+        Everything is recorded in one undo chunk.
+
+        :param refobjs: the refobjs that represent the content that should be deleted
+        :type refobjs: list
+        :returns: the seconds it took to remove the references, the namespaces and everything together
+                  with the keys ``"references"``, ``"namespaces"`` and ``"total"``
+        :rtype: dict
+        :raises: None
+        """
+        start = time.time()
+        refobjinter = self.get_refobjinter()
+        refobjinter.invalidate_snapshot()
+        references = []
+        namespaces = set()
+        imported = []
+        for refobj in refobjs:
+            reference = refobjinter.get_reference(refobj)
+            if reference:
+                references.append(reference)
+                namespaces.add(cmds.referenceQuery(reference, namespace=True))
+            else:
+                imported.append(refobj)
+        if imported:
+            nscolumn = common.get_attributes(imported, ['namespace'])['namespace']
+            for refobj, ns in zip(imported, nscolumn):
+                namespaces.add(get_content_namespace(refobj, ns))
+        toplevel = []
+        for ns in sorted(namespaces, key=len):
+            if not any(ns.startswith(t + ":") for t in toplevel):
+                toplevel.append(ns)
+        with common.undo_chunk("delete_many"):
+            refstart = time.time()
+            for reference in references:
+                # nested references are removed together with their parent
+                if cmds.objExists(reference):
+                    cmds.file(removeReference=True, referenceNode=reference)
+            nsstart = time.time()
+            for ns in toplevel:
+                if cmds.namespace(exists=ns):
+                    cmds.namespace(removeNamespace=ns, deleteNamespaceContent=True)
+            end = time.time()
+        timings = {"references": nsstart - refstart,
+                   "namespaces": end - nsstart,
+                   "total": end - start}
+        log.debug("Deleted %s references and %s namespaces in %.3fs (references %.3fs, namespaces %.3fs)",
+                  len(references), len(toplevel), timings["total"], timings["references"], timings["namespaces"])
+        return timings
+
     def import_reference(self, refobj, reference):
         """Import the given reference
 
@@ -224,6 +515,7 @@ class AssetReftypeInterface(ReftypeInterface):
         :rtype: None
         :raises: None
         """
+        self.get_refobjinter().invalidate_snapshot()
         cmds.file(importReference=True, referenceNode=reference)
 
     def import_taskfile(self, refobj, taskfileinfo):
@@ -237,19 +529,19 @@ class AssetReftypeInterface(ReftypeInterface):
         :rtype: None
         :raises: None
         """
+        self.get_refobjinter().invalidate_snapshot()
         # work in root namespace
         with common.preserve_namespace(":"):
-            jbfile = JB_File(taskfileinfo)
-            filepath = jbfile.get_fullpath()
+            filepath = self.get_filepath(taskfileinfo)
             ns_suggestion = reftrack.get_namespace(taskfileinfo)
             nodes = cmds.file(filepath, i=True, namespace=ns_suggestion, returnNewNodes=True, preserveReferences=True)  # import
             assert nodes, 'Nothing was imported! this is unusual!'
             ns = common.get_top_namespace(nodes[0])  # get the actual namespace
             cmds.setAttr("%s.namespace" % refobj, ns, type="string")
-            nscontent = cmds.namespaceInfo(ns, listOnlyDependencyNodes=True, dagPath=True)  # get the content
-            scenenode = self.get_scenenode(nscontent)
+            nscontent = reftrack.get_namespace_content(ns)  # get the content
+            scenenode = self.get_scenenode(nscontent.scenenodes)
             self.get_refobjinter().connect_reftrack_scenenode(refobj, scenenode)
-            dagcontent = cmds.ls(nodes, ap=True, assemblies=True)  # get only the dagnodes so we can group them
+            dagcontent = nscontent.assemblies  # get only the dagnodes so we can group them
             if not dagcontent:
                 return  # no need for a top group if there are not dagnodes to group
             # group the dagnodes in the new namespace
@@ -261,6 +553,9 @@ class AssetReftypeInterface(ReftypeInterface):
         """Fetch the options for possible files to load, replace etc for the given element.
 
         Options from which to choose a file to load or replace.
+        The options are fetched with one query and cached for each element.
+        They are sorted by department and task, newest version first.
+        See :meth:`AssetReftypeInterface.invalidate_options`.
 
         :param element: The element for which the options should be fetched.
         :type element: :class:`jukeboxcore.djadapter.models.Asset` | :class:`jukeboxcore.djadapter.models.Shot`
@@ -268,13 +563,64 @@ class AssetReftypeInterface(ReftypeInterface):
         :rtype: list of :class:`TaskFileInfo`
         :raises: None
         """
-        tfs = []
-        for task in element.tasks.all():
-            taskfiles = list(task.taskfile_set.filter(releasetype=djadapter.RELEASETYPES['release'],
-                                                      typ=djadapter.FILETYPES['mayamainscene']))
-            tfs.extend(taskfiles)
-        tfis = [TaskFileInfo.create_from_taskfile(tf) for tf in tfs]
-        return tfis
+        key = (type(element), element.pk)
+        tfis = self._options.get(key)
+        mirror = DBMirror.get()
+        if tfis is None and mirror is not None:
+            tfis = self._options[key] = [TaskFileInfo.create_from_taskfile(tf)
+                                         for tf in self.get_mirrored_options(mirror, element)]
+        if tfis is None:
+            tfs = djadapter.taskfiles.filter(task__in=element.tasks.all(),
+                                             releasetype=djadapter.RELEASETYPES['release'],
+                                             typ=djadapter.FILETYPES['mayamainscene'])\
+                                     .select_related('task', 'task__department')\
+                                     .prefetch_related('task__element')\
+                                     .order_by('-task__department__ordervalue', 'task', '-version')
+            tfis = self._options[key] = [TaskFileInfo.create_from_taskfile(tf) for tf in tfs]
+        return list(tfis)
+
+    def get_mirrored_options(self, mirror, element):
+        """Return the released maya main scenes of the given element from the database mirror
+
+        The taskfiles are sorted like in :meth:`AssetReftypeInterface.fetch_option_taskfileinfos`.
+        The versions are sorted by the query. Only the few tasks are sorted by their department.
+
+        :param mirror: the database mirror
+        :type mirror: :class:`jukeboxmaya.dbmirror.DBMirror`
+        :param element: The element for which the options should be fetched.
+        :type element: :class:`jukeboxcore.djadapter.models.Asset` | :class:`jukeboxcore.djadapter.models.Shot`
+        :returns: the taskfiles
+        :rtype: list of :class:`jukeboxcore.djadapter.models.TaskFile`
+        :raises: None
+        """
+        tasks = mirror.get_tasks(element)
+        tasks.sort(key=lambda t: (-t.department.ordervalue, t.pk))
+        bytask = OrderedDict((t.pk, []) for t in tasks)
+        for tf in mirror.filter(djadapter.models.TaskFile,
+                                {'task_id': list(bytask),
+                                 'releasetype': djadapter.RELEASETYPES['release'],
+                                 'typ': djadapter.FILETYPES['mayamainscene']},
+                                order=['-version']):
+            bytask[tf.task_id].append(tf)
+        return [tf for tfs in bytask.values() for tf in tfs]
+
+    @classmethod
+    def invalidate_options(cls, element=None):
+        """Clear the cached options of the given element or of all elements
+
+        The cache is shared by all instances. Call this after a release,
+        so the new version shows up in the options.
+
+        :param element: The element for which the options should be fetched again. If None, clear all.
+        :type element: :class:`jukeboxcore.djadapter.models.Asset` | :class:`jukeboxcore.djadapter.models.Shot` | None
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if element is None:
+            cls._options.clear()
+        else:
+            cls._options.pop((type(element), element.pk), None)
 
     def create_options_model(self, taskfileinfos):
         """Create a new treemodel that has the taskfileinfos as internal_data of the leaves.
@@ -285,23 +631,24 @@ class AssetReftypeInterface(ReftypeInterface):
           rootdata = jukeboxcore.gui.treemodel.ListItemData(["Asset/Shot", "Task", "Descriptor", "Version", "Releasetype"])
           rootitem = jukeboxcore.gui.treemodel.TreeItem(rootdata)
 
+        The task items are created right away. The version items of a task are only created,
+        when the task is expanded or selected. Tasks and versions keep the order of the taskfileinfos,
+        see :meth:`AssetReftypeInterface.fetch_option_taskfileinfos`.
+
         :returns: the option model with :class:`TaskFileInfo` as internal_data of the leaves.
-        :rtype: :class:`jukeboxcore.gui.treemodel.TreeModel`
+        :rtype: :class:`jukeboxmaya.gui.treemodel.LazyTreeModel`
         :raises: None
         """
         rootdata = ListItemData(["Asset/Shot", "Task", "Descriptor", "Version", "Releasetype"])
         rootitem = TreeItem(rootdata)
-        tasks = defaultdict(list)
+        tasks = OrderedDict()
         for tfi in taskfileinfos:
-            tasks[tfi.task].append(tfi)
-        for task in reversed(sorted(tasks.keys(), key=lambda t: t.department.ordervalue)):
-            tfis = tasks[task]
+            tasks.setdefault(tfi.task, []).append(tfi)
+        for task, tfis in tasks.items():
             taskdata = djitemdata.TaskItemData(task)
-            taskitem = TreeItem(taskdata, rootitem)
-            for tfi in reversed(tfis):
-                tfidata = TaskFileInfoItemData(tfi)
-                TreeItem(tfidata, taskitem)
-        return TreeModel(rootitem)
+            loader = partial(map, TaskFileInfoItemData, tfis)
+            LazyTreeItem(taskdata, rootitem, loader=loader)
+        return LazyTreeModel(rootitem)
 
     def get_option_labels(self, element):
         """Return labels for each level of the option model.
@@ -371,7 +718,8 @@ class AssetReftypeInterface(ReftypeInterface):
         Do not confuse this with :meth:`ReftypeInterface.get_suggestions`. It will gather suggestions
         for children of a :class:`Reftrack`.
 
-        The standard implementation only returns an empty list!
+        The linked assets are cached for the current element. When the current element changes,
+        the cache is cleared. Use :meth:`AssetReftypeInterface.invalidate_suggestions` to refresh it.
 
         :param reftrack: the reftrack which needs suggestions
         :type reftrack: :class:`Reftrack`
@@ -379,12 +727,35 @@ class AssetReftypeInterface(ReftypeInterface):
         :rtype: list
         :raises: None
         """
+        key = (type(current), current.pk)
+        if key not in self._suggestions:
+            self._suggestions.clear()
+        linked = self._suggestions.get(key)
+        if linked is None:
+            self.suggestion_misses += 1
+            mirror = DBMirror.get()
+            if mirror is not None:
+                linked = mirror.get_linked(current, 'assets')
+            else:
+                linked = list(current.assets.select_related('project', 'atype').prefetch_related('tasks'))
+            self._suggestions[key] = linked
+        else:
+            self.suggestion_hits += 1
         l = []
         if isinstance(current, djadapter.models.Asset):
             l.append(current)
-        l.extend(list(current.assets.all()))
+        l.extend(linked)
         return l
 
+    def invalidate_suggestions(self, ):
+        """Clear the cached scene suggestions, so the links are queried again
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self._suggestions.clear()
+
     def is_available_for_scene(self, element):
         """Return True, if it should be possible to add a new reftrack with the given
         element and the type of the interface to the scene.
@@ -424,4 +795,6 @@ class AssetReftypeInterface(ReftypeInterface):
         refobj = reftrack.get_refobj()
         select_dp_action = ReftrackAction("Select Nodes", partial(select_dp_nodes, reftrack=reftrack), enabled=bool(refobj))
         select_dag_action = ReftrackAction("Select DAG", partial(select_dag_nodes, reftrack=reftrack), enabled=bool(refobj))
-        return [select_dp_action, select_dag_action]
+        select_asm_action = ReftrackAction("Select Assemblies", partial(select_dag_nodes, reftrack=reftrack, assemblies=True),
+                                           enabled=bool(refobj))
+        return [select_dp_action, select_dag_action, select_asm_action]
@@ -0,0 +1,235 @@
+"""Check the files of all reftracks in the scene before they are needed.
+
+Missing or unreadable files are usually only noticed, when Maya tries to load them.
+:func:`preflight` collects the taskfiles of all reftrack nodes and checks their files
+concurrently in a thread pool. Checking many files on a network file system is mostly waiting,
+so the checks run in parallel.
+By default the files are only stat'ed. With ``checksum=True`` every file is read completely,
+so the timings show how long Maya would wait for the data.
+"""
+import hashlib
+import os
+import time
+from multiprocessing.pool import ThreadPool
+
+from jukeboxcore import djadapter
+from jukeboxcore.filesys import JB_File, TaskFileInfo
+from jukeboxcore.log import get_logger
+from jukeboxmaya.dbmirror import DBMirror
+log = get_logger(__name__)
+
+
+class FileCheck(object):
+    """The result of checking one file"""
+
+    def __init__(self, path, taskfile=None, refobjs=None):
+        """Initialize a new file check for the given path
+
+        :param path: the path to check
+        :type path: str
+        :param taskfile: the taskfile of the path
+        :type taskfile: :class:`jukeboxcore.djadapter.models.TaskFile` | None
+        :param refobjs: the reftrack nodes that use the file
+        :type refobjs: list | None
+        :raises: None
+        """
+        self.path = path
+        self.taskfile = taskfile
+        self.refobjs = refobjs or []
+        self.exists = False
+        self.size = None
+        self.checksum = None
+        """The md5 checksum, if the file was read"""
+        self.duration = 0.0
+        self.readduration = None
+        """The seconds it took to read the file, if it was read"""
+        self.error = None
+        self.stale = False
+        """True, if there is a newer release of the taskfile"""
+
+    def run(self, checksum=False):
+        """Stat the file and read it completely to compute the checksum if wanted
+
+        :param checksum: if True, read the whole file, compute the md5 checksum and time the read
+        :type checksum: bool
+        :returns: self
+        :rtype: :class:`FileCheck`
+        :raises: None
+        """
+        start = time.time()
+        try:
+            st = os.stat(self.path)
+            self.exists = True
+            self.size = st.st_size
+            if checksum:
+                readstart = time.time()
+                md5 = hashlib.md5()
+                with open(self.path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                        md5.update(chunk)
+                self.checksum = md5.hexdigest()
+                self.readduration = time.time() - readstart
+        except (IOError, OSError) as e:
+            self.error = str(e)
+        self.duration = time.time() - start
+        return self
+
+
+class PreflightReport(object):
+    """The result of :func:`preflight`"""
+
+    def __init__(self, checks, errors, slow, duration):
+        """Initialize a new report
+
+        :param checks: all file checks
+        :type checks: list of :class:`FileCheck`
+        :param errors: tuples of reftrack node and error message for reftracks without a valid taskfile
+        :type errors: list
+        :param slow: the number of seconds after which a file counts as slow
+        :type slow: float
+        :param duration: the number of seconds the whole preflight took
+        :type duration: float
+        :raises: None
+        """
+        self.checks = checks
+        self.errors = errors
+        self.slow = slow
+        self.duration = duration
+
+    def missing(self, ):
+        """Return the checks of files, that are missing or unreadable
+
+        :returns: list of :class:`FileCheck`
+        :rtype: list
+        :raises: None
+        """
+        return [c for c in self.checks if c.error]
+
+    def stale(self, ):
+        """Return the checks of files, that have a newer release
+
+        :returns: list of :class:`FileCheck`
+        :rtype: list
+        :raises: None
+        """
+        return [c for c in self.checks if c.stale]
+
+    def slowfiles(self, ):
+        """Return the checks of files, that took longer than the slow threshold
+
+        :returns: list of :class:`FileCheck`
+        :rtype: list
+        :raises: None
+        """
+        return [c for c in self.checks if c.duration > self.slow]
+
+    def ok(self, ):
+        """Return True, if no file is missing and all reftracks have a taskfile
+
+        :returns: True, if ok
+        :rtype: bool
+        :raises: None
+        """
+        return not (self.errors or self.missing())
+
+    def __str__(self, ):
+        """Return a readable summary of the report
+
+        :returns: the summary
+        :rtype: str
+        :raises: None
+        """
+        lines = ["Checked %s files in %.3fs." % (len(self.checks), self.duration)]
+        for refobj, err in self.errors:
+            lines.append("No taskfile for %s: %s" % (refobj, err))
+        for c in self.missing():
+            lines.append("Missing %s: %s" % (c.path, c.error))
+        for c in self.stale():
+            lines.append("Newer release available for %s" % c.path)
+        for c in self.slowfiles():
+            if c.readduration is None:
+                lines.append("Slow %s: %.3fs" % (c.path, c.duration))
+            else:
+                lines.append("Slow %s: %.3fs, %.3fs to read %s bytes" % (c.path, c.duration, c.readduration, c.size))
+        return "\n".join(lines)
+
+
+def mark_stale(checks):
+    """Set the stale flag of all checks of released taskfiles, that have a newer release.
+
+    Uses one query for all checks. If the :class:`jukeboxmaya.dbmirror.DBMirror` is enabled,
+    the mirror is queried instead and only tasks, that are not mirrored, are queried from the database.
+
+    :param checks: the file checks with taskfiles
+    :type checks: list of :class:`FileCheck`
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    release = djadapter.RELEASETYPES['release']
+    checks = [c for c in checks if c.taskfile and c.taskfile.releasetype == release]
+    if not checks:
+        return
+    tasks = set(c.taskfile.task_id for c in checks)
+    latest = {}
+    rows = []
+    mirror = DBMirror.get()
+    if mirror is not None:
+        mirrored = set(pk for pk, in mirror.values_list(djadapter.models.Task, ['id'], {'id': list(tasks)}))
+        rows = mirror.values_list(djadapter.models.TaskFile, ['task_id', 'descriptor', 'typ', 'version'],
+                                  {'task_id': list(mirrored), 'releasetype': release})
+        tasks = tasks - mirrored
+    if tasks:
+        rows.extend(djadapter.taskfiles.filter(task__in=tasks, releasetype=release)
+                    .values_list('task', 'descriptor', 'typ', 'version'))
+    for task, descriptor, typ, version in rows:
+        key = (task, descriptor, typ)
+        latest[key] = max(latest.get(key, version), version)
+    for c in checks:
+        tf = c.taskfile
+        c.stale = latest.get((tf.task_id, tf.descriptor, tf.typ), tf.version) > tf.version
+
+
+def preflight(refobjinter, checksum=False, slow=2.0, workers=8):
+    """Check the files of all reftracks in the scene
+
+    :param refobjinter: the refobjinterface to query the reftracks
+    :type refobjinter: :class:`jukeboxmaya.reftrack.refobjinter.MayaRefobjInterface`
+    :param checksum: if True, read every file completely, compute the md5 checksum and time the read.
+                     Slow files are then the ones that are slow to read, not only slow to stat.
+    :type checksum: bool
+    :param slow: files that take longer than this many seconds are reported as slow
+    :type slow: float
+    :param workers: the number of threads
+    :type workers: int
+    :returns: the report
+    :rtype: :class:`PreflightReport`
+    :raises: None
+    """
+    start = time.time()
+    checks = {}
+    errors = []
+    refobjinter.prefetch_taskfiles()
+    for refobj in refobjinter.get_all_refobjs():
+        try:
+            tf = refobjinter.get_taskfile(refobj)
+        except djadapter.models.TaskFile.DoesNotExist as e:
+            errors.append((refobj, str(e)))
+            continue
+        check = checks.get(tf.pk)
+        if check is None:
+            path = JB_File(TaskFileInfo.create_from_taskfile(tf)).get_fullpath()
+            check = checks[tf.pk] = FileCheck(path, tf)
+        check.refobjs.append(refobj)
+    checks = list(checks.values())
+    if checks:
+        pool = ThreadPool(min(workers, len(checks)))
+        try:
+            pool.map(lambda c: c.run(checksum), checks)
+        finally:
+            pool.close()
+            pool.join()
+    mark_stale(checks)
+    report = PreflightReport(checks, errors, slow, time.time() - start)
+    log.debug(str(report))
+    return report
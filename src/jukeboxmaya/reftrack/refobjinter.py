@@ -3,15 +3,26 @@
 We depend heavily on the :class:`JB_ReftrackNode`. It is used as the refobject.
 These nodes can be connected to signal a parent child relationship. Via a connection to a scenenode/reference node we can query
 the needed informations.
+
+There are two implementations. :class:`MayaRefobjInterface` uses :mod:`maya.cmds`.
+:class:`MayaApiRefobjInterface` reads the nodes with the Maya Python API 2.0.
+See :data:`REFOBJINTERFACES`.
 """
 import maya.cmds as cmds
+import maya.OpenMaya as OpenMaya
+import maya.api.OpenMaya as om
 
 from jukeboxcore import djadapter
 from jukeboxcore.reftrack import RefobjInterface, Reftrack
+from jukeboxcore.log import get_logger
+log = get_logger(__name__)
 from jukeboxmaya import common
+from jukeboxmaya import sceneepoch
 from jukeboxmaya.mayaplugins import jbscene
 from jukeboxmaya.mayaplugins.jbreftrack import JB_ReftrackNode
 from jukeboxmaya.reftrack.asset import AssetReftypeInterface
+from jukeboxmaya.reftrack.snapshot import ReftrackSnapshot, ReftrackHierarchy, get_reference_loadstates
+from jukeboxmaya.reftrack.taskfileresolver import TaskfileResolver
 
 
 class MayaRefobjInterface(RefobjInterface):
@@ -34,6 +45,100 @@ class MayaRefobjInterface(RefobjInterface):
         :raises: None
         """
         super(MayaRefobjInterface, self).__init__()
+        self._snapshot = None
+        self._snapshotepoch = None
+        self._statuses = {}
+        self._statusesepoch = None
+        self._referenced = set()
+        self._referencedepoch = None
+        self._hierarchy = None
+        self._hierarchyepoch = None
+
+    def snapshot(self, ):
+        """Read the data of all reftrack nodes in one pass and answer queries from it.
+
+        Until the snapshot is invalidated, :meth:`MayaRefobjInterface.get_parent`,
+        :meth:`MayaRefobjInterface.get_children`, :meth:`MayaRefobjInterface.get_typ`,
+        :meth:`MayaRefobjInterface.get_id`, :meth:`MayaRefobjInterface.get_reference`,
+        :meth:`MayaRefobjInterface.get_status` and :meth:`MayaRefobjInterface.get_taskfile`
+        will not query the scene for nodes in the snapshot.
+        The snapshot is only valid for the scene epoch it was taken in. See :mod:`jukeboxmaya.sceneepoch`.
+        Every method of the interface that edits reftrack nodes invalidates the snapshot.
+        If you change attributes of reftrack nodes by other means, call :meth:`MayaRefobjInterface.invalidate_snapshot`.
+
+        :returns: the new snapshot
+        :rtype: :class:`jukeboxmaya.reftrack.snapshot.ReftrackSnapshot`
+        :raises: None
+        """
+        self._snapshot = ReftrackSnapshot.create()
+        self._snapshotepoch = sceneepoch.get_epoch()
+        return self._snapshot
+
+    def get_snapshot(self, ):
+        """Return the current snapshot or take a new one, if it is invalid
+
+        :returns: a valid snapshot
+        :rtype: :class:`jukeboxmaya.reftrack.snapshot.ReftrackSnapshot`
+        :raises: None
+        """
+        if self._snapshot is None or self._snapshotepoch != sceneepoch.get_epoch():
+            return self.snapshot()
+        return self._snapshot
+
+    def get_hierarchy(self, ):
+        """Return an index of the parent child relationships of all reftrack nodes
+
+        The index is built from :meth:`MayaRefobjInterface.get_snapshot` and cached for the current scene epoch.
+
+        :returns: the hierarchy
+        :rtype: :class:`jukeboxmaya.reftrack.snapshot.ReftrackHierarchy`
+        :raises: None
+        """
+        epoch = sceneepoch.get_epoch()
+        if self._hierarchy is None or epoch is None or self._hierarchyepoch != epoch:
+            self._hierarchy = ReftrackHierarchy(self.get_snapshot())
+            self._hierarchyepoch = sceneepoch.get_epoch()
+        return self._hierarchy
+
+    def invalidate_snapshot(self, ):
+        """Throw away the current snapshot, so all queries go to the scene again.
+
+        This also bumps the scene epoch, so other caches of the scene state are invalid too.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self._snapshot = None
+        self._hierarchy = None
+        sceneepoch.bump()
+
+    def invalidate_suggestions(self, ):
+        """Clear the cached scene suggestions of all type interfaces that cache them
+
+        See :meth:`jukeboxmaya.reftrack.asset.AssetReftypeInterface.invalidate_suggestions`.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        for typ in self.types:
+            typinter = self.get_typ_interface(typ)
+            if hasattr(typinter, 'invalidate_suggestions'):
+                typinter.invalidate_suggestions()
+
+    def get_snapshot_entry(self, refobj):
+        """Return the snapshot entry for the given reftrack node
+
+        :param refobj: the reftrack node to query
+        :type refobj: str
+        :returns: the entry or None, if there is no snapshot or the node is not in it.
+        :rtype: :class:`jukeboxmaya.reftrack.snapshot.ReftrackEntry` | None
+        :raises: None
+        """
+        if self._snapshot is None or self._snapshotepoch != sceneepoch.get_epoch():
+            return None
+        return self._snapshot.get(refobj)
 
     def exists(self, refobj):
         """Check if the given :class:`JB_ReftrackNode` is still in the scene
@@ -56,6 +161,9 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: refobj | None
         :raises: None
         """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return entry.parent
         c = cmds.listConnections("%s.parent" % refobj, source=False)
         return c[0] if c else None
 
@@ -70,6 +178,7 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: None
         :raises: None
         """
+        self.invalidate_snapshot()
         parents = cmds.listConnections("%s.parent" % child, plugs=True, source=True)
         if parents:
             # there is only one parent at a time
@@ -88,6 +197,9 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: list
         :raises: None
         """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return list(entry.children)
         children = cmds.listConnections("%s.children" % refobj, d=False)
         if not children:
             children = []
@@ -104,7 +216,8 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: str
         :raises: ValueError
         """
-        enum = cmds.getAttr("%s.type" % refobj)
+        entry = self.get_snapshot_entry(refobj)
+        enum = entry.typ if entry else cmds.getAttr("%s.type" % refobj)
         try:
             return JB_ReftrackNode.types[enum]
         except IndexError:
@@ -126,6 +239,7 @@ class MayaRefobjInterface(RefobjInterface):
             enum = JB_ReftrackNode.types.index(typ)
         except ValueError:
             raise ValueError("The given type %s could not be found in available types: %" % (typ, JB_ReftrackNode.types))
+        self.invalidate_snapshot()
         cmds.setAttr("%s.type" % refobj, enum)
 
     def get_id(self, refobj):
@@ -137,6 +251,9 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: int
         :raises: None
         """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return entry.identifier
         return cmds.getAttr("%s.identifier" % refobj)
 
     def set_id(self, refobj, identifier):
@@ -150,7 +267,8 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: None
         :raises: None
         """
-        cmds.setAttr("%s.identifier" %refobj, identifier)
+        self.invalidate_snapshot()
+        cmds.setAttr("%s.identifier" % refobj, identifier)
 
     def create_refobj(self, ):
         """Create and return a new reftrack node
@@ -159,10 +277,64 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: str
         :raises: None
         """
+        self.invalidate_snapshot()
         n = cmds.createNode("jb_reftrack")
         cmds.lockNode(n, lock=True)
         return n
 
+    def create_refobjs(self, count):
+        """Create and return the given number of new reftrack nodes
+
+        The nodes are created with one modifier and locked with one command,
+        all in one undo chunk.
+
+        :param count: the number of nodes to create
+        :type count: int
+        :returns: the new reftrack nodes
+        :rtype: list
+        :raises: None
+        """
+        if count <= 0:
+            return []
+        self.invalidate_snapshot()
+        mod = om.MDGModifier()
+        mobjs = [mod.createNode("jb_reftrack") for i in range(count)]
+        with common.undo_chunk("create_refobjs"):
+            common.do_modifier(mod)
+            nodes = [om.MFnDependencyNode(m).name() for m in mobjs]
+            cmds.lockNode(nodes, lock=True)
+        return nodes
+
+    def create_many(self, specs):
+        """Create many reftrack nodes with their type, identifier and parent
+
+        Does the same as :meth:`RefobjInterface.create` for every spec,
+        but the nodes are created with :meth:`MayaRefobjInterface.create_refobjs`
+        and type and identifier are set with one modifier. Everything is recorded in one undo chunk.
+
+        :param specs: tuples of entity type, identifier and parent reftrack node or None
+        :type specs: list
+        :returns: the new reftrack nodes in the order of the specs
+        :rtype: list
+        :raises: ValueError
+        """
+        specs = list(specs)
+        enums = []
+        for typ, identifier, parent in specs:
+            try:
+                enums.append(JB_ReftrackNode.types.index(typ))
+            except ValueError:
+                raise ValueError("The given type %s could not be found in available types: %s" % (typ, JB_ReftrackNode.types))
+        with common.undo_chunk("create_many"):
+            nodes = self.create_refobjs(len(specs))
+            if not nodes:
+                return nodes
+            common.set_attributes(nodes, {'type': enums, 'identifier': [s[1] for s in specs]})
+            for n, (typ, identifier, parent) in zip(nodes, specs):
+                if parent:
+                    self.set_parent(n, parent)
+        return nodes
+
     def referenced_by(self, refobj):
         """Return the reference that holds the given reftrack node.
 
@@ -203,9 +375,43 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: None
         :raises: None
         """
+        self.invalidate_snapshot()
         with common.locknode(refobj, lock=False):
             cmds.delete(refobj)
 
+    def delete_refobjs(self, refobjs, recursive=False):
+        """Delete the given reftrack nodes in one undo chunk
+
+        The nodes are sorted, so children are deleted before their parents,
+        unlocked with one command and deleted with one modifier.
+
+        :param refobjs: the nodes to delete
+        :type refobjs: list
+        :param recursive: if True, also delete all descendants of the given nodes
+        :type recursive: bool
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        hierarchy = self.get_hierarchy()
+        nodes = set(refobjs)
+        if recursive:
+            for refobj in refobjs:
+                nodes.update(hierarchy.get_descendants(refobj))
+        if not nodes:
+            return
+        nodes = hierarchy.children_first(nodes)
+        self.invalidate_snapshot()
+        mod = om.MDGModifier()
+        sel = om.MSelectionList()
+        for n in nodes:
+            sel.add(n)
+        for i in range(sel.length()):
+            mod.deleteNode(sel.getDependNode(i))
+        with common.undo_chunk("delete_refobjs"):
+            cmds.lockNode(nodes, lock=False)
+            common.do_modifier(mod)
+
     def get_all_refobjs(self, ):
         """Return all refobjs in the scene
 
@@ -226,8 +432,11 @@ class MayaRefobjInterface(RefobjInterface):
         if not n:
             return None
         tfid = cmds.getAttr("%s.taskfile_id" % n)
+        resolver = TaskfileResolver.get()
+        if tfid not in resolver:
+            self.prefetch_taskfiles()
         try:
-            tf = djadapter.taskfiles.get(pk=tfid)
+            tf = resolver.get_taskfile(tfid)
             return tf.task.element
         except djadapter.models.TaskFile.DoesNotExist:
             raise djadapter.models.TaskFile.DoesNotExist("Could not find the taskfile that was set on the scene node. Id was %s" % tfid)
@@ -243,6 +452,7 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: None
         :raises: None
         """
+        self.invalidate_snapshot()
         refnodeattr = "%s.referencenode" % refobj
         if reference:
             cmds.connectAttr("%s.message" % reference, refnodeattr, force=True)
@@ -264,6 +474,9 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: str | None
         :raises: None
         """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return entry.reference
         c = cmds.listConnections("%s.referencenode" % refobj, d=False)
         return c[0] if c else None
 
@@ -278,8 +491,75 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: str
         :raises: None
         """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return Reftrack.IMPORTED if not entry.reference else Reftrack.LOADED if entry.loaded else Reftrack.UNLOADED
+        statuses = self._get_status_cache()
+        status = statuses.get(refobj) if statuses is not None else None
+        if status:
+            return status
         reference = self.get_reference(refobj)
-        return Reftrack.IMPORTED if not reference else Reftrack.LOADED if cmds.referenceQuery(reference, isLoaded=True) else Reftrack.UNLOADED
+        status = Reftrack.IMPORTED if not reference else Reftrack.LOADED if cmds.referenceQuery(reference, isLoaded=True) else Reftrack.UNLOADED
+        if statuses is not None:
+            statuses[refobj] = status
+        return status
+
+    def _get_status_cache(self, ):
+        """Return the cached statuses of the current scene epoch
+
+        The cache is emptied when the epoch changes. Statuses are only added to it when
+        they are queried, so a new epoch does not recompute the status of every reftrack node.
+
+        :returns: dict of reftrack node to status or None, if the scene epoch is unknown
+        :rtype: dict | None
+        :raises: None
+        """
+        epoch = sceneepoch.get_epoch()
+        if epoch is None:
+            return None
+        if self._statusesepoch != epoch:
+            self._statuses = {}
+            self._statusesepoch = epoch
+        return self._statuses
+
+    def get_statuses(self, refobjs):
+        """Return the status of all given reftrack nodes
+
+        Uses one query for the connected reference nodes and one iteration over
+        all reference nodes for the load states, independent of the number of reftrack nodes.
+        If the scene epoch is known, the statuses are cached for the epoch,
+        so following calls to :meth:`MayaRefobjInterface.get_status` do not query the scene again.
+
+        See: :data:`Reftrack.LOADED`, :data:`Reftrack.UNLOADED`, :data:`Reftrack.IMPORTED`.
+
+        :param refobjs: the reftrack nodes to query
+        :type refobjs: list
+        :returns: the status of each given reftrack node in the same order
+        :rtype: list
+        :raises: None
+        """
+        refobjs = list(refobjs)
+        if not refobjs:
+            return []
+        conns = cmds.listConnections(["%s.referencenode" % r for r in refobjs],
+                                     connections=True, destination=False) or []
+        references = {}
+        for i in range(0, len(conns), 2):
+            references[conns[i].rpartition(".")[0]] = conns[i+1]
+        loadstates = get_reference_loadstates() if references else {}
+        statuses = []
+        for refobj in refobjs:
+            reference = references.get(refobj)
+            if not reference:
+                statuses.append(Reftrack.IMPORTED)
+            elif loadstates.get(reference, False):
+                statuses.append(Reftrack.LOADED)
+            else:
+                statuses.append(Reftrack.UNLOADED)
+        cache = self._get_status_cache()
+        if cache is not None:
+            cache.update(zip(refobjs, statuses))
+        return statuses
 
     def get_taskfile(self, refobj):
         """Return the taskfile that is loaded and represented by the refobj
@@ -290,12 +570,48 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: :class:`jukeboxcore.djadapter.TaskFile`
         :raises: None
         """
-        tfid = cmds.getAttr("%s.taskfile_id" % refobj)
+        entry = self.get_snapshot_entry(refobj)
+        tfid = entry.taskfile_id if entry else cmds.getAttr("%s.taskfile_id" % refobj)
+        return self.resolve_taskfile(refobj, tfid)
+
+    def resolve_taskfile(self, refobj, tfid):
+        """Return the taskfile for the given id that was read from the given reftrack node
+
+        If the taskfile is not cached by the :class:`TaskfileResolver`, the taskfiles of all
+        reftrack nodes in the scene are fetched at once. See :meth:`MayaRefobjInterface.prefetch_taskfiles`.
+
+        :param refobj: the reftrack node the id is from
+        :type refobj: str
+        :param tfid: the taskfile id
+        :type tfid: int
+        :returns: The taskfile
+        :rtype: :class:`jukeboxcore.djadapter.TaskFile`
+        :raises: :class:`djadapter.models.TaskFile.DoesNotExist`
+        """
+        resolver = TaskfileResolver.get()
+        if tfid not in resolver:
+            self.prefetch_taskfiles()
         try:
-            return djadapter.taskfiles.get(pk=tfid)
+            return resolver.get_taskfile(tfid)
         except djadapter.models.TaskFile.DoesNotExist:
             raise djadapter.models.TaskFile.DoesNotExist("Could not find the taskfile that was set on the node %s. Id was %s" % (refobj, tfid))
 
+    def prefetch_taskfiles(self, ):
+        """Fetch the taskfiles of all reftrack nodes and the current scene node with one query
+
+        The ids are read from the current snapshot. If there is no valid snapshot, a new one is taken.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        snapshot = self.get_snapshot()
+        ids = [snapshot.get(r).taskfile_id for r in snapshot.refobjs()]
+        n = jbscene.get_current_scene_node()
+        if n:
+            ids.append(cmds.getAttr("%s.taskfile_id" % n))
+        TaskfileResolver.get().prefetch(ids)
+
     def connect_reftrack_scenenode(self, refobj, scenenode):
         """Connect the given reftrack node with the given scene node
 
@@ -307,6 +623,7 @@ class MayaRefobjInterface(RefobjInterface):
         :rtype: None
         :raises: None
         """
+        self.invalidate_snapshot()
         conns = [("%s.scenenode" % refobj, "%s.reftrack" % scenenode),
                  ("%s.taskfile_id" % scenenode, "%s.taskfile_id" % refobj)]
         for src, dst in conns:
@@ -336,7 +653,387 @@ class MayaRefobjInterface(RefobjInterface):
             return True
         if action in ('replace', 'delete', 'import_reference') and reftrack.status() in (Reftrack.LOADED, Reftrack.UNLOADED):
                 tracknode = reftrack.get_refobj()
-                restricted = cmds.referenceQuery(tracknode, isNodeReferenced=True)
+                restricted = self.is_referenced(tracknode)
                 if restricted:
                     return True
         return super(MayaRefobjInterface, self).fetch_action_restriction(reftrack, action)
+
+    def fetch_action_restrictions(self, reftracks, actions):
+        """Return for every given reftrack and action, wheter the action is restricted
+
+        See :meth:`MayaRefobjInterface.fetch_action_restriction`.
+        The referenced reftrack nodes are queried once per scene epoch, so
+        the scene is queried at most once for the whole matrix.
+
+        :param reftracks: the reftracks to query
+        :type reftracks: list of :class:`Reftrack`
+        :param actions: the actions to check
+        :type actions: list of str
+        :returns: a dictionary that maps each reftrack to a dictionary that maps each action to True, if it is restricted
+        :rtype: dict
+        :raises: None
+        """
+        self.get_referenced_refobjs()
+        restrictions = {}
+        for reftrack in reftracks:
+            restrictions[reftrack] = dict((a, self.fetch_action_restriction(reftrack, a)) for a in actions)
+        return restrictions
+
+    def get_referenced_refobjs(self, ):
+        """Return all reftrack nodes that are referenced
+
+        The result is cached for the current scene epoch.
+
+        :returns: the referenced reftrack nodes
+        :rtype: set
+        :raises: None
+        """
+        epoch = sceneepoch.get_epoch()
+        if epoch is None or self._referencedepoch != epoch:
+            self._referenced = set(cmds.ls(type="jb_reftrack", referencedNodes=True))
+            self._referencedepoch = epoch
+        return self._referenced
+
+    def is_referenced(self, refobj):
+        """Return True, if the given reftrack node is from a referenced file
+
+        Uses :meth:`MayaRefobjInterface.get_referenced_refobjs` if the scene epoch is known.
+
+        :param refobj: the reftrack node to query
+        :type refobj: str
+        :returns: True, if referenced
+        :rtype: bool
+        :raises: None
+        """
+        if sceneepoch.get_epoch() is None:
+            return cmds.referenceQuery(refobj, isNodeReferenced=True)
+        return refobj in self.get_referenced_refobjs()
+
+
+def get_connected_names(plug, source=True, destination=True):
+    """Return the names of the nodes connected to the given plug
+
+    :param plug: the plug to query
+    :type plug: :class:`maya.api.OpenMaya.MPlug`
+    :param source: if True, return the nodes that are the source of a connection to the plug
+    :type source: bool
+    :param destination: if True, return the nodes that are the destination of a connection from the plug
+    :type destination: bool
+    :returns: list of node names
+    :rtype: list
+    :raises: None
+    """
+    return [om.MFnDependencyNode(p.node()).name() for p in plug.connectedTo(source, destination)]
+
+
+class MayaApiRefobjInterface(MayaRefobjInterface):
+    """Refobjinterface that reads the :class:`JB_ReftrackNode` with the Maya Python API 2.0
+
+    The refobjects are still node names, so the reftype interfaces work with both implementations.
+    Internally the interface keeps a :class:`maya.api.OpenMaya.MObjectHandle` for every node it has seen
+    and reads the attributes through :class:`maya.api.OpenMaya.MPlug`, instead of parsing strings
+    returned by :mod:`maya.cmds`. Edits still go through :mod:`maya.cmds`, so they are undoable.
+    """
+
+    def __init__(self, ):
+        """Initialize a new refobjinterface.
+
+        :raises: None
+        """
+        super(MayaApiRefobjInterface, self).__init__()
+        self._handles = {}
+
+    def get_mobject(self, node):
+        """Return the MObject for the given node name
+
+        The handle is cached. If the node got deleted or renamed, the node is looked up again.
+
+        :param node: the node name
+        :type node: str
+        :returns: the node
+        :rtype: :class:`maya.api.OpenMaya.MObject`
+        :raises: :class:`RuntimeError` if the node does not exist
+        """
+        handle = self._handles.get(node)
+        if handle is not None and handle.isValid():
+            mobj = handle.object()
+            if om.MFnDependencyNode(mobj).name() == node:
+                return mobj
+        sel = om.MSelectionList()
+        sel.add(node)
+        mobj = sel.getDependNode(0)
+        self._handles[node] = om.MObjectHandle(mobj)
+        return mobj
+
+    def get_plug(self, node, attr):
+        """Return the plug for the given attribute of the node
+
+        :param node: the node name
+        :type node: str
+        :param attr: the attribute name
+        :type attr: str
+        :returns: the plug
+        :rtype: :class:`maya.api.OpenMaya.MPlug`
+        :raises: :class:`RuntimeError` if the node does not exist
+        """
+        return om.MFnDependencyNode(self.get_mobject(node)).findPlug(attr, False)
+
+    def exists(self, refobj):
+        """Check if the given :class:`JB_ReftrackNode` is still in the scene
+        or if it has been deleted/dissapeared
+
+        :param refobj: a reftrack node to query
+        :type refobj: str
+        :returns: True, if it still exists
+        :rtype: :class:`bool`
+        :raises: None
+        """
+        try:
+            self.get_mobject(refobj)
+        except RuntimeError:
+            return False
+        return True
+
+    def get_parent(self, refobj):
+        """Return the parent of the given :class:`JB_ReftrackNode`.
+
+        :param refobj: a reftrack node to query
+        :type refobj: str
+        :returns: the parent reftrack node
+        :rtype: refobj | None
+        :raises: None
+        """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return entry.parent
+        c = get_connected_names(self.get_plug(refobj, "parent"), source=False)
+        return c[0] if c else None
+
+    def get_children(self, refobj):
+        """Get the children reftrack nodes of the given node
+
+        :param refobj: the parent reftrack node
+        :type refobj: str
+        :returns: a list with children reftrack nodes
+        :rtype: list
+        :raises: None
+        """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return list(entry.children)
+        plug = self.get_plug(refobj, "children")
+        children = []
+        for i in range(plug.numConnectedElements()):
+            children.extend(get_connected_names(plug.connectionByPhysicalIndex(i), destination=False))
+        return children
+
+    def get_typ(self, refobj):
+        """Return the entity type of the given reftrack node
+
+        :param refobj: the reftrack node to query
+        :type refobj: str
+        :returns: the entity type
+        :rtype: str
+        :raises: ValueError
+        """
+        entry = self.get_snapshot_entry(refobj)
+        enum = entry.typ if entry else self.get_plug(refobj, "type").asInt()
+        try:
+            return JB_ReftrackNode.types[enum]
+        except IndexError:
+            raise ValueError("The type on the node %s could not be associated with an available type: %s" %
+                             (refobj, JB_ReftrackNode.types))
+
+    def get_id(self, refobj):
+        """Return the identifier of the given refobject
+
+        :param refobj: the refobj to query
+        :type refobj: refobj
+        :returns: the refobj id. Used to identify refobjects of the same parent, element and type in the UI
+        :rtype: int
+        :raises: None
+        """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return entry.identifier
+        return self.get_plug(refobj, "identifier").asInt()
+
+    def get_reference(self, refobj):
+        """Return the reference node that the reftrack node is connected to or None if it is imported.
+
+        :param refobj: the reftrack node to query
+        :type refobj: str
+        :returns: the reference node
+        :rtype: str | None
+        :raises: None
+        """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return entry.reference
+        c = get_connected_names(self.get_plug(refobj, "referencenode"), destination=False)
+        return c[0] if c else None
+
+    def get_status(self, refobj):
+        """Return the status of the given reftrack node
+
+        :param refobj: the reftrack node to query
+        :type refobj: str
+        :returns: the status of the given reftrack node
+        :rtype: str
+        :raises: None
+        """
+        entry = self.get_snapshot_entry(refobj)
+        if entry:
+            return Reftrack.IMPORTED if not entry.reference else Reftrack.LOADED if entry.loaded else Reftrack.UNLOADED
+        reference = self.get_reference(refobj)
+        if not reference:
+            return Reftrack.IMPORTED
+        return Reftrack.LOADED if om.MFnReference(self.get_mobject(reference)).isLoaded() else Reftrack.UNLOADED
+
+    def get_taskfile(self, refobj):
+        """Return the taskfile that is loaded and represented by the refobj
+
+        :param refobj: the reftrack node to query
+        :type refobj: str
+        :returns: The taskfile that is loaded in the scene
+        :rtype: :class:`jukeboxcore.djadapter.TaskFile`
+        :raises: None
+        """
+        entry = self.get_snapshot_entry(refobj)
+        tfid = entry.taskfile_id if entry else self.get_plug(refobj, "taskfile_id").asInt()
+        return self.resolve_taskfile(refobj, tfid)
+
+
+REFOBJINTERFACES = {'cmds': MayaRefobjInterface,
+                    'api': MayaApiRefobjInterface}
+"""A dictionary that maps names to refobjinterface classes.
+The reftracker plugin uses the name in its config to choose the implementation."""
+
+
+def register_refobjinterface(name, refobjinterclass):
+    """Register a refobjinterface class under the given name
+
+    :param name: the name for the implementation
+    :type name: str
+    :param refobjinterclass: the class to register
+    :type refobjinterclass: :class:`MayaRefobjInterface`
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    REFOBJINTERFACES[name] = refobjinterclass
+
+
+def get_refobjinterface(name):
+    """Return the refobjinterface class that is registered under the given name
+
+    :param name: the name of the implementation. See :data:`REFOBJINTERFACES`.
+    :type name: str
+    :returns: the registered class
+    :rtype: :class:`MayaRefobjInterface`
+    :raises: ValueError
+    """
+    try:
+        return REFOBJINTERFACES[name]
+    except KeyError:
+        raise ValueError("No refobjinterface registered under %s. Available are: %s" % (name, REFOBJINTERFACES.keys()))
+
+
+class DeferredLoadHandler(object):
+    """Finish the setup of references that were created in deferred mode, when they get loaded by other
+    means than the reftrack interfaces, e.g. the Reference Editor.
+
+    Registers a callback for :data:`OpenMaya.MSceneMessage.kAfterLoadReference`. If the loaded reference
+    is connected to a reftrack node, the type interface of the node finishes the setup.
+    See :meth:`jukeboxmaya.reftrack.asset.AssetReftypeInterface.finish_deferred`.
+    References that are loaded while a scene is read are skipped.
+
+    .. Important:: Use DeferredLoadHandler.get() to obtain the handler!
+    """
+
+    handler = None
+    """DeferredLoadHandler instance when using DeferredLoadHandler.get()"""
+
+    def __init__(self, ):
+        """Initialize a new handler
+
+        :raises: None
+        """
+        self.callbackid = None
+        self.inter = MayaRefobjInterface()
+
+    @classmethod
+    def get(cls):
+        """Return a DeferredLoadHandler instance.
+
+        This will always return the same instance. If the instance is not available
+        it will be created and returned.
+
+        :returns: always the same DeferredLoadHandler
+        :rtype: DeferredLoadHandler
+        :raises: None
+        """
+        if not cls.handler:
+            cls.handler = cls()
+        return cls.handler
+
+    def is_installed(self, ):
+        """Return True, if the callback is registered
+
+        :returns: True, if installed
+        :rtype: bool
+        :raises: None
+        """
+        return self.callbackid is not None
+
+    def install(self, ):
+        """Register the callback. Does nothing if it is already installed.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if self.is_installed():
+            return
+        self.callbackid = OpenMaya.MSceneMessage.addReferenceCallback(OpenMaya.MSceneMessage.kAfterLoadReference,
+                                                                      self.reference_loaded)
+
+    def uninstall(self, ):
+        """Remove the callback.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if self.is_installed():
+            OpenMaya.MMessage.removeCallback(self.callbackid)
+            self.callbackid = None
+
+    def reference_loaded(self, refnode, resolvedfile, clientdata):
+        """Finish the setup for all reftrack nodes, that are connected to the loaded reference node
+
+        :param refnode: the loaded reference node
+        :type refnode: :class:`OpenMaya.MObject`
+        :param resolvedfile: the file of the reference
+        :type resolvedfile: :class:`OpenMaya.MFileObject`
+        :param clientdata: not used
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if OpenMaya.MFileIO.isReadingFile():
+            return
+        reference = OpenMaya.MFnDependencyNode(refnode).name()
+        refobjs = cmds.listConnections("%s.message" % reference, source=False, type="jb_reftrack") or []
+        for refobj in refobjs:
+            try:
+                typinter = self.inter.get_typ_interface(self.inter.get_typ(refobj))
+            except ValueError:
+                continue
+            finish = getattr(typinter, 'finish_deferred', None)
+            if finish is None:
+                continue
+            try:
+                finish(refobj, reference)
+            except Exception:
+                log.exception("Could not finish the setup of %s for %s", refobj, reference)
@@ -0,0 +1,301 @@
+"""Bulk reading of :class:`jukeboxmaya.mayaplugins.jbreftrack.JB_ReftrackNode` data.
+
+Querying every reftrack node with ``maya.cmds`` costs several string parsed round trips per node.
+A :class:`ReftrackSnapshot` reads the data of all reftrack nodes in the scene with a single iteration
+over the dependency graph, so :class:`jukeboxmaya.reftrack.refobjinter.MayaRefobjInterface` can
+answer its queries from memory.
+"""
+import maya.OpenMaya as OpenMaya
+
+from jukeboxmaya import common
+
+
+REFTRACK_TYPE = "jb_reftrack"
+"""The node type name of the reftrack nodes"""
+
+
+def get_node_name(mobj):
+    """Return the name of the given dependency node
+
+    :param mobj: the node
+    :type mobj: :class:`OpenMaya.MObject`
+    :returns: the name of the node
+    :rtype: str
+    :raises: None
+    """
+    return OpenMaya.MFnDependencyNode(mobj).name()
+
+
+def get_connected_nodes(plug, source=True, destination=True):
+    """Return the names of the nodes that are connected to the given plug
+
+    :param plug: the plug to query
+    :type plug: :class:`OpenMaya.MPlug`
+    :param source: if True, return the nodes, that are the source of a connection to the plug
+    :type source: bool
+    :param destination: if True, return the nodes, that are the destination of a connection from the plug
+    :type destination: bool
+    :returns: list of node names
+    :rtype: list
+    :raises: None
+    """
+    plugs = OpenMaya.MPlugArray()
+    plug.connectedTo(plugs, source, destination)
+    return [get_node_name(plugs[i].node()) for i in range(plugs.length())]
+
+
+def get_reference_loadstates():
+    """Return the load state of all reference nodes in the scene
+
+    :returns: a dictionary that maps reference node names to True if loaded or False if unloaded
+    :rtype: dict
+    :raises: None
+    """
+    states = {}
+    it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kReference)
+    while not it.isDone():
+        mobj = it.thisNode()
+        it.next()
+        try:
+            states[get_node_name(mobj)] = OpenMaya.MFnReference(mobj).isLoaded()
+        except RuntimeError:
+            # nodes like the sharedReferenceNode are not associated with a file
+            continue
+    return states
+
+
+class ReftrackEntry(object):
+    """Holds the data of one reftrack node at the time the snapshot was taken."""
+
+    __slots__ = ['node', 'typ', 'identifier', 'namespace', 'taskfile_id',
+                 'parent', 'children', 'reference', 'loaded']
+
+    def __init__(self, node, typ, identifier, namespace, taskfile_id, parent, children, reference, loaded):
+        """Initialize a new entry
+
+        :param node: the name of the reftrack node
+        :type node: str
+        :param typ: the value of the type enum attribute
+        :type typ: int
+        :param identifier: the identifier of the node
+        :type identifier: int
+        :param namespace: the namespace attribute of the node
+        :type namespace: str
+        :param taskfile_id: the taskfile id of the node
+        :type taskfile_id: int
+        :param parent: the parent reftrack node or None
+        :type parent: str | None
+        :param children: the children reftrack nodes
+        :type children: list
+        :param reference: the connected reference node or None
+        :type reference: str | None
+        :param loaded: True, if the reference node is loaded. False if unloaded or if there is no reference.
+        :type loaded: bool
+        :raises: None
+        """
+        self.node = node
+        self.typ = typ
+        self.identifier = identifier
+        self.namespace = namespace
+        self.taskfile_id = taskfile_id
+        self.parent = parent
+        self.children = children
+        self.reference = reference
+        self.loaded = loaded
+
+
+class ReftrackSnapshot(object):
+    """A snapshot of all reftrack nodes in the scene.
+
+    Use :meth:`ReftrackSnapshot.create` to read the current scene.
+    The snapshot does not update itself. It is up to the user to throw it away when the scene changes.
+    """
+
+    def __init__(self, entries):
+        """Initialize a new snapshot with the given entries
+
+        :param entries: a list of :class:`ReftrackEntry`
+        :type entries: list
+        :raises: None
+        """
+        self._entries = dict((e.node, e) for e in entries)
+        self._order = [e.node for e in entries]
+
+    @classmethod
+    def create(cls, ):
+        """Read all reftrack nodes of the current scene in one pass and return a new snapshot
+
+        The connections are read while iterating the nodes.
+        The attributes are read afterwards with :func:`jukeboxmaya.common.get_attributes`.
+
+        :returns: the new snapshot
+        :rtype: :class:`ReftrackSnapshot`
+        :raises: None
+        """
+        nodes = []
+        connections = []
+        loadstates = {}
+        it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kPluginDependNode)
+        while not it.isDone():
+            mobj = it.thisNode()
+            it.next()
+            fn = OpenMaya.MFnDependencyNode(mobj)
+            if fn.typeName() != REFTRACK_TYPE:
+                continue
+            parents = get_connected_nodes(fn.findPlug("parent"), source=False)
+            childrenplug = fn.findPlug("children")
+            children = []
+            for i in range(childrenplug.numConnectedElements()):
+                children.extend(get_connected_nodes(childrenplug.connectionByPhysicalIndex(i), destination=False))
+            refplugs = OpenMaya.MPlugArray()
+            fn.findPlug("referencenode").connectedTo(refplugs, True, False)
+            reference = None
+            loaded = False
+            if refplugs.length():
+                refobj = refplugs[0].node()
+                reference = get_node_name(refobj)
+                if reference not in loadstates:
+                    loadstates[reference] = OpenMaya.MFnReference(refobj).isLoaded()
+                loaded = loadstates[reference]
+            nodes.append(fn.name())
+            connections.append((parents[0] if parents else None, children, reference, loaded))
+        attrs = common.get_attributes(nodes, ["type", "identifier", "namespace", "taskfile_id"])
+        entries = []
+        for i, (node, (parent, children, reference, loaded)) in enumerate(zip(nodes, connections)):
+            entries.append(ReftrackEntry(node=node,
+                                         typ=attrs["type"][i],
+                                         identifier=attrs["identifier"][i],
+                                         namespace=attrs["namespace"][i],
+                                         taskfile_id=attrs["taskfile_id"][i],
+                                         parent=parent,
+                                         children=children,
+                                         reference=reference,
+                                         loaded=loaded))
+        return cls(entries)
+
+    def __contains__(self, refobj):
+        """Return True, if the given reftrack node is in the snapshot
+
+        :param refobj: the reftrack node
+        :type refobj: str
+        :returns: True, if the node is in the snapshot
+        :rtype: bool
+        :raises: None
+        """
+        return refobj in self._entries
+
+    def __len__(self, ):
+        """Return the number of reftrack nodes in the snapshot
+
+        :returns: the number of nodes
+        :rtype: int
+        :raises: None
+        """
+        return len(self._entries)
+
+    def get(self, refobj):
+        """Return the entry for the given reftrack node or None if the node is not in the snapshot
+
+        :param refobj: the reftrack node
+        :type refobj: str
+        :returns: the entry or None
+        :rtype: :class:`ReftrackEntry` | None
+        :raises: None
+        """
+        return self._entries.get(refobj)
+
+    def refobjs(self, ):
+        """Return all reftrack nodes in the snapshot in the order they were found in the scene
+
+        :returns: list of reftrack nodes
+        :rtype: list
+        :raises: None
+        """
+        return list(self._order)
+
+
+class ReftrackHierarchy(object):
+    """An index of the parent child relationships of the reftrack nodes in a snapshot"""
+
+    def __init__(self, snapshot):
+        """Initialize a new hierarchy for the given snapshot
+
+        :param snapshot: the snapshot with the reftrack nodes
+        :type snapshot: :class:`ReftrackSnapshot`
+        :raises: None
+        """
+        self.parents = {}
+        """Maps each reftrack node to its parent or None"""
+        self.children = {}
+        """Maps each reftrack node to a list of its children"""
+        self.depths = {}
+        """Maps each reftrack node to its depth. Nodes without parent have depth 0."""
+        for refobj in snapshot.refobjs():
+            entry = snapshot.get(refobj)
+            self.parents[refobj] = entry.parent
+            self.children[refobj] = list(entry.children)
+        for refobj in self.parents:
+            self._compute_depth(refobj)
+
+    def _compute_depth(self, refobj):
+        """Compute the depth of the given node and all its ancestors
+
+        :param refobj: the reftrack node
+        :type refobj: str
+        :returns: the depth
+        :rtype: int
+        :raises: None
+        """
+        chain = []
+        node = refobj
+        while node is not None and node not in self.depths and node not in chain:
+            chain.append(node)
+            node = self.parents.get(node)
+        depth = self.depths.get(node, -1) if node is not None else -1
+        for n in reversed(chain):
+            depth += 1
+            self.depths[n] = depth
+        return self.depths[refobj]
+
+    def get_depth(self, refobj):
+        """Return the depth of the given node
+
+        :param refobj: the reftrack node
+        :type refobj: str
+        :returns: the depth. 0 for nodes without parent.
+        :rtype: int
+        :raises: KeyError
+        """
+        return self.depths[refobj]
+
+    def get_descendants(self, refobj):
+        """Return all children, grandchildren etc of the given node
+
+        :param refobj: the reftrack node
+        :type refobj: str
+        :returns: the descendants, parents before their children
+        :rtype: list
+        :raises: None
+        """
+        descendants = []
+        seen = set([refobj])
+        stack = list(reversed(self.children.get(refobj, [])))
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            descendants.append(node)
+            stack.extend(reversed(self.children.get(node, [])))
+        return descendants
+
+    def children_first(self, refobjs):
+        """Return the given nodes sorted, so that children come before their parents
+
+        :param refobjs: the reftrack nodes to sort
+        :type refobjs: iterable
+        :returns: the sorted nodes
+        :rtype: list
+        :raises: None
+        """
+        return sorted(refobjs, key=lambda r: self.depths.get(r, 0), reverse=True)
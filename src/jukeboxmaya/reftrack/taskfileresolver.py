@@ -0,0 +1,177 @@
+"""Resolve taskfile ids of reftrack and scene nodes to taskfiles with as few database queries as possible.
+
+Instead of querying every taskfile with its own query, a :class:`TaskfileResolver` fetches
+many taskfiles with one ``pk__in`` query and keeps them in a bounded LRU cache.
+Ids that could not be found are kept in the same cache, so they are not queried again and again.
+Released taskfiles do not change, but the cache should be invalidated after a release,
+so newly created taskfiles are found.
+If the :class:`jukeboxmaya.dbmirror.DBMirror` is enabled, taskfiles are read from the mirror
+and only the ones that are not mirrored are queried.
+"""
+from collections import OrderedDict
+
+from jukeboxcore import djadapter
+from jukeboxcore.log import get_logger
+log = get_logger(__name__)
+from jukeboxmaya.dbmirror import DBMirror
+
+
+class TaskfileResolver(object):
+    """Cache for taskfiles, that fetches missing taskfiles in bulk
+
+    .. Important:: Use TaskfileResolver.get() to obtain the shared resolver!
+    """
+
+    resolver = None
+    """TaskfileResolver instance when using TaskfileResolver.get()"""
+
+    def __init__(self, maxsize=1024):
+        """Initialize a new resolver
+
+        :param maxsize: the maximum number of taskfiles and missing ids to keep
+        :type maxsize: int
+        :raises: None
+        """
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        """Maps taskfile ids to taskfiles or to None for ids that are missing"""
+
+    @classmethod
+    def get(cls):
+        """Return a TaskfileResolver Instance.
+
+        This will always return the same instance. If the instance is not available
+        it will be created and returned.
+
+        :returns: always the same TaskfileResolver
+        :rtype: TaskfileResolver
+        :raises: None
+        """
+        if not cls.resolver:
+            cls.resolver = cls()
+        return cls.resolver
+
+    def __contains__(self, tfid):
+        """Return True, if the taskfile with the id is either cached or known to be missing
+
+        :param tfid: the taskfile id
+        :type tfid: int
+        :returns: True, if there is no need to fetch the id
+        :rtype: bool
+        :raises: None
+        """
+        return tfid in self._cache
+
+    def query(self, ids):
+        """Return a queryset for the given taskfile ids with the related objects needed by the reftrack system
+
+        Task and department are joined. The element of the task is prefetched
+        because it could be a shot or an asset.
+
+        :param ids: the taskfile ids
+        :type ids: list
+        :returns: a queryset
+        :rtype: :class:`django.db.models.query.QuerySet`
+        :raises: None
+        """
+        return djadapter.taskfiles.filter(pk__in=ids)\
+                                  .select_related('task', 'task__department')\
+                                  .prefetch_related('task__element')
+
+    def prefetch(self, ids):
+        """Fetch all given taskfiles, that are not cached yet, with one query
+
+        :param ids: the taskfile ids
+        :type ids: iterable
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        ids = set(i for i in ids if i not in self)
+        if not ids:
+            return
+        mirror = DBMirror.get()
+        if mirror is not None:
+            for tf in mirror.get_many(djadapter.models.TaskFile, ids).values():
+                self._add(tf)
+                ids.discard(tf.pk)
+            if not ids:
+                return
+        log.debug("Fetching %s taskfiles.", len(ids))
+        for tf in self.query(list(ids)):
+            self._add(tf)
+            ids.discard(tf.pk)
+        for i in ids:
+            self._add_entry(i, None)
+
+    def _add(self, taskfile):
+        """Add the given taskfile to the cache and drop the least recently used ones
+        if the cache is too big.
+
+        :param taskfile: the taskfile to add
+        :type taskfile: :class:`jukeboxcore.djadapter.models.TaskFile`
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self._add_entry(taskfile.pk, taskfile)
+
+    def _add_entry(self, tfid, taskfile):
+        """Add the given entry to the cache and drop the least recently used ones
+        if the cache is too big.
+
+        :param tfid: the taskfile id
+        :type tfid: int
+        :param taskfile: the taskfile or None if the id is missing
+        :type taskfile: :class:`jukeboxcore.djadapter.models.TaskFile` | None
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self._cache.pop(tfid, None)
+        self._cache[tfid] = taskfile
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def get_taskfile(self, tfid):
+        """Return the taskfile for the given id. If it is not cached, fetch it.
+
+        :param tfid: the taskfile id
+        :type tfid: int
+        :returns: the taskfile
+        :rtype: :class:`jukeboxcore.djadapter.models.TaskFile`
+        :raises: :class:`djadapter.models.TaskFile.DoesNotExist`
+        """
+        self.prefetch([tfid])
+        tf = self._cache.pop(tfid, None)
+        self._cache[tfid] = tf
+        if tf is None:
+            raise djadapter.models.TaskFile.DoesNotExist("Could not find the taskfile with id %s" % tfid)
+        return tf
+
+    def invalidate(self, ids=None):
+        """Remove the given taskfiles from the cache or clear the whole cache
+
+        :param ids: the taskfile ids to drop. If None, clear everything.
+        :type ids: iterable | None
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if ids is None:
+            self._cache.clear()
+            return
+        for i in ids:
+            self._cache.pop(i, None)
+
+    def invalidate_missing(self, ):
+        """Forget all ids that could not be found, so they are queried again.
+
+        Call this when new taskfiles were created, e.g. after saving a new version.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        for i in [i for i, tf in self._cache.items() if tf is None]:
+            del self._cache[i]
@@ -0,0 +1,221 @@
+"""A monotonically increasing counter that changes whenever the pipeline relevant state of the scene changes.
+
+Caches of scene data can remember the epoch they were filled in and are valid as long as the epoch does not change.
+The epoch is increased by callbacks for scene open/new/import, reference create/remove/load/unload/import,
+undo and redo and nodes of type ``jb_reftrack``, ``jb_sceneNode`` and ``reference`` that get added or removed.
+There are no callbacks for renames and connections, because they would run for every node in the scene,
+e.g. when a large asset is opened or imported. The methods of
+:class:`jukeboxmaya.reftrack.refobjinter.MayaRefobjInterface` that connect nodes or change attributes
+bump the epoch themselves. Code that changes relevant data by other means
+(e.g. renames or connects a reftrack node) has to call :func:`bump`.
+Besides the epoch, :func:`get_scene` returns a counter, that only changes when a new scene is opened or created.
+
+Use :meth:`SceneEpoch.install` to register the callbacks. :func:`jukeboxmaya.main.init` does that for you.
+As long as the callbacks are not installed, :func:`get_epoch` returns None and :func:`memoize_per_epoch`
+does not cache at all.
+"""
+import functools
+
+import maya.OpenMaya as OpenMaya
+
+from jukeboxcore.log import get_logger
+log = get_logger(__name__)
+
+
+class SceneEpoch(object):
+    """Service that registers the callbacks and counts the epoch
+
+    .. Important:: Use SceneEpoch.get() to obtain the service!
+    """
+
+    sceneepoch = None
+    """SceneEpoch instance when using SceneEpoch.get()"""
+
+    scenemessages = ['kAfterOpen', 'kAfterNew', 'kAfterImport',
+                     'kAfterCreateReference', 'kAfterReference', 'kAfterRemoveReference',
+                     'kAfterLoadReference', 'kAfterUnloadReference', 'kAfterImportReference']
+    """The :class:`OpenMaya.MSceneMessage` messages that increase the epoch"""
+
+    newscenemessages = ['kAfterOpen', 'kAfterNew']
+    """The :class:`OpenMaya.MSceneMessage` messages that increase the scene counter"""
+
+    eventmessages = ['Undo', 'Redo']
+    """The :class:`OpenMaya.MEventMessage` events that increase the epoch"""
+
+    nodetypes = ['jb_reftrack', 'jb_sceneNode', 'reference']
+    """The node types that increase the epoch when they get added or removed"""
+
+    def __init__(self, ):
+        """Initialize a new scene epoch service
+
+        :raises: None
+        """
+        self.epoch = 0
+        self.scene = 0
+        self.callbackids = []
+
+    @classmethod
+    def get(cls):
+        """Return a SceneEpoch instance.
+
+        This will always return the same instance. If the instance is not available
+        it will be created and returned.
+
+        :returns: always the same SceneEpoch
+        :rtype: SceneEpoch
+        :raises: None
+        """
+        if not cls.sceneepoch:
+            cls.sceneepoch = cls()
+        return cls.sceneepoch
+
+    def is_installed(self, ):
+        """Return True, if the callbacks are registered
+
+        :returns: True, if installed
+        :rtype: bool
+        :raises: None
+        """
+        return bool(self.callbackids)
+
+    def install(self, ):
+        """Register the callbacks. Does nothing if they are already installed.
+
+        The node types in :data:`SceneEpoch.nodetypes` have to be registered before.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        if self.is_installed():
+            return
+        for msg in self.scenemessages:
+            self.callbackids.append(OpenMaya.MSceneMessage.addCallback(getattr(OpenMaya.MSceneMessage, msg), self.bump))
+        for msg in self.newscenemessages:
+            self.callbackids.append(OpenMaya.MSceneMessage.addCallback(getattr(OpenMaya.MSceneMessage, msg), self.new_scene))
+        for event in self.eventmessages:
+            self.callbackids.append(OpenMaya.MEventMessage.addEventCallback(event, self.bump))
+        for typ in self.nodetypes:
+            self.callbackids.append(OpenMaya.MDGMessage.addNodeAddedCallback(self.bump, typ))
+            self.callbackids.append(OpenMaya.MDGMessage.addNodeRemovedCallback(self.bump, typ))
+        self.bump()
+        log.debug("Installed %s scene epoch callbacks.", len(self.callbackids))
+
+    def uninstall(self, ):
+        """Remove the callbacks.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        for cbid in self.callbackids:
+            OpenMaya.MMessage.removeCallback(cbid)
+        self.callbackids = []
+
+    def bump(self, *args):
+        """Increase the epoch
+
+        Accepts any arguments, so it can be used as callback directly.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self.epoch += 1
+
+    def new_scene(self, *args):
+        """Increase the scene counter
+
+        Accepts any arguments, so it can be used as callback directly.
+
+        :returns: None
+        :rtype: None
+        :raises: None
+        """
+        self.scene += 1
+
+    def current_scene(self, ):
+        """Return the scene counter or None if the callbacks are not installed
+
+        :returns: the scene counter
+        :rtype: int | None
+        :raises: None
+        """
+        if not self.is_installed():
+            return None
+        return self.scene
+
+    def current(self, ):
+        """Return the current epoch or None if the callbacks are not installed
+
+        :returns: the current epoch
+        :rtype: int | None
+        :raises: None
+        """
+        if not self.is_installed():
+            return None
+        return self.epoch
+
+
+def get_epoch():
+    """Return the current scene epoch or None, if the callbacks are not installed
+
+    :returns: the current epoch
+    :rtype: int | None
+    :raises: None
+    """
+    return SceneEpoch.get().current()
+
+
+def get_scene():
+    """Return a counter, that changes whenever a new scene is opened or created,
+    or None, if the callbacks are not installed
+
+    :returns: the scene counter
+    :rtype: int | None
+    :raises: None
+    """
+    return SceneEpoch.get().current_scene()
+
+
+def bump():
+    """Increase the scene epoch, so all caches are invalid
+
+    :returns: None
+    :rtype: None
+    :raises: None
+    """
+    SceneEpoch.get().bump()
+
+
+def memoize_per_epoch(func):
+    """Decorator that caches the return values of func for the current scene epoch.
+
+    The arguments of func have to be hashable. The cache is cleared whenever the epoch changes.
+    If the callbacks are not installed, func is always called.
+    The decorated function has a ``cache_clear`` attribute to clear the cache manually.
+
+    :param func: the function to decorate
+    :type func: callable
+    :returns: the decorated function
+    :rtype: callable
+    :raises: None
+    """
+    cache = {}
+    state = {'epoch': None}
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        epoch = get_epoch()
+        if epoch is None:
+            return func(*args)
+        if state['epoch'] != epoch:
+            cache.clear()
+            state['epoch'] = epoch
+        try:
+            return cache[args]
+        except KeyError:
+            r = cache[args] = func(*args)
+            return r
+    wrapper.cache_clear = cache.clear
+    return wrapper
@@ -3,6 +3,7 @@ import os
 import pytest
 import maya.cmds as cmds
 
+from jukeboxcore.filesys import TaskFileInfo, JB_File
 from jukeboxmaya.reftrack import refobjinter
 from jukeboxmaya.reftrack import asset
 
@@ -13,9 +14,16 @@ def mrefobjinter():
     return refobjinter.MayaRefobjInterface()
 
 
+@pytest.fixture(scope="function")
+def mapirefobjinter():
+    "Return a fresh MayaApiRefobjInterface"
+    return refobjinter.MayaApiRefobjInterface()
+
+
 @pytest.fixture(scope="function")
 def assettypinter(mrefobjinter):
     "Return a fresh AssetReftypeInterface"
+    asset.AssetReftypeInterface.invalidate_options()
     return asset.AssetReftypeInterface(mrefobjinter)
 
 
@@ -67,3 +75,26 @@ def ref_file_with_reftrack(file_with_reftrack):
     cmds.file(new=True, force=True)
     reffile = cmds.file(file_with_reftrack, reference=True, namespace="ref1")
     return cmds.referenceQuery(reffile, referenceNode=True)  # get reference node
+
+
+@pytest.fixture(scope="function")
+def taskfile_with_dagnodes(request, djprj, mrefobjinter):
+    cmds.file(new=True, force=True)
+    """Create a scene with a scenenode for djprj.assettaskfiles[0] and
+    a dag transform node "testdagnode".
+    """
+    cmds.createNode("transform", name="testdagnode")
+    tf = djprj.assettaskfiles[0]
+    scenenode = cmds.createNode("jb_sceneNode")
+    cmds.setAttr("%s.taskfile_id" % scenenode, tf.pk)
+    tfi = TaskFileInfo.create_from_taskfile(tf)
+    jb = JB_File(tfi)
+    jb.create_directory()
+    f = cmds.file(rename=jb.get_fullpath())
+    cmds.file(save=True, type='mayaBinary')
+
+    def fin():
+        os.remove(f)
+
+    request.addfinalizer(fin)
+    return f
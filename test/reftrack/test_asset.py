@@ -1,9 +1,13 @@
 import os
+import time
+from collections import OrderedDict
 
 import pytest
 import maya.cmds as cmds
 
 from jukeboxcore.filesys import TaskFileInfo, JB_File
+from jukeboxcore.reftrack import Reftrack
+from jukeboxmaya import reftrack
 
 
 @pytest.mark.parametrize("refobj", [("a", "b", "c", "d", None, "asdf")])
@@ -12,29 +16,6 @@ def test_is_replaceable(refobj, assettypinter):
     assert assettypinter.is_replaceable(refobj) is True
 
 
-@pytest.fixture(scope="function")
-def taskfile_with_dagnodes(request, djprj, mrefobjinter):
-    cmds.file(new=True, force=True)
-    """Create a scene with a scenenode for djprj.assettaskfiles[0] and
-    a dag transform node "testdagnode".
-    """
-    cmds.createNode("transform", name="testdagnode")
-    tf = djprj.assettaskfiles[0]
-    scenenode = cmds.createNode("jb_sceneNode")
-    cmds.setAttr("%s.taskfile_id" % scenenode, tf.pk)
-    tfi = TaskFileInfo.create_from_taskfile(tf)
-    jb = JB_File(tfi)
-    jb.create_directory()
-    f = cmds.file(rename=jb.get_fullpath())
-    cmds.file(save=True, type='mayaBinary')
-
-    def fin():
-        os.remove(f)
-
-    request.addfinalizer(fin)
-    return f
-
-
 @pytest.fixture(scope="function")
 def taskfile_with_dagnodes2(request, djprj, mrefobjinter):
     cmds.file(new=True, force=True)
@@ -311,3 +292,210 @@ def test_delete(taskfile_with_dagnodes, djprj, assettypinter, mrefobjinter):
 
     assert cmds.namespace(exists=ns) is False
     assert cmds.objExists(refobj)
+
+
+def test_get_namespace_content(new_scene):
+    cmds.namespace(add="foo")
+    cmds.namespace(add="bar", parent="foo")
+    cmds.namespace(set="foo")
+    sn = cmds.createNode("jb_sceneNode")
+    t1 = cmds.createNode("transform", name="t1")
+    cmds.createNode("transform", name="t2", parent=t1)
+    cmds.namespace(set="bar")
+    cmds.createNode("jb_sceneNode")
+    t3 = cmds.createNode("transform", name="t3")
+    cmds.namespace(set=":")
+    content = reftrack.get_namespace_content("foo")
+    assert content.namespace == ":foo"
+    assert content.scenenodes == [sn]
+    assert sorted(content.assemblies) == sorted(cmds.ls([t1, t3], long=True))
+    assert sorted(content.nodes) == sorted(cmds.namespaceInfo(":foo", listOnlyDependencyNodes=True, dagPath=True, recurse=True))
+
+
+def test_reference_many(taskfile_with_dagnodes, taskfile_with_dagnodes2, djprj, assettypinter, mrefobjinter):
+    cmds.file(new=True, force=True)
+    tfis = [TaskFileInfo.create_from_taskfile(tf) for tf in djprj.assettaskfiles[:2]]
+    refobjs = mrefobjinter.create_many([("Asset", i, None) for i in range(2)])
+    results = assettypinter.reference_many(zip(refobjs, tfis))
+    assert len(results) == 2
+    for refobj, tf, (refnode, duration) in zip(refobjs, djprj.assettaskfiles[:2], results):
+        assert duration >= 0
+        assert mrefobjinter.get_reference(refobj) == refnode
+        assert cmds.getAttr("%s.taskfile_id" % refobj) == tf.pk
+        ns = cmds.referenceQuery(refnode, namespace=True)
+        assert cmds.ls("%s:*" % ns, type="jb_asset")
+
+
+def test_reference_deferred(taskfile_with_dagnodes, djprj, assettypinter, mrefobjinter):
+    cmds.file(new=True, force=True)
+    tf = djprj.assettaskfiles[0]
+    tfi = TaskFileInfo.create_from_taskfile(tf)
+    refobj = mrefobjinter.create(typ="Asset", identifier=0)
+    refnode = assettypinter.reference(refobj, tfi, deferred=True)
+    mrefobjinter.set_reference(refobj, refnode)
+    assert cmds.referenceQuery(refnode, isLoaded=True) is False
+    assert cmds.getAttr("%s.taskfile_id" % refobj) == tf.pk
+    assert mrefobjinter.get_status(refobj) == Reftrack.UNLOADED
+    assert not cmds.listConnections("%s.scenenode" % refobj)
+
+    assettypinter.load(refobj, refnode)
+    assert mrefobjinter.get_status(refobj) == Reftrack.LOADED
+    assert cmds.listConnections("%s.scenenode" % refobj)
+    ns = cmds.referenceQuery(refnode, namespace=True)
+    assert cmds.listRelatives("%s:testdagnode" % ns, parent=True, type="jb_asset")
+
+
+def test_reference_deferred_load_external(taskfile_with_dagnodes, djprj, assettypinter, mrefobjinter):
+    cmds.file(new=True, force=True)
+    tfi = TaskFileInfo.create_from_taskfile(djprj.assettaskfiles[0])
+    refobj = mrefobjinter.create(typ="Asset", identifier=0)
+    refnode = assettypinter.reference(refobj, tfi, deferred=True)
+    mrefobjinter.set_reference(refobj, refnode)
+    # load the reference like the Reference Editor does
+    cmds.file(loadReference=refnode)
+    assert cmds.listConnections("%s.scenenode" % refobj)
+    ns = cmds.referenceQuery(refnode, namespace=True)
+    assert cmds.listRelatives("%s:testdagnode" % ns, parent=True, type="jb_asset")
+
+
+def test_fetch_option_taskfileinfos(djprj, assettypinter):
+    element = djprj.assets[0]
+    tfis = assettypinter.fetch_option_taskfileinfos(element)
+    expected = []
+    for task in element.tasks.all():
+        expected.extend(task.taskfile_set.filter(releasetype='release', typ='mayamainscene'))
+    assert sorted((t.task.pk, t.version) for t in tfis) == sorted((t.task.pk, t.version) for t in expected)
+    assert assettypinter.fetch_option_taskfileinfos(element) == tfis
+    assert assettypinter.fetch_option_taskfileinfos(element) is not tfis
+    assettypinter.invalidate_options(element)
+    assert (type(element), element.pk) not in assettypinter._options
+
+
+def test_create_options_model(djprj, assettypinter):
+    element = djprj.assets[0]
+    tfis = assettypinter.fetch_option_taskfileinfos(element)
+    model = assettypinter.create_options_model(tfis)
+    root = model.index(0, 0).internalPointer().parent()
+    tasks = [root.child(i) for i in range(root.child_count())]
+    assert [t.internal_data() for t in tasks] == list(OrderedDict((tfi.task, None) for tfi in tfis))
+    for taskitem in tasks:
+        assert not taskitem.is_populated()
+    taskindex = model.index(0, 0)
+    assert model.hasChildren(taskindex)
+    assert model.canFetchMore(taskindex)
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((parent.internalPointer(), first, last)))
+    model.fetchMore(taskindex)
+    assert tasks[0].is_populated()
+    assert not model.canFetchMore(taskindex)
+    versions = [tasks[0].child(i).internal_data() for i in range(tasks[0].child_count())]
+    assert inserted == [(tasks[0], 0, len(versions) - 1)]
+    assert versions == [tfi for tfi in tfis if tfi.task == tasks[0].internal_data()]
+    assert [v.version for v in versions] == sorted((v.version for v in versions), reverse=True)
+    assert model.rowCount(model.index(1, 0)) == 0
+    assert not tasks[1].is_populated()
+    assert model.canFetchMore(model.index(1, 0))
+
+
+def test_delete_many(taskfile_with_dagnodes, taskfile_with_dagnodes2, djprj, assettypinter, mrefobjinter):
+    cmds.file(new=True, force=True)
+    tfis = [TaskFileInfo.create_from_taskfile(tf) for tf in djprj.assettaskfiles[:2]]
+    refobjs = mrefobjinter.create_many([("Asset", i, None) for i in range(3)])
+    results = assettypinter.reference_many(zip(refobjs[:2], tfis))
+    namespaces = [cmds.referenceQuery(node, namespace=True) for node, duration in results]
+    assettypinter.import_taskfile(refobjs[2], tfis[0])
+    namespaces.append(cmds.getAttr("%s.namespace" % refobjs[2]))
+
+    timings = assettypinter.delete_many(refobjs)
+
+    assert set(timings) == set(["references", "namespaces", "total"])
+    assert timings["total"] >= timings["references"] + timings["namespaces"]
+    for ns in namespaces:
+        assert cmds.namespace(exists=ns) is False
+    for refobj in refobjs:
+        assert cmds.objExists(refobj)
+
+
+def test_select_namespace(new_scene):
+    cmds.namespace(add="foo")
+    cmds.namespace(add="bar", parent="foo")
+    cmds.namespace(set="foo")
+    sn = cmds.createNode("jb_sceneNode")
+    t1 = cmds.createNode("transform", name="t1")
+    t2 = cmds.createNode("transform", name="t2", parent=t1)
+    cmds.namespace(set="bar")
+    t3 = cmds.createNode("transform", name="t3")
+    cmds.namespace(set=":")
+    cmds.createNode("transform", name="other")
+
+    reftrack.select_namespace("foo")
+    assert sorted(cmds.ls(sl=True, long=True)) == sorted(cmds.ls([sn, t1, t2, t3], long=True))
+    reftrack.select_namespace("foo", dag=True)
+    assert sorted(cmds.ls(sl=True, long=True)) == sorted(cmds.ls([t1, t2, t3], long=True))
+    reftrack.select_namespace(":foo:", dag=True, assemblies=True)
+    assert sorted(cmds.ls(sl=True, long=True)) == sorted(cmds.ls([t1, t3], long=True))
+    cmds.undo()
+    assert sorted(cmds.ls(sl=True, long=True)) == sorted(cmds.ls([t1, t2, t3], long=True))
+
+
+def test_select_namespace_many(new_scene):
+    cmds.namespace(add="foo")
+    cmds.namespace(set="foo")
+    for i in range(10):
+        grp = cmds.createNode("transform")
+        for j in range(5):
+            cmds.createNode("transform", parent=grp)
+    cmds.namespace(set=":")
+
+    c = cmds.namespaceInfo(":foo", listOnlyDependencyNodes=True, dagPath=True, recurse=True)
+    cmds.select(cmds.ls(c, dag=True, ap=True), replace=True)
+    cmdssel = sorted(cmds.ls(sl=True, long=True))
+    assert len(cmdssel) == 60
+
+    cmds.select(clear=True)
+    reftrack.select_namespace(":foo", dag=True)
+    assert sorted(cmds.ls(sl=True, long=True)) == cmdssel
+
+
+@pytest.mark.skipif("JUKEBOX_BENCHMARK" not in os.environ, reason="Set JUKEBOX_BENCHMARK to run benchmarks.")
+def test_select_namespace_benchmark(new_scene):
+    cmds.namespace(add="foo")
+    cmds.namespace(set="foo")
+    for i in range(500):
+        grp = cmds.createNode("transform")
+        for j in range(20):
+            cmds.createNode("transform", parent=grp)
+    cmds.namespace(set=":")
+
+    start = time.time()
+    c = cmds.namespaceInfo(":foo", listOnlyDependencyNodes=True, dagPath=True, recurse=True)
+    cmds.select(cmds.ls(c, dag=True, ap=True), replace=True)
+    cmdsduration = time.time() - start
+    cmdssel = sorted(cmds.ls(sl=True, long=True))
+
+    cmds.select(clear=True)
+    start = time.time()
+    reftrack.select_namespace(":foo", dag=True)
+    apiduration = time.time() - start
+    print "cmds: %.3fs, api: %.3fs for %s nodes" % (cmdsduration, apiduration, len(cmdssel))
+    assert sorted(cmds.ls(sl=True, long=True)) == cmdssel
+
+
+def test_get_scene_suggestions(djprj, assettypinter):
+    shot = djprj.shots[0]
+    suggestions = assettypinter.get_scene_suggestions(shot)
+    assert sorted(a.pk for a in suggestions) == sorted(a.pk for a in shot.assets.all())
+    assert (assettypinter.suggestion_hits, assettypinter.suggestion_misses) == (0, 1)
+    assert assettypinter.get_scene_suggestions(shot) == suggestions
+    assert (assettypinter.suggestion_hits, assettypinter.suggestion_misses) == (1, 1)
+
+    asset = djprj.assets[0]
+    suggestions = assettypinter.get_scene_suggestions(asset)
+    assert suggestions[0] == asset
+    assert (assettypinter.suggestion_hits, assettypinter.suggestion_misses) == (1, 2)
+    assettypinter.get_scene_suggestions(shot)
+    assert (assettypinter.suggestion_hits, assettypinter.suggestion_misses) == (1, 3)
+
+    assettypinter.invalidate_suggestions()
+    assettypinter.get_scene_suggestions(shot)
+    assert (assettypinter.suggestion_hits, assettypinter.suggestion_misses) == (1, 4)
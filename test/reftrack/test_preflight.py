@@ -0,0 +1,48 @@
+import hashlib
+
+import maya.cmds as cmds
+
+from jukeboxcore.filesys import TaskFileInfo, JB_File
+from jukeboxmaya.reftrack import preflight
+
+
+def test_preflight(new_scene, djprj, mrefobjinter):
+    tfs = djprj.assettaskfiles[:2]
+    jb = JB_File(TaskFileInfo.create_from_taskfile(tfs[0]))
+    jb.create_directory()
+    with open(jb.get_fullpath(), 'w') as f:
+        f.write("test")
+    for tf in tfs:
+        refobj = cmds.createNode("jb_reftrack")
+        cmds.setAttr("%s.taskfile_id" % refobj, tf.pk)
+    refobj = cmds.createNode("jb_reftrack")
+    cmds.setAttr("%s.taskfile_id" % refobj, -123)
+    report = preflight.preflight(mrefobjinter, slow=1000)
+    assert len(report.checks) == 2
+    assert [r for r, err in report.errors] == [refobj]
+    assert [c.taskfile for c in report.missing()] == [tfs[1]]
+    ok = [c for c in report.checks if c.exists][0]
+    assert ok.size == 4
+    # there is a release with version 3 for both
+    assert len(report.stale()) == 2
+    assert report.slowfiles() == []
+    assert report.ok() is False
+
+
+def test_preflight_checksum(new_scene, djprj, mrefobjinter):
+    tf = djprj.assettaskfiles[0]
+    jb = JB_File(TaskFileInfo.create_from_taskfile(tf))
+    jb.create_directory()
+    with open(jb.get_fullpath(), 'w') as f:
+        f.write("test")
+    refobj = cmds.createNode("jb_reftrack")
+    cmds.setAttr("%s.taskfile_id" % refobj, tf.pk)
+    report = preflight.preflight(mrefobjinter, slow=1000)
+    assert report.checks[0].checksum is None
+    assert report.checks[0].readduration is None
+    report = preflight.preflight(mrefobjinter, checksum=True, slow=0)
+    check = report.checks[0]
+    assert check.checksum == hashlib.md5("test").hexdigest()
+    assert 0 <= check.readduration <= check.duration
+    assert report.slowfiles() == [check]
+    assert "to read 4 bytes" in str(report)
@@ -1,10 +1,12 @@
 import os
+import time
 
 import pytest
 import maya.cmds as cmds
 
 from jukeboxcore import djadapter
 from jukeboxcore.reftrack import Reftrack
+from jukeboxmaya import sceneepoch
 from jukeboxmaya.reftrack import refobjinter
 
 
@@ -166,3 +168,180 @@ def test_get_taskfile_unconnected(index, new_scene, djprj, mrefobjinter):
     refobj = cmds.createNode("jb_reftrack")
     cmds.setAttr("%s.taskfile_id" % refobj, tf.pk)
     mrefobjinter.get_taskfile(refobj)
+
+
+def test_snapshot(ref_file_with_reftrack, mrefobjinter):
+    n = cmds.createNode("jb_reftrack", name="jb_reftrack1")
+    cmds.setAttr("%s.identifier" % n, 3)
+    mrefobjinter.set_reference(n, ref_file_with_reftrack)
+    mrefobjinter.set_parent("ref1:jb_reftrack1", n)
+    allnodes = mrefobjinter.get_all_refobjs()
+    expected = [(mrefobjinter.get_parent(x), mrefobjinter.get_children(x), mrefobjinter.get_typ(x),
+                 mrefobjinter.get_id(x), mrefobjinter.get_reference(x), mrefobjinter.get_status(x))
+                for x in allnodes]
+    snapshot = mrefobjinter.snapshot()
+    assert len(snapshot) == len(allnodes)
+    for x, e in zip(allnodes, expected):
+        assert x in snapshot
+        assert (mrefobjinter.get_parent(x), mrefobjinter.get_children(x), mrefobjinter.get_typ(x),
+                mrefobjinter.get_id(x), mrefobjinter.get_reference(x), mrefobjinter.get_status(x)) == e
+
+
+def test_snapshot_invalidate(reftrack_nodes, mrefobjinter):
+    mrefobjinter.snapshot()
+    assert mrefobjinter.get_snapshot_entry(reftrack_nodes[0]) is not None
+    mrefobjinter.set_id(reftrack_nodes[0], 5)
+    assert mrefobjinter.get_snapshot_entry(reftrack_nodes[0]) is None
+    assert mrefobjinter.get_id(reftrack_nodes[0]) == 5
+
+
+def test_get_refobjinterface():
+    assert refobjinter.get_refobjinterface("cmds") is refobjinter.MayaRefobjInterface
+    assert refobjinter.get_refobjinterface("api") is refobjinter.MayaApiRefobjInterface
+    with pytest.raises(ValueError):
+        refobjinter.get_refobjinterface("asdf")
+
+
+def test_api_refobjinter(ref_file_with_reftrack, mrefobjinter, mapirefobjinter):
+    n = cmds.createNode("jb_reftrack", name="jb_reftrack1")
+    mrefobjinter.set_reference(n, ref_file_with_reftrack)
+    mrefobjinter.set_parent("ref1:jb_reftrack1", n)
+    assert mapirefobjinter.exists(n) is True
+    assert mapirefobjinter.exists("asdfasdf") is False
+    for x in mrefobjinter.get_all_refobjs():
+        for m in ("get_parent", "get_children", "get_typ", "get_id", "get_reference", "get_status"):
+            assert getattr(mapirefobjinter, m)(x) == getattr(mrefobjinter, m)(x)
+    cmds.file(unloadReference=ref_file_with_reftrack)
+    assert mapirefobjinter.get_status(n) == Reftrack.UNLOADED
+
+
+def test_api_refobjinter_hierarchy(new_scene, mrefobjinter, mapirefobjinter):
+    parent = None
+    for i in range(30):
+        n = cmds.createNode("jb_reftrack")
+        cmds.setAttr("%s.identifier" % n, i)
+        if i % 10:
+            cmds.connectAttr("%s.parent" % n, "%s.children" % parent, nextAvailable=True)
+        else:
+            parent = n
+    nodes = mrefobjinter.get_all_refobjs()
+    results = {}
+    for inter in (mrefobjinter, mapirefobjinter):
+        results[inter] = [(inter.get_parent(n), inter.get_children(n), inter.get_typ(n), inter.get_id(n),
+                           inter.get_status(n)) for n in nodes]
+    assert results[mrefobjinter] == results[mapirefobjinter]
+
+
+@pytest.mark.skipif("JUKEBOX_BENCHMARK" not in os.environ, reason="Set JUKEBOX_BENCHMARK to run benchmarks.")
+def test_api_refobjinter_benchmark(new_scene, mrefobjinter, mapirefobjinter):
+    parent = None
+    for i in range(2000):
+        n = cmds.createNode("jb_reftrack")
+        cmds.setAttr("%s.identifier" % n, i)
+        if i % 10:
+            cmds.connectAttr("%s.parent" % n, "%s.children" % parent, nextAvailable=True)
+        else:
+            parent = n
+    nodes = mrefobjinter.get_all_refobjs()
+    results = {}
+    for inter in (mrefobjinter, mapirefobjinter):
+        start = time.time()
+        results[inter] = [(inter.get_parent(n), inter.get_children(n), inter.get_typ(n), inter.get_id(n),
+                           inter.get_status(n)) for n in nodes]
+        print "%s: %.3fs for %s reftracks" % (type(inter).__name__, time.time() - start, len(nodes))
+    assert results[mrefobjinter] == results[mapirefobjinter]
+
+
+def test_get_statuses(ref_file_with_reftrack, mrefobjinter):
+    n = cmds.createNode("jb_reftrack", name="jb_reftrack1")
+    n2 = cmds.createNode("jb_reftrack", name="jb_reftrack2")
+    mrefobjinter.set_reference(n, ref_file_with_reftrack)
+    assert mrefobjinter.get_statuses([n, n2]) == [Reftrack.LOADED, Reftrack.IMPORTED]
+    assert mrefobjinter.get_statuses([]) == []
+    cmds.file(unloadReference=ref_file_with_reftrack)
+    assert mrefobjinter.get_statuses([n, n2]) == [Reftrack.UNLOADED, Reftrack.IMPORTED]
+    assert mrefobjinter.get_status(n) == Reftrack.UNLOADED
+    cmds.file(loadReference=ref_file_with_reftrack)
+    assert mrefobjinter.get_status(n) == Reftrack.LOADED
+
+
+def test_get_status_lazy(ref_file_with_reftrack, mrefobjinter):
+    n = cmds.createNode("jb_reftrack", name="jb_reftrack1")
+    n2 = cmds.createNode("jb_reftrack", name="jb_reftrack2")
+    mrefobjinter.set_reference(n, ref_file_with_reftrack)
+    assert mrefobjinter.get_status(n) == Reftrack.LOADED
+    assert mrefobjinter._statuses == {n: Reftrack.LOADED}
+    assert mrefobjinter.get_status(n2) == Reftrack.IMPORTED
+    mrefobjinter.invalidate_snapshot()
+    assert mrefobjinter.get_status(n2) == Reftrack.IMPORTED
+    assert mrefobjinter._statuses == {n2: Reftrack.IMPORTED}
+
+
+def test_is_referenced(ref_file_with_reftrack, mrefobjinter):
+    n = cmds.createNode("jb_reftrack", name="jb_reftrack1")
+    assert mrefobjinter.is_referenced(n) is False
+    assert mrefobjinter.is_referenced("ref1:jb_reftrack1") is True
+    assert mrefobjinter.get_referenced_refobjs() == set(["ref1:jb_reftrack1", "ref1:jb_reftrack2", "ref1:jb_reftrack3"])
+    n2 = cmds.createNode("jb_reftrack", name="jb_reftrack2")
+    assert mrefobjinter.is_referenced(n2) is False
+
+
+def test_create_refobjs(new_scene, mrefobjinter):
+    nodes = mrefobjinter.create_refobjs(10)
+    assert len(nodes) == 10
+    assert len(set(nodes)) == 10
+    for n in nodes:
+        assert cmds.objExists(n)
+        assert cmds.lockNode(n, q=True) == [True]
+    assert mrefobjinter.create_refobjs(0) == []
+    cmds.undo()
+    for n in nodes:
+        assert not cmds.objExists(n)
+
+
+
+def test_create_many(new_scene, mrefobjinter):
+    parent = mrefobjinter.create(typ="Asset", identifier=0)
+    nodes = mrefobjinter.create_many([("Asset", 1, parent), ("Asset", 2, None)])
+    assert len(nodes) == 2
+    assert [mrefobjinter.get_id(n) for n in nodes] == [1, 2]
+    assert [mrefobjinter.get_typ(n) for n in nodes] == ["Asset", "Asset"]
+    assert [mrefobjinter.get_parent(n) for n in nodes] == [parent, None]
+    assert cmds.lockNode(nodes, q=True) == [True, True]
+    with pytest.raises(ValueError):
+        mrefobjinter.create_many([("Nope", 0, None)])
+    cmds.undo()
+    for n in nodes:
+        assert not cmds.objExists(n)
+    assert cmds.objExists(parent)
+
+def test_get_hierarchy(parent_reftrack, mrefobjinter):
+    h = mrefobjinter.get_hierarchy()
+    assert [h.get_depth(n) for n in parent_reftrack] == [0, 1, 2]
+    assert h.get_descendants(parent_reftrack[0]) == parent_reftrack[1:]
+    assert h.children_first(parent_reftrack) == list(reversed(parent_reftrack))
+
+
+def test_delete_refobjs(parent_reftrack, mrefobjinter):
+    mrefobjinter.delete_refobjs([parent_reftrack[0]], recursive=True)
+    for n in parent_reftrack:
+        assert cmds.objExists(n) is False
+    cmds.undo()
+    for n in parent_reftrack:
+        assert cmds.objExists(n) is True
+    mrefobjinter.delete_refobjs(parent_reftrack[1:])
+    assert cmds.objExists(parent_reftrack[0]) is True
+    assert cmds.objExists(parent_reftrack[1]) is False
+    assert cmds.objExists(parent_reftrack[2]) is False
+
+
+def test_connections_bump_epoch(new_scene, mrefobjinter):
+    n1 = mrefobjinter.create_refobj()
+    n2 = mrefobjinter.create_refobj()
+    sn = cmds.createNode("jb_sceneNode")
+    epoch = sceneepoch.get_epoch()
+    mrefobjinter.set_parent(n1, n2)
+    assert sceneepoch.get_epoch() > epoch
+    epoch = sceneepoch.get_epoch()
+    mrefobjinter.connect_reftrack_scenenode(n1, sn)
+    assert sceneepoch.get_epoch() > epoch
@@ -0,0 +1,61 @@
+import pytest
+import maya.cmds as cmds
+
+from jukeboxcore.filesys import TaskFileInfo
+from jukeboxcore.reftrack import Reftrack, ReftrackRoot
+from jukeboxmaya.addons.reftracker.reftracker import SceneUpdater
+
+
+@pytest.fixture(scope="function")
+def wrapped_asset(taskfile_with_dagnodes, djprj, assettypinter, mrefobjinter):
+    """Reference djprj.assettaskfiles[0] and wrap the scene.
+    Return the root and the reftrack node."""
+    cmds.file(new=True, force=True)
+    tfi = TaskFileInfo.create_from_taskfile(djprj.assettaskfiles[0])
+    refobj = mrefobjinter.create(typ="Asset", identifier=0)
+    assettypinter.reference(refobj, tfi)
+    root = ReftrackRoot()
+    Reftrack.wrap(root, mrefobjinter, mrefobjinter.get_all_refobjs())
+    return root, refobj
+
+
+def test_update_new_scene(wrapped_asset, mrefobjinter):
+    root, refobj = wrapped_asset
+    updater = SceneUpdater(root, mrefobjinter)
+    assert updater.update() is True
+    cmds.file(new=True, force=True)
+    refobj2 = mrefobjinter.create(typ="Asset", identifier=0)
+    assert refobj2 == refobj
+    assert updater.update() is False
+
+
+def test_update_status(wrapped_asset, taskfile_with_dagnodes, mrefobjinter):
+    root, refobj = wrapped_asset
+    updater = SceneUpdater(root, mrefobjinter)
+    refnode = cmds.referenceQuery(taskfile_with_dagnodes, referenceNode=True)
+    cmds.file(unloadReference=refnode)
+    assert updater.update() is True
+    assert root.get_reftrack(refobj).status() == Reftrack.UNLOADED
+    cmds.file(loadReference=refnode)
+    assert updater.update() is True
+    assert root.get_reftrack(refobj).status() == Reftrack.LOADED
+
+
+def test_update_new_refobj(wrapped_asset, djprj, assettypinter, mrefobjinter):
+    root, refobj = wrapped_asset
+    updater = SceneUpdater(root, mrefobjinter)
+    refobj2 = mrefobjinter.create(typ="Asset", identifier=1)
+    assettypinter.reference(refobj2, TaskFileInfo.create_from_taskfile(djprj.assettaskfiles[0]))
+    assert not updater.is_wrapped(refobj2)
+    assert updater.update() is True
+    assert updater.is_wrapped(refobj2)
+    assert updater.is_wrapped(refobj)
+
+
+def test_add(wrapped_asset, mrefobjinter):
+    root, refobj = wrapped_asset
+    updater = SceneUpdater(root, mrefobjinter)
+    nodes = updater.add([("Asset", 1, None), ("Asset", 2, refobj)])
+    assert all(updater.is_wrapped(n) for n in nodes)
+    assert mrefobjinter.get_parent(nodes[1]) == refobj
+    assert updater.update() is True
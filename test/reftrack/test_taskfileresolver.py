@@ -0,0 +1,54 @@
+import pytest
+
+from jukeboxcore import djadapter
+from jukeboxmaya.reftrack.taskfileresolver import TaskfileResolver
+
+
+def test_prefetch(djprj):
+    r = TaskfileResolver()
+    tfs = djprj.assettaskfiles[:5]
+    r.prefetch([tf.pk for tf in tfs] + [-123])
+    for tf in tfs:
+        assert tf.pk in r
+        assert r.get_taskfile(tf.pk) == tf
+    assert -123 in r
+    with pytest.raises(djadapter.models.TaskFile.DoesNotExist):
+        r.get_taskfile(-123)
+
+
+def test_lru(djprj):
+    r = TaskfileResolver(maxsize=2)
+    tfs = djprj.assettaskfiles[:3]
+    r.get_taskfile(tfs[0].pk)
+    r.get_taskfile(tfs[1].pk)
+    r.get_taskfile(tfs[0].pk)
+    r.get_taskfile(tfs[2].pk)
+    assert tfs[0].pk in r
+    assert tfs[1].pk not in r
+    assert tfs[2].pk in r
+
+
+def test_invalidate(djprj):
+    r = TaskfileResolver()
+    tfs = djprj.assettaskfiles[:2]
+    r.prefetch([tf.pk for tf in tfs] + [-123])
+    r.invalidate([tfs[0].pk])
+    assert tfs[0].pk not in r
+    assert tfs[1].pk in r
+    r.invalidate()
+    assert tfs[1].pk not in r
+    assert -123 not in r
+
+
+def test_missing_lru(djprj):
+    r = TaskfileResolver(maxsize=2)
+    tf = djprj.assettaskfiles[0]
+    r.prefetch([-1])
+    r.prefetch([-2])
+    r.get_taskfile(tf.pk)
+    assert -1 not in r
+    assert -2 in r
+    assert tf.pk in r
+    r.invalidate_missing()
+    assert -2 not in r
+    assert tf.pk in r
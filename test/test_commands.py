@@ -0,0 +1,46 @@
+import maya.cmds as cmds
+
+from jukeboxcore.filesys import TaskFileInfo, JB_File
+from jukeboxmaya import commands
+from jukeboxmaya.reftrack.asset import AssetReftypeInterface
+
+
+def test_import_all_references(new_scene, tmpdir):
+    inner = str(tmpdir.join("inner.ma"))
+    outer = str(tmpdir.join("outer.ma"))
+    cmds.createNode("transform", name="innernode")
+    cmds.file(rename=inner)
+    cmds.file(save=True, type="mayaAscii")
+    cmds.file(new=True, force=True)
+    cmds.file(inner, reference=True, namespace="inner")
+    cmds.file(rename=outer)
+    cmds.file(save=True, type="mayaAscii")
+    cmds.file(new=True, force=True)
+    cmds.file(outer, reference=True, namespace="outer")
+    cmds.file(outer, reference=True, namespace="outer2")
+
+    levels = commands.get_reference_levels()
+    assert [len(level) for level in levels] == [2, 2]
+
+    status = commands.import_all_references(None)
+    assert [rfile.startswith(outer) for rfile in status.returnvalue] == [True, True, False, False]
+    assert not cmds.file(query=True, reference=True)
+    assert cmds.ls("outer:inner:innernode")
+
+
+def test_update_scenenode_invalidates_options(new_scene, djprj):
+    tf = djprj.assettaskfiles[0]
+    key = (type(tf.task.element), tf.task.element.pk)
+    AssetReftypeInterface._options[key] = []
+    cmds.createNode("jb_sceneNode")
+    commands.update_scenenode(JB_File(TaskFileInfo.create_from_taskfile(tf)))
+    assert key not in AssetReftypeInterface._options
+
+
+def test_update_scenenode_locks_taskfile_id(new_scene, djprj):
+    tf = djprj.assettaskfiles[0]
+    node = cmds.createNode("jb_sceneNode")
+    assert not cmds.getAttr("%s.taskfile_id" % node, lock=True)
+    commands.update_scenenode(JB_File(TaskFileInfo.create_from_taskfile(tf)))
+    assert cmds.getAttr("%s.taskfile_id" % node) == tf.pk
+    assert cmds.getAttr("%s.taskfile_id" % node, lock=True)
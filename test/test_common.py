@@ -1,4 +1,8 @@
+import os
+import time
+
 import pytest
+import maya.cmds as cmds
 
 from jukeboxmaya import common
 
@@ -31,3 +35,206 @@ def test_get_top_namespace(inp, expected):
 ])
 def test_get_namespace(inp, expected):
     assert common.get_namespace(inp) == expected
+
+
+def test_preserve_namespace_nested(new_scene):
+    cmds.namespace(add="foo")
+    cmds.namespace(add="bar")
+    with common.preserve_namespace(":foo"):
+        assert cmds.namespaceInfo(an=True) == ":foo"
+        with common.preserve_namespace(":bar"):
+            assert cmds.namespaceInfo(an=True) == ":bar"
+        assert cmds.namespaceInfo(an=True) == ":foo"
+        with common.preserve_namespace():
+            assert cmds.namespaceInfo(an=True) == ":foo"
+    assert cmds.namespaceInfo(an=True) == ":"
+
+
+def test_preserve_selection_nested(new_scene):
+    n1 = cmds.createNode("transform")
+    n2 = cmds.createNode("transform")
+    cmds.select(n1, replace=True)
+    with common.preserve_selection():
+        cmds.select(n2, replace=True)
+        with common.preserve_selection():
+            cmds.select(clear=True)
+        assert cmds.ls(sl=True) == [n2]
+    assert cmds.ls(sl=True) == [n1]
+
+
+def test_locknode_nested(new_scene):
+    nodes = [cmds.createNode("transform") for i in range(3)]
+    cmds.lockNode(nodes[0], lock=True)
+    with common.locknode(nodes, lock=False):
+        assert cmds.lockNode(nodes, q=True) == [False, False, False]
+        with common.locknode(nodes[1:], lock=True):
+            assert cmds.lockNode(nodes, q=True) == [False, True, True]
+        assert cmds.lockNode(nodes, q=True) == [False, False, False]
+        cmds.delete(nodes[2])
+    assert cmds.lockNode(nodes[:2], q=True) == [True, False]
+
+
+def test_scene_state_guard(new_scene):
+    cmds.namespace(add="foo")
+    cmds.namespace(add="bar")
+    nodes = [cmds.createNode("transform") for i in range(3)]
+    cmds.select(nodes[0], replace=True)
+    guard = common.SceneStateGuard.get()
+    with guard:
+        guard.save_selection()
+        guard.save_namespace(":foo")
+        guard.lock(nodes, lock=True)
+        with guard:
+            guard.lock(nodes[0], lock=False)
+            guard.save_selection()
+            cmds.select(nodes[1], replace=True)
+            guard.save_namespace()
+            # changes by other code are restored too
+            cmds.namespace(set=":bar")
+        assert guard.depth == 1
+        assert cmds.lockNode(nodes, q=True) == [True, True, True]
+        assert cmds.ls(sl=True) == [nodes[0]]
+        assert cmds.namespaceInfo(an=True) == ":foo"
+    assert guard.depth == 0
+    assert cmds.lockNode(nodes, q=True) == [False, False, False]
+    assert cmds.ls(sl=True) == [nodes[0]]
+    assert cmds.namespaceInfo(an=True) == ":"
+
+
+def test_disconnect_nodes(new_scene):
+    nodes = [cmds.createNode("transform") for i in range(3)]
+    other = cmds.createNode("transform")
+    cmds.connectAttr("%s.tx" % nodes[0], "%s.ty" % nodes[1])
+    cmds.connectAttr("%s.tx" % nodes[1], "%s.tx" % nodes[2])
+    cmds.connectAttr("%s.tz" % nodes[0], "%s.tz" % nodes[0])
+    cmds.connectAttr("%s.tx" % other, "%s.tx" % nodes[0])
+    cmds.connectAttr("%s.ty" % nodes[2], "%s.ty" % other)
+    assert common.disconnect_nodes(nodes) == 5
+    for n in nodes:
+        assert not cmds.listConnections(n, connections=True, plugs=True, shapes=False)
+    assert common.disconnect_nodes(nodes) == 0
+    cmds.undo()
+    assert cmds.isConnected("%s.tx" % nodes[0], "%s.ty" % nodes[1])
+    assert cmds.isConnected("%s.tx" % other, "%s.tx" % nodes[0])
+    assert cmds.isConnected("%s.tz" % nodes[0], "%s.tz" % nodes[0])
+
+
+def test_disconnect_nodes_direction(new_scene):
+    n1 = cmds.createNode("transform")
+    n2 = cmds.createNode("transform")
+    cmds.connectAttr("%s.tx" % n1, "%s.tx" % n2)
+    cmds.connectAttr("%s.ty" % n2, "%s.ty" % n1)
+    assert common.disconnect_nodes([n1], src=False) == 1
+    assert not cmds.isConnected("%s.tx" % n1, "%s.tx" % n2)
+    assert cmds.isConnected("%s.ty" % n2, "%s.ty" % n1)
+    assert common.disconnect_nodes([n1], dst=False) == 1
+    assert not cmds.isConnected("%s.ty" % n2, "%s.ty" % n1)
+
+
+NODES = ["|hallo1:wasgeht:asdfsa|:asdf:asdf|:hallo1:SAD", "|asdfsaf|asdf|hallo1:hallo",
+         "adsfadsf|asdf:asdf|hallo1:hallo", "hallo1:halloasdfasdf_Asdf", "asdfjkl|ADSfafs:asdf:asd|hallo",
+         "|hallo1:buh:yeah", "|:hallo1:buh:yeah", "|ab:cd|ef:gh:ij|kl:mn:op:qr", "hallo", "|hallo", "|:hallo"]
+
+
+def test_parse_namespaces():
+    namespaces, tops, counts = common.parse_namespaces(NODES)
+    assert namespaces == [common.get_namespace(n) for n in NODES]
+    assert tops == [common.get_top_namespace(n) for n in NODES]
+    assert counts == {":hallo1": 1, "hallo1": 3, ":": 4, "hallo1:buh": 1, ":hallo1:buh": 1, "kl:mn:op": 1}
+    assert common.get_namespaces(NODES) == namespaces
+    assert common.get_top_namespaces(NODES) == tops
+    assert common.get_namespace_counts(NODES) == counts
+    assert common.parse_namespaces([]) == ([], [], {})
+
+
+def test_parse_namespaces_many():
+    nodes = ["|grp%s|ns%s:sub%s:node%s" % (i % 10, i % 5, i % 7, i) for i in range(200)]
+    namespaces, tops, counts = common.parse_namespaces(nodes)
+    assert namespaces == [common.get_namespace(n) for n in nodes]
+    assert tops == [common.get_top_namespace(n) for n in nodes]
+    assert sum(counts.values()) == len(nodes)
+
+
+@pytest.mark.skipif("JUKEBOX_BENCHMARK" not in os.environ, reason="Set JUKEBOX_BENCHMARK to run benchmarks.")
+def test_parse_namespaces_benchmark():
+    nodes = ["|grp%s|ns%s:sub%s:node%s" % (i % 100, i % 50, i % 7, i) for i in range(200000)]
+    start = time.time()
+    namespaces = [common.get_namespace(n) for n in nodes]
+    tops = [common.get_top_namespace(n) for n in nodes]
+    percall = time.time() - start
+    start = time.time()
+    result = common.parse_namespaces(nodes)
+    batch = time.time() - start
+    print "per call: %.3fs, batch: %.3fs for %s nodes" % (percall, batch, len(nodes))
+    assert result[0] == namespaces
+    assert result[1] == tops
+    assert sum(result[2].values()) == len(nodes)
+
+
+def test_get_set_attributes(new_scene):
+    nodes = [cmds.createNode("jb_reftrack") for i in range(3)]
+    common.set_attributes(nodes, {"identifier": [1, 2, 3], "namespace": ["a", "b", ":c"], "type": [0, 0, 0]})
+    values = common.get_attributes(nodes, ["identifier", "namespace", "type"])
+    assert values == {"identifier": [1, 2, 3], "namespace": ["a", "b", ":c"], "type": [0, 0, 0]}
+    assert [cmds.getAttr("%s.identifier" % n) for n in nodes] == [1, 2, 3]
+    cmds.undo()
+    assert common.get_attributes(nodes, ["identifier"]) == {"identifier": [0, 0, 0]}
+    with pytest.raises(ValueError):
+        common.set_attributes(nodes, {"identifier": [1]})
+
+
+def test_set_attributes_locked(new_scene):
+    node = cmds.createNode("jb_sceneNode")
+    cmds.setAttr("%s.taskfile_id" % node, lock=True)
+    common.set_attributes([node], {"taskfile_id": [42]})
+    assert cmds.getAttr("%s.taskfile_id" % node) == 42
+    assert cmds.getAttr("%s.taskfile_id" % node, lock=True)
+    cmds.undo()
+    assert cmds.getAttr("%s.taskfile_id" % node) == 0
+    assert cmds.getAttr("%s.taskfile_id" % node, lock=True)
+
+
+def test_set_attributes_lock(new_scene):
+    node = cmds.createNode("jb_sceneNode")
+    common.set_attributes([node], {"taskfile_id": [42]}, lock=True)
+    assert cmds.getAttr("%s.taskfile_id" % node) == 42
+    assert cmds.getAttr("%s.taskfile_id" % node, lock=True)
+    cmds.undo()
+    assert cmds.getAttr("%s.taskfile_id" % node) == 0
+    assert not cmds.getAttr("%s.taskfile_id" % node, lock=True)
+    common.set_attributes([node], {"taskfile_id": [42]}, lock=True)
+    common.set_attributes([node], {"taskfile_id": [43]}, lock=False)
+    assert not cmds.getAttr("%s.taskfile_id" % node, lock=True)
+
+
+def test_get_set_attributes_duplicates(new_scene):
+    node = cmds.createNode("jb_reftrack")
+    assert common.get_attributes([node, node], ["identifier"]) == {"identifier": [0, 0]}
+    common.set_attributes([node, node], {"identifier": [1, 2]})
+    assert cmds.getAttr("%s.identifier" % node) == 2
+
+
+def test_get_plug_type_compound(new_scene):
+    node = cmds.createNode("transform")
+    with pytest.raises(TypeError):
+        common.get_attributes([node], ["translate"])
+
+
+def test_disable_undo(new_scene):
+    cmds.undoInfo(state=True)
+    node = cmds.createNode("transform")
+    with common.disable_undo():
+        assert not cmds.undoInfo(query=True, state=True)
+        cmds.delete(node)
+    assert cmds.undoInfo(query=True, state=True)
+    # the queue was flushed, so the stale creation is not undone
+    cmds.undo()
+    assert not cmds.objExists(node)
+
+
+def test_suspend_refresh_nested():
+    with common.suspend_refresh():
+        with common.suspend_refresh():
+            pass
+        assert cmds.refresh(query=True, suspend=True)
+    assert not cmds.refresh(query=True, suspend=True)
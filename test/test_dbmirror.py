@@ -0,0 +1,113 @@
+import pytest
+
+from jukeboxcore import djadapter as dj
+from jukeboxmaya.dbmirror import DBMirror
+
+
+@pytest.fixture(scope="function")
+def mirror(djprj):
+    m = DBMirror(":memory:")
+    m.sync()
+    return m
+
+
+def test_get(djprj, mirror):
+    tf = djprj.assettaskfiles[0]
+    mtf = mirror.get(dj.models.TaskFile, tf.pk)
+    assert mtf == tf
+    assert mtf.path == tf.path
+    assert mtf.version == tf.version
+    assert mtf.task == tf.task
+    assert mtf.task.department == tf.task.department
+    assert mtf.task.element == tf.task.element
+    assert mtf.task.project == tf.task.project
+    with pytest.raises(dj.models.TaskFile.DoesNotExist):
+        mirror.get(dj.models.TaskFile, -1)
+
+
+def test_get_many(djprj, mirror):
+    tfs = djprj.shottaskfiles[:3]
+    objs = mirror.get_many(dj.models.TaskFile, [tf.pk for tf in tfs] + [-1])
+    assert sorted(objs) == sorted(tf.pk for tf in tfs)
+    for tf in tfs:
+        assert objs[tf.pk].task == tf.task
+
+
+def test_filter_and_tasks(djprj, mirror):
+    asset = djprj.assets[0]
+    tasks = mirror.get_tasks(asset)
+    assert sorted(t.pk for t in tasks) == sorted(t.pk for t in asset.tasks.all())
+    tfs = mirror.filter(dj.models.TaskFile, {'task_id': tasks[0].pk, 'releasetype': 'release'})
+    assert sorted(tf.pk for tf in tfs) == sorted(tasks[0].taskfile_set.filter(releasetype='release').values_list('pk', flat=True))
+
+
+def test_filter_list_and_values_list(djprj, mirror):
+    tfs = djprj.assettaskfiles[:2]
+    objs = mirror.filter(dj.models.TaskFile, {'id': [tf.pk for tf in tfs]})
+    assert sorted(tf.pk for tf in objs) == sorted(tf.pk for tf in tfs)
+    rows = mirror.values_list(dj.models.TaskFile, ['id', 'version'], {'id': [tf.pk for tf in tfs]})
+    assert sorted(rows) == sorted((tf.pk, tf.version) for tf in tfs)
+    with pytest.raises(ValueError):
+        mirror.filter(dj.models.TaskFile, {'id': [tfs[0].pk], 'version': [1]})
+
+
+def test_get_linked(djprj, mirror):
+    shot = djprj.shots[0]
+    linked = mirror.get_linked(shot, 'assets')
+    assert sorted(a.pk for a in linked) == sorted(a.pk for a in shot.assets.all())
+
+
+def test_sync_changes(djprj, mirror):
+    task = djprj.assettasks[0]
+    tf = dj.taskfiles.create(task=task, user=djprj.assettaskfiles[0].user, path="mirrortest",
+                             version=99, releasetype='release', typ=dj.FILETYPES['mayamainscene'])
+    assert not mirror.is_mirrored(tf)
+    assert mirror.get(dj.models.TaskFile, tf.pk).path == "mirrortest"
+    mirror.sync()
+    assert mirror.is_mirrored(tf)
+    assert mirror.get(dj.models.TaskFile, tf.pk).path == "mirrortest"
+    pk = tf.pk
+    tf.delete()
+    mirror.sync()
+    assert mirror.get_many(dj.models.TaskFile, [pk]) == {}
+    with pytest.raises(dj.models.TaskFile.DoesNotExist):
+        mirror.get(dj.models.TaskFile, pk)
+
+
+def test_sync_links(djprj, mirror):
+    shot = djprj.shots[0]
+    asset = [a for a in djprj.assets if a not in shot.assets.all()][0]
+    shot.assets.add(asset)
+    assert asset.pk not in [a.pk for a in mirror.get_linked(shot, 'assets')]
+    assert mirror.sync()['links'] == 1
+    assert asset.pk in [a.pk for a in mirror.get_linked(shot, 'assets')]
+    shot.assets.remove(asset)
+    assert mirror.sync()['links'] == 1
+    assert asset.pk not in [a.pk for a in mirror.get_linked(shot, 'assets')]
+
+
+def test_fallback(djprj, mirror):
+    asset = djprj.assets[0]
+    shot = dj.shots.create(project=djprj.prjs[0], sequence=djprj.sequences[0], name="Mirror01", description="not mirrored")
+    shot.assets.add(asset)
+    assert not mirror.is_mirrored(shot)
+    assert [a.pk for a in mirror.get_linked(shot, 'assets')] == [asset.pk]
+    assert mirror.get_tasks(shot) == list(shot.tasks.all())
+    assert mirror.get(dj.models.Shot, shot.pk) == shot
+
+
+def test_is_due():
+    m = DBMirror(":memory:", interval=0)
+    assert m.is_due()
+    m.lastsync = 0
+    assert not m.is_due()
+    m.interval = 10
+    assert m.is_due()
+
+
+def test_sync_in_background(djprj, mirror):
+    mirror.lastsync = None
+    t = mirror.sync_in_background()
+    assert mirror.sync_in_background() is t or not t.is_alive()
+    t.join()
+    assert not mirror.is_due()
@@ -0,0 +1,100 @@
+import os
+
+import maya.cmds as cmds
+
+from jukeboxmaya.filecache import FileCache
+
+
+def create_file(tmpdir, name, size):
+    f = tmpdir.join(name)
+    f.write("x" * size)
+    return str(f)
+
+
+def test_get_path(tmpdir):
+    cache = FileCache(str(tmpdir.mkdir("cache")), 1000)
+    src = create_file(tmpdir, "a.mb", 100)
+    p = cache.get_path(1, src)
+    assert p != src
+    assert os.path.dirname(p) == cache.cachedir
+    assert open(p).read() == open(src).read()
+    assert cache.get_path(1, src) == p
+
+
+def test_get_path_changed(tmpdir):
+    cache = FileCache(str(tmpdir.mkdir("cache")), 1000)
+    src = create_file(tmpdir, "a.mb", 100)
+    p = cache.get_path(1, src)
+    create_file(tmpdir, "a.mb", 200)
+    assert cache.get_path(1, src) != p
+
+
+def test_evict(tmpdir):
+    cache = FileCache(str(tmpdir.mkdir("cache")), 250)
+    srcs = [create_file(tmpdir, "%s.mb" % i, 100) for i in range(3)]
+    paths = []
+    for i, src in enumerate(srcs):
+        paths.append(cache.fetch(i, src))
+        os.utime(paths[-1], (i, i))
+    cache.evict()
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1])
+    assert os.path.exists(paths[2])
+
+
+def test_evict_pinned(tmpdir):
+    cache = FileCache(str(tmpdir.mkdir("cache")), 150)
+    srcs = [create_file(tmpdir, "%s.mb" % i, 100) for i in range(2)]
+    pinned = cache.get_path(0, srcs[0])
+    os.utime(pinned, (0, 0))
+    other = cache.fetch(1, srcs[1])
+    assert os.path.exists(pinned)
+    assert not os.path.exists(other)
+    cache.unpin(pinned)
+    cache.maxsize = 50
+    cache.evict()
+    assert not os.path.exists(pinned)
+
+
+def test_map(tmpdir):
+    cmds.dirmap(enable=False)
+    cache = FileCache(str(tmpdir.mkdir("cache")), 1000)
+    src = create_file(tmpdir, "a.ma", 100)
+    assert cache.map(1, src) is True
+    cachepath = cache.get_cachepath(1, src)
+    assert cmds.dirmap(query=True, enable=True)
+    assert cmds.dirmap(convertDirectory=src) == cachepath
+    assert cache.map(1, str(tmpdir)) is False
+    cache.release(src)
+    assert cmds.dirmap(convertDirectory=src) == src
+    assert not cmds.dirmap(query=True, enable=True)
+    cache.maxsize = 50
+    cache.evict()
+    assert not os.path.exists(cachepath)
+
+
+def test_map_other_mappings(tmpdir):
+    cmds.dirmap(enable=False)
+    other = str(tmpdir.mkdir("other"))
+    cmds.dirmap(mapDirectory=(other, str(tmpdir)))
+    try:
+        cache = FileCache(str(tmpdir.mkdir("cache")), 1000)
+        src = create_file(tmpdir, "a.ma", 100)
+        assert cache.map(1, src) is False
+        assert not cmds.dirmap(query=True, enable=True)
+    finally:
+        cmds.dirmap(unmapDirectory=other)
+
+
+def test_prefetch(tmpdir):
+    cache = FileCache(str(tmpdir.mkdir("cache")), 1000)
+    srcs = [create_file(tmpdir, "%s.mb" % i, 10) for i in range(3)]
+    t = cache.prefetch(list(enumerate(srcs)))
+    t.join()
+    for i, src in enumerate(srcs):
+        assert os.path.exists(cache.get_cachepath(i, src))
+
+
+def test_get_disabled(monkeypatch):
+    monkeypatch.delenv("JUKEBOX_MAYA_FILECACHE", raising=False)
+    assert FileCache.get() is None
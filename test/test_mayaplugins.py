@@ -19,3 +19,18 @@ def test_get_current_scene_node():
     node2 = cmds.createNode('jb_sceneNode')
     cmds.namespace(set='somescene')
     eq_(jbscene.get_current_scene_node(), node2)
+
+
+def test_jbapiundo():
+    import maya.OpenMaya as OpenMaya
+    from jukeboxmaya import common
+    cmds.file(new=True, f=True)
+    mod = OpenMaya.MDGModifier()
+    mod.createNode("jb_reftrack")
+    mod.createNode("jb_reftrack")
+    common.do_modifier(mod)
+    eq_(len(cmds.ls(type="jb_reftrack")), 2)
+    cmds.undo()
+    eq_(len(cmds.ls(type="jb_reftrack")), 0)
+    cmds.redo()
+    eq_(len(cmds.ls(type="jb_reftrack")), 2)
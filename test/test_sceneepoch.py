@@ -0,0 +1,68 @@
+import maya.cmds as cmds
+
+from jukeboxmaya import sceneepoch
+
+
+def test_installed():
+    assert sceneepoch.SceneEpoch.get().is_installed()
+    assert sceneepoch.get_epoch() is not None
+
+
+def test_bump_on_scene_change(new_scene):
+    epoch = sceneepoch.get_epoch()
+    cmds.createNode("transform")
+    assert sceneepoch.get_epoch() == epoch
+    cmds.createNode("jb_reftrack")
+    assert sceneepoch.get_epoch() > epoch
+    epoch = sceneepoch.get_epoch()
+    n = cmds.createNode("jb_sceneNode")
+    assert sceneepoch.get_epoch() > epoch
+    epoch = sceneepoch.get_epoch()
+    cmds.delete(n)
+    assert sceneepoch.get_epoch() > epoch
+    epoch = sceneepoch.get_epoch()
+    cmds.file(new=True, force=True)
+    assert sceneepoch.get_epoch() > epoch
+
+
+def test_no_bump_on_rename_and_connection(new_scene):
+    n1 = cmds.createNode("jb_reftrack")
+    n2 = cmds.createNode("jb_reftrack")
+    epoch = sceneepoch.get_epoch()
+    cmds.rename(n1, "foo")
+    cmds.connectAttr("foo.parent", "%s.children" % n2, nextAvailable=True)
+    assert sceneepoch.get_epoch() == epoch
+
+
+def test_bump_on_undo_redo(new_scene):
+    cmds.createNode("transform")
+    epoch = sceneepoch.get_epoch()
+    cmds.undo()
+    assert sceneepoch.get_epoch() > epoch
+    epoch = sceneepoch.get_epoch()
+    cmds.redo()
+    assert sceneepoch.get_epoch() > epoch
+
+
+def test_scene(new_scene):
+    scene = sceneepoch.get_scene()
+    cmds.createNode("jb_reftrack")
+    assert sceneepoch.get_scene() == scene
+    cmds.file(new=True, force=True)
+    assert sceneepoch.get_scene() > scene
+
+
+def test_memoize_per_epoch():
+    calls = []
+
+    @sceneepoch.memoize_per_epoch
+    def f(x):
+        calls.append(x)
+        return x
+
+    assert f(1) == 1
+    assert f(1) == 1
+    assert calls == [1]
+    sceneepoch.bump()
+    assert f(1) == 1
+    assert calls == [1, 1]